@@ -0,0 +1,219 @@
+"""
+SUITE DE RENDIMIENTO PARA SERIES TEMPORALES
+Sesión 12: Series Temporales en Pandas
+
+Genera los cuatro datasets a escala con `series_temporales.sinteticos`,
+los escribe como CSV y mide las cargas de trabajo principales del paquete:
+carga (CSV y cache), consulta de un día sobre el dataset particionado,
+pirámide de resample, estadísticas móviles por pozo, pendiente de
+tendencia, correlación móvil, cruce con eventos y detección de anomalías.
+
+Cada carga se repite varias veces y se informa el mejor tiempo, la mediana,
+el rendimiento (filas por segundo) y el pico de memoria medido con
+tracemalloc en una corrida aparte. El reporte se escribe en JSON para
+comparar corridas: con --comparar se muestra la relación de tiempos contra
+un reporte anterior y, con --tolerancia, el script termina con error si
+alguna carga es más lenta que lo tolerado.
+
+Uso:
+    python benchmarks/benchmark_series.py --pozos 50 --anios 1 --salida benchmarks/reporte_50_pozos.json
+    python benchmarks/benchmark_series.py --pozos 50 --comparar benchmarks/reporte_50_pozos.json --tolerancia 1.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Carpeta de este script: ahí quedan los reportes por defecto
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(CARPETA, '..'))
+from series_temporales import (DetectorLimites, abrir_particiones, cargar_dataset, correlacion_movil_tiempo,
+                               estadisticas_moviles_por_grupo, leer_particiones, marcar_eventos, pendiente_movil,
+                               piramide_resample)
+from series_temporales.grupos import limites_grupos, ordenar_por_grupo
+from series_temporales.sinteticos import escribir_datasets
+
+
+def _por_pozo(df, columna):
+    """Valores de `columna` de cada pozo en orden de fecha"""
+    ordenado, codigos, _ = ordenar_por_grupo(df, 'pozo_id')
+    limites = np.r_[limites_grupos(codigos), len(ordenado)]
+    serie = ordenado[columna]
+    return [serie.iloc[desde:hasta] for desde, hasta in zip(limites[:-1], limites[1:])]
+
+
+def _pendiente_por_pozo(series):
+    for serie in series:
+        pendiente_movil(serie, 28)
+
+
+def _anomalias_por_pozo(series):
+    for serie in series:
+        DetectorLimites(ventana=28, sigmas=3).actualizar(serie)
+
+
+def cargas_de_trabajo(rutas):
+    """Lista de (nombre, filas, función sin argumentos) con los datos ya preparados"""
+    sensores = cargar_dataset('sensores_temporales', ruta=rutas['sensores_temporales'])
+    parametros = cargar_dataset('parametros_pozos', ruta=rutas['parametros_pozos'])
+    eventos = cargar_dataset('eventos_operacionales', ruta=rutas['eventos_operacionales'])
+    caudales = _por_pozo(parametros, 'caudal_bpd')
+    valor = sensores['valor']
+    particiones = abrir_particiones('sensores_temporales', ruta=rutas['sensores_temporales'])
+    dia = str(sensores.index[len(sensores) // 2].date())
+    return [
+        ('carga_csv', len(sensores),
+         lambda: cargar_dataset('sensores_temporales', ruta=rutas['sensores_temporales'], usar_cache=False)),
+        ('carga_cache', len(sensores),
+         lambda: cargar_dataset('sensores_temporales', ruta=rutas['sensores_temporales'])),
+        ('consulta_particionada', len(sensores.loc[dia]), lambda: leer_particiones(particiones, dia, dia)),
+        ('piramide_resample', len(sensores),
+         lambda: piramide_resample(valor, ['15min', 'h', 'D', 'W'], ['mean', 'std', 'min', 'max', 'count'])),
+        ('estadisticas_moviles', len(parametros),
+         lambda: estadisticas_moviles_por_grupo(parametros, 'pozo_id', ['mean', 'std', 'min', 'max'], [28, 120],
+                                                columnas=['caudal_bpd', 'presion_cabeza_psi'])),
+        ('pendiente_tendencia', len(parametros), lambda: _pendiente_por_pozo(caudales)),
+        ('correlacion_movil', len(parametros),
+         lambda: correlacion_movil_tiempo(parametros, 'caudal_bpd', 'presion_cabeza_psi', '7D',
+                                          columna_grupo='pozo_id')),
+        ('cruce_eventos', len(sensores), lambda: marcar_eventos(sensores, eventos)),
+        ('deteccion_anomalias', len(parametros), lambda: _anomalias_por_pozo(caudales)),
+    ]
+
+
+def medir(funcion, repeticiones):
+    """(mejor tiempo, mediana, pico de memoria en bytes) de una carga de trabajo"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    # tracemalloc enlentece la ejecución: la memoria se mide en una corrida aparte
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return min(tiempos), statistics.median(tiempos), pico
+
+
+def ejecutar(configuracion, repeticiones, destino, seleccion=None):
+    """Genera los datos, mide cada carga de trabajo y devuelve el reporte como diccionario"""
+    inicio = time.perf_counter()
+    rutas = escribir_datasets(destino, **configuracion)
+    generacion = time.perf_counter() - inicio
+    # La primera carga escribe el cache que mide 'carga_cache'
+    tamanos = {nombre: len(cargar_dataset(nombre, ruta=ruta)) for nombre, ruta in rutas.items()}
+
+    resultados = []
+    for nombre, filas, funcion in cargas_de_trabajo(rutas):
+        if seleccion and nombre not in seleccion:
+            continue
+        mejor, mediana, pico = medir(funcion, repeticiones)
+        resultados.append({
+            'carga': nombre,
+            'filas': int(filas),
+            'segundos': mejor,
+            'segundos_mediana': mediana,
+            'filas_por_segundo': filas / mejor if mejor > 0 else None,
+            'memoria_pico_mb': pico / 1e6,
+        })
+        print(f"• {nombre:<22} {filas:>10} filas  {mejor:8.3f} s  "
+              f"{filas / mejor / 1e6:8.2f} M filas/s  {pico / 1e6:8.1f} MB")
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'procesadores': os.cpu_count(),
+        },
+        'configuracion': dict(configuracion, repeticiones=repeticiones),
+        'filas': tamanos,
+        'segundos_generacion': generacion,
+        'resultados': resultados,
+    }
+
+
+def comparar(reporte, anterior, tolerancia=None):
+    """Imprime la relación de tiempos contra un reporte anterior; devuelve las cargas más lentas que `tolerancia`"""
+    previos = {resultado['carga']: resultado for resultado in anterior['resultados']}
+    lentas = []
+    print("\nComparación con el reporte anterior (tiempo actual / anterior):")
+    for resultado in reporte['resultados']:
+        previo = previos.get(resultado['carga'])
+        if previo is None:
+            continue
+        relacion = resultado['segundos'] / previo['segundos']
+        marca = ''
+        if tolerancia is not None and relacion > tolerancia:
+            lentas.append(resultado['carga'])
+            marca = '  ← más lenta'
+        print(f"• {resultado['carga']:<22} {relacion:6.2f}x{marca}")
+    if anterior.get('configuracion') != reporte['configuracion']:
+        print("  (las configuraciones difieren: la comparación es orientativa)")
+    return lentas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento de series_temporales sobre datos sintéticos")
+    parser.add_argument('--pozos', type=int, default=20)
+    parser.add_argument('--sensores', type=int, default=4, help="sensores por pozo")
+    parser.add_argument('--anios', type=float, default=1.0)
+    parser.add_argument('--huecos', type=float, default=0.01, help="fracción de lecturas faltantes")
+    parser.add_argument('--anomalias', type=float, default=0.002, help="fracción de lecturas con picos")
+    parser.add_argument('--eventos', type=float, default=4, help="eventos por pozo y mes")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--cargas', nargs='*', help="medir solo estas cargas de trabajo")
+    parser.add_argument('--destino', help="carpeta para los CSV generados (temporal por defecto)")
+    parser.add_argument('--salida', default=os.path.join(CARPETA, 'reporte_benchmark.json'),
+                        help="reporte JSON (por defecto, junto a este script)")
+    parser.add_argument('--comparar', help="reporte JSON anterior para comparar tiempos")
+    parser.add_argument('--tolerancia', type=float, help="relación de tiempo máxima aceptada al comparar")
+    argumentos = parser.parse_args(argumentos)
+
+    configuracion = {
+        'pozos': argumentos.pozos,
+        'sensores_por_pozo': argumentos.sensores,
+        'anios': argumentos.anios,
+        'tasa_huecos': argumentos.huecos,
+        'tasa_anomalias': argumentos.anomalias,
+        'eventos_por_pozo_mes': argumentos.eventos,
+        'semilla': argumentos.semilla,
+    }
+    print("Configuración:", configuracion)
+    with tempfile.TemporaryDirectory() as temporal:
+        reporte = ejecutar(configuracion, argumentos.repeticiones, argumentos.destino or temporal,
+                           argumentos.cargas)
+
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    print(f"\nReporte escrito en {argumentos.salida}")
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding='utf-8') as archivo:
+            lentas = comparar(reporte, json.load(archivo), argumentos.tolerancia)
+        if lentas:
+            print(f"Cargas más lentas que la tolerancia: {', '.join(lentas)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
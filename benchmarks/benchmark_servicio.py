@@ -0,0 +1,177 @@
+"""
+RENDIMIENTO DEL SERVICIO DE INGESTA EN VIVO
+Sesión 12: Series Temporales en Pandas
+
+Genera un archivo de sensores a escala con `series_temporales.sinteticos` y
+mide cuántas lecturas por segundo sostiene `ServicioIngesta`:
+
+- procesamiento: las líneas del archivo pasan directo a `procesar_bloque`,
+  sin red (el techo del servicio).
+- tcp / unix: el cliente de reproducción envía el archivo completo por un
+  socket local tan rápido como puede y se mide hasta que el servicio
+  procesó la última línea.
+
+Para cada corrida con socket se informa también la latencia de las alertas
+(desde que llega el bloque con la lectura hasta que el suscriptor la
+recibe): mediana, percentil 99 y máximo. Con --velocidad el cliente respeta
+el tiempo entre lecturas acelerado por ese factor, como un gateway real.
+
+Uso:
+    python benchmarks/benchmark_servicio.py --pozos 20 --anios 0.25 --salida benchmarks/reporte_servicio_20_pozos.json
+    python benchmarks/benchmark_servicio.py --pozos 5 --anios 1 --velocidad 86400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Carpeta de este script: ahí quedan los reportes por defecto
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(CARPETA, '..'))
+from series_temporales.servicio import ServicioIngesta, reproducir
+from series_temporales.sinteticos import escribir_datasets
+
+
+def medir_procesamiento(texto):
+    """(segundos, resumen) de procesar el texto completo sin red"""
+    servicio = ServicioIngesta()
+    inicio = time.perf_counter()
+    servicio.procesar_bloque(texto)
+    return time.perf_counter() - inicio, servicio.resumen()
+
+
+async def _recolectar(cola, latencias):
+    while True:
+        alerta = await cola.get()
+        latencias.append(time.perf_counter() - alerta['recibido'])
+
+
+async def medir_socket(ruta, unix=None, velocidad=None):
+    """(segundos, resumen, latencias de alertas en segundos) de enviar el archivo por un socket"""
+    servicio = ServicioIngesta()
+    latencias = []
+    cola = servicio.suscribir()
+    recolector = asyncio.create_task(_recolectar(cola, latencias))
+    if unix is not None:
+        servidor = await servicio.servir_unix(unix)
+        destino = {'unix': unix}
+    else:
+        servidor = await servicio.servir_tcp(puerto=0)
+        destino = {'puerto': servidor.sockets[0].getsockname()[1]}
+
+    async with servidor:
+        inicio = time.perf_counter()
+        enviadas = await reproducir(ruta, velocidad=velocidad, **destino)
+        while servicio.lineas < enviadas:
+            await asyncio.sleep(0.001)
+        segundos = time.perf_counter() - inicio
+        # Deja que el suscriptor reciba las últimas alertas
+        while not cola.empty():
+            await asyncio.sleep(0.001)
+    recolector.cancel()
+    return segundos, servicio.resumen(), latencias
+
+
+def _resultado(nombre, segundos, resumen, latencias=None):
+    resultado = {
+        'corrida': nombre,
+        'lecturas': resumen['lecturas'],
+        'segundos': segundos,
+        'lecturas_por_segundo': resumen['lecturas'] / segundos if segundos > 0 else None,
+        'alertas': resumen['alertas'],
+    }
+    texto = f"• {nombre:<14} {resumen['lecturas']:>10} lecturas  {segundos:8.3f} s  " \
+            f"{resultado['lecturas_por_segundo']:>12,.0f} lecturas/s"
+    if latencias:
+        milisegundos = np.asarray(latencias) * 1e3
+        resultado.update(latencia_mediana_ms=float(np.median(milisegundos)),
+                         latencia_p99_ms=float(np.percentile(milisegundos, 99)),
+                         latencia_maxima_ms=float(milisegundos.max()))
+        texto += f"  alertas: {len(latencias)}, latencia mediana {resultado['latencia_mediana_ms']:.2f} ms, " \
+                 f"p99 {resultado['latencia_p99_ms']:.2f} ms"
+    print(texto)
+    return resultado
+
+
+def ejecutar(configuracion, destino, repeticiones=3, velocidad=None):
+    """Genera los datos, mide cada corrida y devuelve el reporte como diccionario"""
+    ruta = escribir_datasets(destino, **configuracion)['sensores_temporales']
+    with open(ruta, encoding='utf-8') as archivo:
+        texto = archivo.read()
+
+    resultados = []
+    if velocidad is None:
+        corridas = [medir_procesamiento(texto) for _ in range(repeticiones)]
+        segundos = min(segundos for segundos, _ in corridas)
+        resultados.append(_resultado('procesamiento', segundos, corridas[0][1]))
+
+    sockets = [('tcp', None)]
+    if hasattr(socket, 'AF_UNIX'):
+        sockets.append(('unix', os.path.join(destino, 'servicio.sock')))
+    for nombre, unix in sockets:
+        corridas = [asyncio.run(medir_socket(ruta, unix, velocidad))
+                    for _ in range(1 if velocidad is not None else repeticiones)]
+        segundos, resumen, latencias = min(corridas, key=lambda corrida: corrida[0])
+        resultados.append(_resultado(nombre, segundos, resumen, latencias))
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'procesadores': os.cpu_count(),
+        },
+        'configuracion': dict(configuracion, repeticiones=repeticiones, velocidad=velocidad),
+        'lineas': texto.count('\n'),
+        'resultados': resultados,
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Lecturas por segundo del servicio de ingesta en vivo')
+    parser.add_argument('--pozos', type=int, default=10)
+    parser.add_argument('--sensores', type=int, default=4, help='sensores por pozo')
+    parser.add_argument('--anios', type=float, default=0.25)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--velocidad', type=float, default=None,
+                        help='factor sobre el tiempo real para el cliente (por defecto, sin pausas)')
+    parser.add_argument('--destino', help='carpeta para el CSV generado (por defecto, una temporal)')
+    parser.add_argument('--salida', default=os.path.join(CARPETA, 'reporte_servicio.json'),
+                        help='reporte JSON (por defecto, junto a este script)')
+    argumentos = parser.parse_args(argumentos)
+
+    configuracion = {
+        'pozos': argumentos.pozos,
+        'sensores_por_pozo': argumentos.sensores,
+        'anios': argumentos.anios,
+        'semilla': argumentos.semilla,
+    }
+    print(f"Configuración: {configuracion}")
+    if argumentos.destino:
+        reporte = ejecutar(configuracion, argumentos.destino, argumentos.repeticiones, argumentos.velocidad)
+    else:
+        with tempfile.TemporaryDirectory() as destino:
+            reporte = ejecutar(configuracion, destino, argumentos.repeticiones, argumentos.velocidad)
+
+    with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    print(f"\nReporte escrito en {argumentos.salida}")
+
+
+if __name__ == '__main__':
+    main()
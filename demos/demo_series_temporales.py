@@ -3,305 +3,394 @@ DEMOSTRACIÓN: ANÁLISIS DE SERIES TEMPORALES EN EL SECTOR PETROLERO
 Sesión 12: Series Temporales en Pandas
 
 Este script demuestra técnicas avanzadas de análisis temporal aplicadas a datos petroleros
+
+Cada demostración y cada paso del pipeline se mide como una etapa (tiempo,
+CPU, pico de memoria y filas). Con una ruta de reporte el registro se
+activa y se escribe en JSON o CSV según la extensión; sin ella no se mide.
+
+Uso:
+    python demos/demo_series_temporales.py
+    python demos/demo_series_temporales.py reporte_etapas.json
 """
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales import (DetectorLimites, Instrumentacion, construir_pipeline, graficar_serie, graficos,
+                               marcar_eventos)
 
 # Configuración para mejor visualización
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', None)
 pd.set_option('display.max_colwidth', 50)
 
+# Los cálculos de las demostraciones 1 a 7 declarados como pasos de un
+# pipeline diferido: cada dataset se carga una vez y cada paso repetido (la
+# media móvil de 28 lecturas de las demostraciones 1 y 7, el límite ± 2·std)
+# se calcula una sola vez
+ESPECIFICACION_DEMO = {
+    'fuentes': {
+        'produccion': 'produccion_historica',
+        'sensores': 'sensores_temporales',
+        'eventos': 'eventos_operacionales',
+    },
+    'pasos': {
+        # 1. Tendencias y cambios porcentuales de producción
+        'produccion_bpd': ('columna', 'produccion', {'nombre': 'produccion_bpd'}),
+        'produccion_ma_7d': ('rolling', 'produccion_bpd', {'ventana': 28, 'estadistica': 'mean'}),
+        'produccion_ma_30d': ('rolling', 'produccion_bpd', {'ventana': 120, 'estadistica': 'mean'}),
+        'cambio_diario': ('*', [('pct_change', 'produccion_bpd'), 100]),
+        'cambio_semanal': ('*', [('pct_change', 'produccion_bpd', {'periodos': 28}), 100]),
+        # 2. Sensores a 1 hora y 1 día
+        'sensores_hora': ('resample', ('numericas', 'sensores'), {'freq': 'h', 'especificacion': 'mean'}),
+        'sensores_dia': ('resample', 'sensores', {'freq': 'D', 'especificacion': {
+            'valor': ['mean', 'std', 'min', 'max'],
+            'pozo_id': 'first',
+            'tipo_sensor': 'first',
+        }}),
+        # 3. Eventos por tipo y por día
+        'eventos_por_tipo': ('metodo', ('agrupar', 'eventos', {'por': 'tipo_evento', 'especificacion': {
+            'duracion_horas': ['count', 'mean', 'sum'],
+            'impacto_produccion': ['mean', 'sum'],
+        }}), {'nombre': 'round', 'args': (2,)}),
+        'eventos_diarios': ('metodo', ('resample', 'eventos', {'freq': 'D', 'especificacion': {
+            'duracion_horas': 'sum',
+            'impacto_produccion': 'sum',
+            'tipo_evento': 'count',
+        }}), {'nombre': 'rename', 'kwargs': {'columns': {'tipo_evento': 'num_eventos'}}}),
+        # 4. Producción diaria junto a los eventos
+        'produccion_diaria': ('resample', 'produccion_bpd', {'freq': 'D', 'especificacion': ['mean', 'std']}),
+        'analisis_integrado': ('metodo', ('concatenar', ['produccion_diaria', 'eventos_diarios']),
+                               {'nombre': 'fillna', 'args': (0,)}),
+        'correlaciones': ('metodo', 'analisis_integrado', {'nombre': 'corr'}),
+        # 6. Patrones por hora del día y día de la semana
+        'produccion_por_hora': ('calendario', 'produccion_bpd',
+                                {'campo': 'hour', 'nombre': 'hora', 'agregados': ['mean', 'std']}),
+        'produccion_por_dia': ('calendario', 'produccion_bpd',
+                               {'campo': 'dayofweek', 'nombre': 'dia_semana', 'agregados': ['mean', 'std']}),
+        # 7. Límites de control (2 desviaciones estándar) y anomalías
+        'produccion_std_7d': ('rolling', 'produccion_bpd', {'ventana': 28, 'estadistica': 'std'}),
+        'limite_superior': ('+', [('rolling', 'produccion_bpd', {'ventana': 28, 'estadistica': 'mean'}),
+                                  ('*', [2, 'produccion_std_7d'])]),
+        'limite_inferior': ('-', [('rolling', 'produccion_bpd', {'ventana': 28, 'estadistica': 'mean'}),
+                                  ('*', [2, 'produccion_std_7d'])]),
+        'es_anomalia': ('|', [('>', ['produccion_bpd', 'limite_superior']),
+                              ('<', ['produccion_bpd', 'limite_inferior'])]),
+    },
+}
+
 print("=" * 80)
 print("DEMOSTRACIÓN: ANÁLISIS DE SERIES TEMPORALES EN EL SECTOR PETROLERO")
 print("=" * 80)
 
+# Registro de etapas: solo se activa si se pide un reporte
+REPORTE = sys.argv[1] if len(sys.argv) > 1 else None
+instrumentacion = Instrumentacion(activa=REPORTE is not None)
+
+with instrumentacion.etapa('pipeline'):
+    pipeline, pasos = construir_pipeline(ESPECIFICACION_DEMO)
+    resultados = pipeline.evaluar(pasos, instrumentacion=instrumentacion)
+
 # =============================================================================
 # DEMOSTRACIÓN 1: ANÁLISIS COMPLETO DE PRODUCCIÓN
 # =============================================================================
 
-print("\n1. ANÁLISIS COMPLETO DE PRODUCCIÓN PETROLERA")
-print("-" * 50)
+with instrumentacion.etapa('produccion') as etapa:
+    print("\n1. ANÁLISIS COMPLETO DE PRODUCCIÓN PETROLERA")
+    print("-" * 50)
 
-# Cargar datos de producción
-df_produccion = pd.read_csv('../datos/produccion_historica.csv')
-df_produccion['fecha'] = pd.to_datetime(df_produccion['fecha'])
-df_produccion.set_index('fecha', inplace=True)
+    # Datos de producción (tipos fijos y DatetimeIndex ordenado)
+    df_produccion = resultados['produccion']
+    etapa.filas = len(df_produccion)
 
-print(f"Dataset de producción: {df_produccion.shape}")
-print(f"Período: {df_produccion.index.min()} a {df_produccion.index.max()}")
+    print(f"Dataset de producción: {df_produccion.shape}")
+    print(f"Período: {df_produccion.index.min()} a {df_produccion.index.max()}")
 
-# Análisis de tendencias
-df_produccion['produccion_ma_7d'] = df_produccion['produccion_bpd'].rolling(window=28).mean()
-df_produccion['produccion_ma_30d'] = df_produccion['produccion_bpd'].rolling(window=120).mean()
+    # Análisis de tendencias
+    df_produccion['produccion_ma_7d'] = resultados['produccion_ma_7d']
+    df_produccion['produccion_ma_30d'] = resultados['produccion_ma_30d']
 
-# Calcular cambios porcentuales
-df_produccion['cambio_diario'] = df_produccion['produccion_bpd'].pct_change() * 100
-df_produccion['cambio_semanal'] = df_produccion['produccion_bpd'].pct_change(periods=28) * 100
+    # Cambios porcentuales
+    df_produccion['cambio_diario'] = resultados['cambio_diario']
+    df_produccion['cambio_semanal'] = resultados['cambio_semanal']
 
-print("\nEstadísticas de producción:")
-print(f"• Producción promedio: {df_produccion['produccion_bpd'].mean():.2f} BPD")
-print(f"• Producción máxima: {df_produccion['produccion_bpd'].max():.2f} BPD")
-print(f"• Producción mínima: {df_produccion['produccion_bpd'].min():.2f} BPD")
-print(f"• Cambio total: {((df_produccion['produccion_bpd'].iloc[-1] / df_produccion['produccion_bpd'].iloc[0]) - 1) * 100:.2f}%")
+    print("\nEstadísticas de producción:")
+    print(f"• Producción promedio: {df_produccion['produccion_bpd'].mean():.2f} BPD")
+    print(f"• Producción máxima: {df_produccion['produccion_bpd'].max():.2f} BPD")
+    print(f"• Producción mínima: {df_produccion['produccion_bpd'].min():.2f} BPD")
+    print(f"• Cambio total: {((df_produccion['produccion_bpd'].iloc[-1] / df_produccion['produccion_bpd'].iloc[0]) - 1) * 100:.2f}%")
 
 # =============================================================================
 # DEMOSTRACIÓN 2: ANÁLISIS DE SENSORES CON RESAMPLING
 # =============================================================================
 
-print("\n\n2. ANÁLISIS DE SENSORES CON RESAMPLING")
-print("-" * 50)
-
-# Cargar datos de sensores
-df_sensores = pd.read_csv('../datos/sensores_temporales.csv')
-df_sensores['timestamp'] = pd.to_datetime(df_sensores['timestamp'])
-df_sensores.set_index('timestamp', inplace=True)
-
-print(f"Dataset de sensores: {df_sensores.shape}")
-print(f"Frecuencia original: cada 15 minutos")
-#Sparamos columnas numericas y categoricas
-columnas_numericas = df_sensores.select_dtypes(include=[np.number]).columns.tolist()
-columnas_categoricas = df_sensores.select_dtypes(exclude=[np.number]).columns.tolist()
-# Resampling a diferentes frecuencias
-df_sensores_hora = df_sensores[columnas_numericas].resample('H').mean()
-df_sensores_dia = df_sensores.resample('D').agg({
-    'valor': ['mean', 'std', 'min', 'max'],
-    'pozo_id': 'first',
-    'tipo_sensor': 'first'
-})
-
-print("\nResampling a diferentes frecuencias:")
-print(f"• Datos originales: {len(df_sensores)} registros")
-print(f"• Resampling a 1 hora: {len(df_sensores_hora)} registros")
-print(f"• Resampling a 1 día: {len(df_sensores_dia)} registros")
+with instrumentacion.etapa('sensores') as etapa:
+    print("\n\n2. ANÁLISIS DE SENSORES CON RESAMPLING")
+    print("-" * 50)
+
+    # Datos de sensores
+    df_sensores = resultados['sensores']
+    etapa.filas = len(df_sensores)
+
+    print(f"Dataset de sensores: {df_sensores.shape}")
+    print(f"Frecuencia original: cada 15 minutos")
+    # Resampling a diferentes frecuencias (columnas numéricas a 1 hora)
+    df_sensores_hora = resultados['sensores_hora']
+    df_sensores_dia = resultados['sensores_dia']
+
+    print("\nResampling a diferentes frecuencias:")
+    print(f"• Datos originales: {len(df_sensores)} registros")
+    print(f"• Resampling a 1 hora: {len(df_sensores_hora)} registros")
+    print(f"• Resampling a 1 día: {len(df_sensores_dia)} registros")
 
 # =============================================================================
 # DEMOSTRACIÓN 3: ANÁLISIS DE EVENTOS OPERACIONALES
 # =============================================================================
 
-print("\n\n3. ANÁLISIS DE EVENTOS OPERACIONALES")
-print("-" * 50)
+with instrumentacion.etapa('eventos'):
+    print("\n\n3. ANÁLISIS DE EVENTOS OPERACIONALES")
+    print("-" * 50)
 
-# Cargar datos de eventos
-df_eventos = pd.read_csv('../datos/eventos_operacionales.csv')
-df_eventos['fecha_evento'] = pd.to_datetime(df_eventos['fecha_evento'])
-df_eventos.set_index('fecha_evento', inplace=True)
+    # Datos de eventos
+    df_eventos = resultados['eventos']
 
-print(f"Dataset de eventos: {df_eventos.shape}")
+    print(f"Dataset de eventos: {df_eventos.shape}")
 
-# Análisis de eventos por tipo
-eventos_por_tipo = df_eventos.groupby('tipo_evento').agg({
-    'duracion_horas': ['count', 'mean', 'sum'],
-    'impacto_produccion': ['mean', 'sum']
-}).round(2)
+    # Análisis de eventos por tipo
+    eventos_por_tipo = resultados['eventos_por_tipo']
 
-print("\nAnálisis de eventos por tipo:")
-print(eventos_por_tipo)
+    print("\nAnálisis de eventos por tipo:")
+    print(eventos_por_tipo)
 
-# Resampling de eventos por día
-eventos_diarios = df_eventos.resample('D').agg({
-    'duracion_horas': 'sum',
-    'impacto_produccion': 'sum',
-    'tipo_evento': 'count'
-}).rename(columns={'tipo_evento': 'num_eventos'})
+    # Resampling de eventos por día
+    eventos_diarios = resultados['eventos_diarios']
 
-print(f"\nEventos agregados por día: {len(eventos_diarios)} registros")
+    print(f"\nEventos agregados por día: {len(eventos_diarios)} registros")
 
 # =============================================================================
 # DEMOSTRACIÓN 4: ANÁLISIS INTEGRADO
 # =============================================================================
 
-print("\n\n4. ANÁLISIS INTEGRADO - CORRELACIÓN ENTRE VARIABLES")
-print("-" * 50)
+with instrumentacion.etapa('integrado'):
+    print("\n\n4. ANÁLISIS INTEGRADO - CORRELACIÓN ENTRE VARIABLES")
+    print("-" * 50)
 
-# Resampling de producción a frecuencia diaria
-produccion_diaria = df_produccion.resample('D')['produccion_bpd'].agg(['mean', 'std'])
+    # Resampling de producción a frecuencia diaria
+    produccion_diaria = resultados['produccion_diaria']
 
-# Combinar datos
-analisis_integrado = pd.concat([produccion_diaria, eventos_diarios], axis=1)
-analisis_integrado = analisis_integrado.fillna(0)
+    # Combinar datos (valores faltantes en 0)
+    analisis_integrado = resultados['analisis_integrado']
 
-print("Análisis integrado - Producción y eventos:")
-print(analisis_integrado.head(10))
+    print("Análisis integrado - Producción y eventos:")
+    print(analisis_integrado.head(10))
 
-# Calcular correlaciones
-correlaciones = analisis_integrado.corr()
-print("\nCorrelaciones entre variables:")
-print(correlaciones)
+    # Correlaciones
+    correlaciones = resultados['correlaciones']
+    print("\nCorrelaciones entre variables:")
+    print(correlaciones)
+
+    # Cada registro de producción se marca con los eventos activos de su pozo
+    # en [fecha_evento, fecha_evento + duracion_horas)
+    with instrumentacion.etapa('cruce_eventos', filas=len(df_produccion)):
+        produccion_eventos = marcar_eventos(df_produccion, df_eventos, columnas=['tipo_evento', 'impacto_produccion'])
+    en_evento = produccion_eventos['eventos_activos'] > 0
+    print(f"\nRegistros de producción durante un evento: {en_evento.sum()} de {len(produccion_eventos)}")
+    print(f"• Producción promedio sin eventos: {produccion_eventos.loc[~en_evento, 'produccion_bpd'].mean():.1f} bpd")
+    print(f"• Producción promedio durante eventos: {produccion_eventos.loc[en_evento, 'produccion_bpd'].mean():.1f} bpd")
+    print(produccion_eventos[en_evento].groupby('tipo_evento', observed=True)['produccion_bpd'].agg(['count', 'mean']).round(1))
 
 # =============================================================================
 # DEMOSTRACIÓN 5: VISUALIZACIÓN AVANZADA
 # =============================================================================
 
-print("\n\n5. VISUALIZACIÓN AVANZADA DE SERIES TEMPORALES")
-print("-" * 50)
-
-# Crear figura con múltiples subplots
-fig, axes = plt.subplots(3, 2, figsize=(15, 12))
-fig.suptitle('Análisis Completo de Series Temporales Petroleras', fontsize=16)
-
-# Gráfico 1: Producción con tendencias
-axes[0, 0].plot(df_produccion.index, df_produccion['produccion_bpd'], 'b-', linewidth=1, alpha=0.7, label='Producción')
-axes[0, 0].plot(df_produccion.index, df_produccion['produccion_ma_7d'], 'r-', linewidth=2, label='MA 7 días')
-axes[0, 0].plot(df_produccion.index, df_produccion['produccion_ma_30d'], 'g-', linewidth=2, label='MA 30 días')
-axes[0, 0].set_title('Producción con Tendencias')
-axes[0, 0].set_xlabel('Fecha')
-axes[0, 0].set_ylabel('Producción (BPD)')
-axes[0, 0].legend()
-axes[0, 0].grid(True, alpha=0.3)
-
-# Gráfico 2: Cambios porcentuales
-axes[0, 1].plot(df_produccion.index, df_produccion['cambio_diario'], 'purple', linewidth=1, alpha=0.7)
-axes[0, 1].axhline(y=0, color='black', linestyle='--', alpha=0.5)
-axes[0, 1].set_title('Cambios Porcentuales Diarios')
-axes[0, 1].set_xlabel('Fecha')
-axes[0, 1].set_ylabel('Cambio (%)')
-axes[0, 1].grid(True, alpha=0.3)
-
-# Gráfico 3: Sensores con resampling
-axes[1, 0].plot(df_sensores.index, df_sensores['valor'], 'b-', linewidth=0.5, alpha=0.5, label='15 min')
-axes[1, 0].plot(df_sensores_hora.index, df_sensores_hora['valor'], 'r-', linewidth=1.5, label='1 hora')
-axes[1, 0].set_title('Datos de Sensores - Resampling')
-axes[1, 0].set_xlabel('Fecha')
-axes[1, 0].set_ylabel('Valor del Sensor')
-axes[1, 0].legend()
-axes[1, 0].grid(True, alpha=0.3)
-
-# Gráfico 4: Eventos operacionales
-axes[1, 1].bar(eventos_diarios.index, eventos_diarios['num_eventos'], alpha=0.7, color='orange')
-axes[1, 1].set_title('Eventos Operacionales por Día')
-axes[1, 1].set_xlabel('Fecha')
-axes[1, 1].set_ylabel('Número de Eventos')
-axes[1, 1].grid(True, alpha=0.3)
-
-# Gráfico 5: Impacto de eventos en producción
-axes[2, 0].plot(analisis_integrado.index, analisis_integrado['mean'], 'b-', linewidth=1, label='Producción')
-axes[2, 0].set_xlabel('Fecha')
-axes[2, 0].set_ylabel('Producción Promedio (BPD)', color='b')
-axes[2, 0].tick_params(axis='y', labelcolor='b')
-axes[2, 0].grid(True, alpha=0.3)
-
-ax2 = axes[2, 0].twinx()
-ax2.bar(analisis_integrado.index, analisis_integrado['impacto_produccion'], alpha=0.3, color='red', label='Impacto Eventos')
-ax2.set_ylabel('Impacto de Eventos', color='red')
-ax2.tick_params(axis='y', labelcolor='red')
-axes[2, 0].set_title('Producción vs Impacto de Eventos')
-
-# Gráfico 6: Correlación entre variables
-im = axes[2, 1].imshow(correlaciones, cmap='coolwarm', aspect='auto')
-axes[2, 1].set_title('Matriz de Correlaciones')
-axes[2, 1].set_xticks(range(len(correlaciones.columns)))
-axes[2, 1].set_yticks(range(len(correlaciones.index)))
-axes[2, 1].set_xticklabels(correlaciones.columns, rotation=45, ha='right')
-axes[2, 1].set_yticklabels(correlaciones.index)
-
-# Agregar valores de correlación
-for i in range(len(correlaciones.index)):
-    for j in range(len(correlaciones.columns)):
-        text = axes[2, 1].text(j, i, f'{correlaciones.iloc[i, j]:.2f}',
-                               ha="center", va="center", color="black", fontsize=8)
-
-plt.colorbar(im, ax=axes[2, 1])
-
-plt.tight_layout()
-plt.show()
+with instrumentacion.etapa('graficos'):
+    print("\n\n5. VISUALIZACIÓN AVANZADA DE SERIES TEMPORALES")
+    print("-" * 50)
+
+    if graficos.activos():
+        plt = graficos.pyplot()
+        # Crear figura con múltiples subplots
+        fig, axes = plt.subplots(3, 2, figsize=(15, 12))
+        fig.suptitle('Análisis Completo de Series Temporales Petroleras', fontsize=16)
+
+        # Gráfico 1: Producción con tendencias
+        graficar_serie(axes[0, 0], df_produccion['produccion_bpd'], 'b-', linewidth=1, alpha=0.7, label='Producción')
+        graficar_serie(axes[0, 0], df_produccion['produccion_ma_7d'], 'r-', linewidth=2, label='MA 7 días')
+        graficar_serie(axes[0, 0], df_produccion['produccion_ma_30d'], 'g-', linewidth=2, label='MA 30 días')
+        axes[0, 0].set_title('Producción con Tendencias')
+        axes[0, 0].set_xlabel('Fecha')
+        axes[0, 0].set_ylabel('Producción (BPD)')
+        axes[0, 0].legend()
+        axes[0, 0].grid(True, alpha=0.3)
+
+        # Gráfico 2: Cambios porcentuales
+        graficar_serie(axes[0, 1], df_produccion['cambio_diario'], 'purple', linewidth=1, alpha=0.7)
+        axes[0, 1].axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        axes[0, 1].set_title('Cambios Porcentuales Diarios')
+        axes[0, 1].set_xlabel('Fecha')
+        axes[0, 1].set_ylabel('Cambio (%)')
+        axes[0, 1].grid(True, alpha=0.3)
+
+        # Gráfico 3: Sensores con resampling
+        graficar_serie(axes[1, 0], df_sensores['valor'], 'b-', linewidth=0.5, alpha=0.5, label='15 min')
+        graficar_serie(axes[1, 0], df_sensores_hora['valor'], 'r-', linewidth=1.5, label='1 hora')
+        axes[1, 0].set_title('Datos de Sensores - Resampling')
+        axes[1, 0].set_xlabel('Fecha')
+        axes[1, 0].set_ylabel('Valor del Sensor')
+        axes[1, 0].legend()
+        axes[1, 0].grid(True, alpha=0.3)
+
+        # Gráfico 4: Eventos operacionales
+        axes[1, 1].bar(eventos_diarios.index, eventos_diarios['num_eventos'], alpha=0.7, color='orange')
+        axes[1, 1].set_title('Eventos Operacionales por Día')
+        axes[1, 1].set_xlabel('Fecha')
+        axes[1, 1].set_ylabel('Número de Eventos')
+        axes[1, 1].grid(True, alpha=0.3)
+
+        # Gráfico 5: Impacto de eventos en producción
+        graficar_serie(axes[2, 0], analisis_integrado['mean'], 'b-', linewidth=1, label='Producción')
+        axes[2, 0].set_xlabel('Fecha')
+        axes[2, 0].set_ylabel('Producción Promedio (BPD)', color='b')
+        axes[2, 0].tick_params(axis='y', labelcolor='b')
+        axes[2, 0].grid(True, alpha=0.3)
+
+        ax2 = axes[2, 0].twinx()
+        ax2.bar(analisis_integrado.index, analisis_integrado['impacto_produccion'], alpha=0.3, color='red', label='Impacto Eventos')
+        ax2.set_ylabel('Impacto de Eventos', color='red')
+        ax2.tick_params(axis='y', labelcolor='red')
+        axes[2, 0].set_title('Producción vs Impacto de Eventos')
+
+        # Gráfico 6: Correlación entre variables
+        im = axes[2, 1].imshow(correlaciones, cmap='coolwarm', aspect='auto')
+        axes[2, 1].set_title('Matriz de Correlaciones')
+        axes[2, 1].set_xticks(range(len(correlaciones.columns)))
+        axes[2, 1].set_yticks(range(len(correlaciones.index)))
+        axes[2, 1].set_xticklabels(correlaciones.columns, rotation=45, ha='right')
+        axes[2, 1].set_yticklabels(correlaciones.index)
+
+        # Agregar valores de correlación
+        for i in range(len(correlaciones.index)):
+            for j in range(len(correlaciones.columns)):
+                text = axes[2, 1].text(j, i, f'{correlaciones.iloc[i, j]:.2f}',
+                                       ha="center", va="center", color="black", fontsize=8)
+
+        plt.colorbar(im, ax=axes[2, 1])
+
+        plt.tight_layout()
+        graficos.mostrar(fig, 'demo_series_temporales')
 
 # =============================================================================
 # DEMOSTRACIÓN 6: ANÁLISIS DE PATRONES TEMPORALES
 # =============================================================================
 
-print("\n\n6. ANÁLISIS DE PATRONES TEMPORALES")
-print("-" * 50)
+with instrumentacion.etapa('patrones'):
+    print("\n\n6. ANÁLISIS DE PATRONES TEMPORALES")
+    print("-" * 50)
 
-# Análisis de patrones por hora del día
-df_produccion['hora'] = df_produccion.index.hour
-produccion_por_hora = df_produccion.groupby('hora')['produccion_bpd'].agg(['mean', 'std'])
+    # Análisis de patrones por hora del día
+    produccion_por_hora = resultados['produccion_por_hora']
 
-print("Producción promedio por hora del día:")
-print(produccion_por_hora)
+    print("Producción promedio por hora del día:")
+    print(produccion_por_hora)
 
-# Análisis de patrones por día de la semana
-df_produccion['dia_semana'] = df_produccion.index.dayofweek
-produccion_por_dia = df_produccion.groupby('dia_semana')['produccion_bpd'].agg(['mean', 'std'])
+    # Análisis de patrones por día de la semana
+    produccion_por_dia = resultados['produccion_por_dia']
 
-print("\nProducción promedio por día de la semana:")
-print(produccion_por_dia)
+    print("\nProducción promedio por día de la semana:")
+    print(produccion_por_dia)
 
 # =============================================================================
 # DEMOSTRACIÓN 7: DETECCIÓN DE ANOMALÍAS
 # =============================================================================
 
-print("\n\n7. DETECCIÓN DE ANOMALÍAS")
-print("-" * 50)
+with instrumentacion.etapa('anomalias'):
+    print("\n\n7. DETECCIÓN DE ANOMALÍAS")
+    print("-" * 50)
+
+    # Detectar anomalías usando rolling statistics: la media móvil es el mismo
+    # nodo de la demostración 1 y la std salió en la misma pasada
+    df_produccion['produccion_std_7d'] = resultados['produccion_std_7d']
 
-# Detectar anomalías usando rolling statistics
-df_produccion['produccion_ma_7d'] = df_produccion['produccion_bpd'].rolling(window=28).mean()
-df_produccion['produccion_std_7d'] = df_produccion['produccion_bpd'].rolling(window=28).std()
+    # Límites de control (2 desviaciones estándar)
+    df_produccion['limite_superior'] = resultados['limite_superior']
+    df_produccion['limite_inferior'] = resultados['limite_inferior']
 
-# Límites de control (2 desviaciones estándar)
-df_produccion['limite_superior'] = df_produccion['produccion_ma_7d'] + (2 * df_produccion['produccion_std_7d'])
-df_produccion['limite_inferior'] = df_produccion['produccion_ma_7d'] - (2 * df_produccion['produccion_std_7d'])
+    # Detectar anomalías
+    df_produccion['es_anomalia'] = resultados['es_anomalia']
 
-# Detectar anomalías
-df_produccion['es_anomalia'] = (
-    (df_produccion['produccion_bpd'] > df_produccion['limite_superior']) |
-    (df_produccion['produccion_bpd'] < df_produccion['limite_inferior'])
-)
+    num_anomalias = df_produccion['es_anomalia'].sum()
+    print(f"Anomalías detectadas: {num_anomalias} ({num_anomalias/len(df_produccion)*100:.2f}%)")
 
-num_anomalias = df_produccion['es_anomalia'].sum()
-print(f"Anomalías detectadas: {num_anomalias} ({num_anomalias/len(df_produccion)*100:.2f}%)")
+    # Para lecturas que llegan de a una, el detector incremental da los mismos
+    # límites sin recalcular la historia; su estado se puede guardar con guardar()
+    detector = DetectorLimites(ventana=28, sigmas=2)
+    with instrumentacion.etapa('detector_incremental', filas=len(df_produccion)):
+        en_linea = detector.actualizar(df_produccion['produccion_bpd'])
+    print(f"Anomalías con el detector incremental: {en_linea['es_anomalia'].sum()}")
 
-# Mostrar las anomalías más significativas
-anomalias = df_produccion[df_produccion['es_anomalia']].nlargest(5, 'produccion_bpd')
-print("\nTop 5 anomalías (mayor producción):")
-print(anomalias[['produccion_bpd', 'produccion_ma_7d', 'limite_superior']])
+    # Mostrar las anomalías más significativas
+    anomalias = df_produccion[df_produccion['es_anomalia']].nlargest(5, 'produccion_bpd')
+    print("\nTop 5 anomalías (mayor producción):")
+    print(anomalias[['produccion_bpd', 'produccion_ma_7d', 'limite_superior']])
 
 # =============================================================================
 # DEMOSTRACIÓN 8: RESUMEN Y CONCLUSIONES
 # =============================================================================
 
-print("\n\n8. RESUMEN Y CONCLUSIONES")
-print("-" * 50)
-
-print("RESUMEN DEL ANÁLISIS TEMPORAL:")
-print(f"• Período analizado: {df_produccion.index.min()} a {df_produccion.index.max()}")
-print(f"• Total de registros de producción: {len(df_produccion)}")
-print(f"• Total de registros de sensores: {len(df_sensores)}")
-print(f"• Total de eventos operacionales: {len(df_eventos)}")
-
-# Análisis de tendencias
-produccion_inicial = df_produccion['produccion_bpd'].iloc[0]
-produccion_final = df_produccion['produccion_bpd'].iloc[-1]
-tendencia = ((produccion_final - produccion_inicial) / produccion_inicial) * 100
-
-print(f"\nANÁLISIS DE TENDENCIAS:")
-print(f"• Producción inicial: {produccion_inicial:.2f} BPD")
-print(f"• Producción final: {produccion_final:.2f} BPD")
-print(f"• Cambio total: {tendencia:.2f}%")
-
-if tendencia > 0:
-    print("  → Tendencia POSITIVA en el período analizado")
-else:
-    print("  → Tendencia NEGATIVA en el período analizado")
-
-print(f"\nANÁLISIS DE EVENTOS:")
-print(f"• Total de eventos: {len(df_eventos)}")
-print(f"• Duración promedio: {df_eventos['duracion_horas'].mean():.2f} horas")
-print(f"• Impacto promedio en producción: {df_eventos['impacto_produccion'].mean():.2f}")
-
-print(f"\nDETECCIÓN DE ANOMALÍAS:")
-print(f"• Anomalías detectadas: {num_anomalias}")
-print(f"• Porcentaje de anomalías: {num_anomalias/len(df_produccion)*100:.2f}%")
-
-print("\nAPLICACIONES PRÁCTICAS:")
-print("• Monitoreo continuo de producción")
-print("• Detección temprana de problemas")
-print("• Optimización de operaciones")
-print("• Planificación de mantenimiento")
-print("• Análisis de correlaciones operacionales")
+with instrumentacion.etapa('resumen'):
+    print("\n\n8. RESUMEN Y CONCLUSIONES")
+    print("-" * 50)
+
+    print("RESUMEN DEL ANÁLISIS TEMPORAL:")
+    print(f"• Período analizado: {df_produccion.index.min()} a {df_produccion.index.max()}")
+    print(f"• Total de registros de producción: {len(df_produccion)}")
+    print(f"• Total de registros de sensores: {len(df_sensores)}")
+    print(f"• Total de eventos operacionales: {len(df_eventos)}")
+    print(f"• Pipeline: {pipeline.resumen['declarados']} pasos declarados, {pipeline.resumen['distintos']} distintos, "
+          f"{pipeline.resumen['pasadas_rolling']} pasada(s) de rolling")
+
+    # Análisis de tendencias
+    produccion_inicial = df_produccion['produccion_bpd'].iloc[0]
+    produccion_final = df_produccion['produccion_bpd'].iloc[-1]
+    tendencia = ((produccion_final - produccion_inicial) / produccion_inicial) * 100
+
+    print(f"\nANÁLISIS DE TENDENCIAS:")
+    print(f"• Producción inicial: {produccion_inicial:.2f} BPD")
+    print(f"• Producción final: {produccion_final:.2f} BPD")
+    print(f"• Cambio total: {tendencia:.2f}%")
+
+    if tendencia > 0:
+        print("  → Tendencia POSITIVA en el período analizado")
+    else:
+        print("  → Tendencia NEGATIVA en el período analizado")
+
+    print(f"\nANÁLISIS DE EVENTOS:")
+    print(f"• Total de eventos: {len(df_eventos)}")
+    print(f"• Duración promedio: {df_eventos['duracion_horas'].mean():.2f} horas")
+    print(f"• Impacto promedio en producción: {df_eventos['impacto_produccion'].mean():.2f}")
+
+    print(f"\nDETECCIÓN DE ANOMALÍAS:")
+    print(f"• Anomalías detectadas: {num_anomalias}")
+    print(f"• Porcentaje de anomalías: {num_anomalias/len(df_produccion)*100:.2f}%")
+
+    print("\nAPLICACIONES PRÁCTICAS:")
+    print("• Monitoreo continuo de producción")
+    print("• Detección temprana de problemas")
+    print("• Optimización de operaciones")
+    print("• Planificación de mantenimiento")
+    print("• Análisis de correlaciones operacionales")
+
+
+if REPORTE:
+    ruta = instrumentacion.escribir(REPORTE)
+    print("\nEtapas más lentas:")
+    print(instrumentacion.por_etapa().head(8).round(4))
+    print(f"Reporte de etapas escrito en {ruta}")
 
 print("\n" + "=" * 80)
 print("DEMOSTRACIÓN COMPLETADA")
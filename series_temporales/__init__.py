@@ -0,0 +1,80 @@
+"""
+SERIES TEMPORALES: MOTORES DE CÁLCULO
+Sesión 12: Series Temporales en Pandas
+
+Funciones vectorizadas que reemplazan los cálculos fila por fila de los
+laboratorios y la demostración.
+"""
+
+from series_temporales.almacen import abrir_almacen, leer_rango
+from series_temporales.anomalias import DetectorLimites
+from series_temporales.carga import ESQUEMAS, cargar_dataset
+from series_temporales.categoricas import agregar_resample
+from series_temporales.compactacion import compactar, huella_memoria, resumir_reporte
+from series_temporales.correlacion import (
+    correlacion_movil,
+    covarianza_movil,
+    matriz_correlacion_movil,
+)
+from series_temporales.cuantiles import cuantiles_moviles
+from series_temporales.decimacion import decimar, graficar_serie
+from series_temporales.eventos import marcar_eventos, unir_eventos
+from series_temporales.grupos import estadisticas_moviles_por_grupo, resample_por_grupo
+from series_temporales.huecos import indice_huecos, rellenar_huecos
+from series_temporales.instrumentacion import Instrumentacion
+from series_temporales.paralelo import analizar_pozo, analizar_pozos_en_paralelo
+from series_temporales.particiones import abrir_particiones, leer_particiones, seleccionar_particiones
+from series_temporales.perfiles import perfil_calendario, perfiles_calendario
+from series_temporales.pipeline import Pipeline, construir_pipeline
+from series_temporales.piramide import piramide_resample
+from series_temporales.servicio import ServicioIngesta
+from series_temporales.sinteticos import escribir_datasets, generar_datasets
+from series_temporales.streaming import resample_por_bloques
+from series_temporales.tendencias import pendiente_movil, regresion_movil
+from series_temporales.ventanas import estadisticas_moviles, extremo_movil
+from series_temporales.ventanas_tiempo import correlacion_movil_tiempo, estadisticas_moviles_tiempo
+
+__all__ = [
+    'DetectorLimites',
+    'ESQUEMAS',
+    'Instrumentacion',
+    'Pipeline',
+    'ServicioIngesta',
+    'abrir_almacen',
+    'abrir_particiones',
+    'agregar_resample',
+    'analizar_pozo',
+    'analizar_pozos_en_paralelo',
+    'cargar_dataset',
+    'compactar',
+    'construir_pipeline',
+    'correlacion_movil',
+    'correlacion_movil_tiempo',
+    'covarianza_movil',
+    'cuantiles_moviles',
+    'decimar',
+    'escribir_datasets',
+    'estadisticas_moviles',
+    'estadisticas_moviles_por_grupo',
+    'estadisticas_moviles_tiempo',
+    'extremo_movil',
+    'generar_datasets',
+    'graficar_serie',
+    'huella_memoria',
+    'indice_huecos',
+    'leer_particiones',
+    'leer_rango',
+    'marcar_eventos',
+    'matriz_correlacion_movil',
+    'pendiente_movil',
+    'perfil_calendario',
+    'perfiles_calendario',
+    'piramide_resample',
+    'regresion_movil',
+    'rellenar_huecos',
+    'resample_por_bloques',
+    'resample_por_grupo',
+    'resumir_reporte',
+    'seleccionar_particiones',
+    'unir_eventos',
+]
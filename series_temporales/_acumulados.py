@@ -0,0 +1,119 @@
+"""
+SUMAS MÓVILES POR BLOQUES
+Sesión 12: Series Temporales en Pandas
+
+Utilidades internas para calcular sumas en ventanas deslizantes con sumas
+prefijas. Las sumas prefijas se reinician cada BLOQUE filas para que su
+magnitud no crezca con la longitud de la serie y la resta de prefijos no
+pierda precisión.
+"""
+
+import numpy as np
+
+# Filas por bloque de sumas prefijas
+BLOQUE = 1 << 16
+
+
+def como_matriz(valores):
+    """Convierte un arreglo 1-D o 2-D en una matriz (filas, columnas) float64"""
+    matriz = np.asarray(valores, dtype=np.float64)
+    if matriz.ndim == 1:
+        matriz = matriz[:, None]
+    return matriz
+
+
+def iterar_bloques(n, ventana, bloque=BLOQUE):
+    """Genera (origen, inicio, fin) para recorrer n filas por bloques.
+
+    `origen` retrocede ventana - 1 filas para que las ventanas que terminan
+    entre `inicio` y `fin` queden completas dentro del segmento.
+    """
+    for inicio in range(0, n, bloque):
+        fin = min(inicio + bloque, n)
+        yield max(0, inicio - ventana + 1), inicio, fin
+
+
+def sumas_moviles(segmento, ventana, desde=0):
+    """Suma por columnas de las ventanas que terminan en cada fila desde `desde`.
+
+    Las primeras ventanas del segmento se truncan en la fila 0, igual que
+    `rolling` con `min_periods` menor que la ventana.
+    """
+    acumulado = np.zeros((len(segmento) + 1,) + segmento.shape[1:], dtype=segmento.dtype)
+    np.cumsum(segmento, axis=0, out=acumulado[1:])
+    fin = np.arange(desde, len(segmento)) + 1
+    inicio = np.maximum(fin - ventana, 0)
+    return acumulado[fin] - acumulado[inicio]
+
+
+def _contar_cambios(segmento, validos):
+    """(cambios, siguiente) para detectar ventanas constantes.
+
+    `cambios[i + 1]` cuenta las filas válidas hasta la i cuyo valor difiere
+    del válido anterior (los infinitos cuentan siempre como cambio, porque
+    su varianza es NaN). `siguiente[i]` es la primera fila válida desde la
+    i, o None si todas las filas son válidas.
+    """
+    n = len(segmento)
+    cambios = np.zeros((n + 1,) + segmento.shape[1:], dtype=np.int32 if n < 2 ** 31 else np.int64)
+    with np.errstate(invalid='ignore'):
+        if validos.all():
+            distinto = (segmento[1:] != segmento[:-1]) | np.isinf(segmento[1:])
+            siguiente = None
+        else:
+            filas = np.arange(n).reshape((n,) + (1,) * (segmento.ndim - 1))
+            anterior = np.maximum.accumulate(np.where(validos, filas, -1), axis=0)[:-1]
+            previo = np.take_along_axis(segmento, np.maximum(anterior, 0), axis=0)
+            distinto = validos[1:] & (anterior >= 0) & ((segmento[1:] != previo) | np.isinf(segmento[1:]))
+            siguiente = np.minimum.accumulate(np.where(validos, filas, n)[::-1], axis=0)[::-1]
+    np.cumsum(distinto, axis=0, out=cambios[2:])
+    return cambios, siguiente
+
+
+def _cambios_hasta_primera(cambios, siguiente, inicio, fin):
+    """Cambios acumulados hasta la primera fila válida de cada ventana [inicio, fin]"""
+    if siguiente is None:
+        return cambios[inicio + 1]
+    # El cambio de la primera fila válida compara con una fila de antes de la ventana
+    forma = (-1,) + (1,) * (cambios.ndim - 1)
+    primera = np.minimum(siguiente[inicio], fin.reshape(forma))
+    return np.take_along_axis(cambios, primera + 1, axis=0)
+
+
+def ventanas_constantes(segmento, validos, ventanas, desde=0):
+    """Máscaras (una por ventana) de las ventanas cuyos valores válidos son todos iguales.
+
+    La resta de sumas prefijas deja en la varianza de una ventana constante
+    un residuo de redondeo en lugar de 0; estas máscaras permiten fijarla en
+    0 exacto. La ventana es constante si no hay cambios de valor después de
+    su primera fila válida. Las filas van en el eje 0 y cada máscara cubre
+    las ventanas que terminan desde `desde`.
+    """
+    n = len(segmento)
+    cambios, siguiente = _contar_cambios(segmento, validos)
+    hasta_fin = cambios[desde + 1:]
+    fin = np.arange(desde, n)
+    mascaras = []
+    for ventana in ventanas:
+        if siguiente is None:
+            # Las ventanas que empiezan antes de la fila 0 no tienen cambios previos
+            hasta_primera = np.zeros_like(hasta_fin)
+            corte = max(ventana - 1 - desde, 0)
+            if corte < n - desde:
+                hasta_primera[corte:] = cambios[desde + corte + 2 - ventana:n + 2 - ventana]
+        else:
+            hasta_primera = _cambios_hasta_primera(cambios, siguiente, np.maximum(fin + 1 - ventana, 0), fin)
+        mascaras.append(hasta_fin == hasta_primera)
+    return mascaras
+
+
+def tramos_constantes(segmento, validos, inicios, desde=0):
+    """Como `ventanas_constantes`, con la primera fila de cada ventana dada.
+
+    `inicios` es una lista de arreglos (uno por ventana) con la fila donde
+    empieza la ventana que termina en cada fila desde `desde`, como las
+    ventanas por tiempo.
+    """
+    cambios, siguiente = _contar_cambios(segmento, validos)
+    fin = np.arange(desde, len(segmento))
+    return [cambios[desde + 1:] == _cambios_hasta_primera(cambios, siguiente, inicio, fin) for inicio in inicios]
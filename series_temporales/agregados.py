@@ -0,0 +1,234 @@
+"""
+AGREGADOS PARCIALES COMBINABLES
+Sesión 12: Series Temporales en Pandas
+
+Un resample se puede calcular por partes si cada parte guarda estadísticas
+que se combinan sin volver a los datos originales: conteo, suma, suma de
+cuadrados de las desviaciones respecto a la media (M2), mínimo, máximo,
+primero y último. M2 se combina con la fórmula de Chan et al., que no sufre
+la cancelación de Σx² - (Σx)²/n cuando los valores son grandes.
+
+Los parciales son DataFrames indexados por la etiqueta de cada intervalo,
+con columnas MultiIndex (columna, parcial). Tanto el cálculo desde los
+datos como la combinación recorren segmentos contiguos con `reduceat`.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+PARCIALES = ('count', 'sum', 'm2', 'min', 'max', 'first', 'last')
+
+AGREGADOS = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max', 'first', 'last')
+
+
+def origen_intervalos(indice):
+    """Origen de los intervalos que usa pandas por defecto: medianoche del primer día"""
+    return indice[0].normalize()
+
+
+def duracion_fija(freq):
+    """Duración de una frecuencia de largo fijo (min, h, D...), o None si es de calendario"""
+    offset = to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return pd.Timedelta(offset)
+    if isinstance(offset, pd.offsets.Day):
+        return pd.Timedelta(days=offset.n)
+    return None
+
+
+def _alineacion(freq, origen):
+    """Argumentos de alineación para resample; las frecuencias de calendario ya tienen la suya"""
+    if isinstance(to_offset(freq), pd.offsets.Tick):
+        return {'origin': origen}
+    return {}
+
+
+def intervalos(indice, freq, origen):
+    """Código de intervalo de cada fecha de un índice ordenado y la etiqueta de cada código.
+
+    Las frecuencias de largo fijo se resuelven con aritmética entera sobre
+    una grilla que parte de `origen`; las de calendario (W, MS, ME...) usan
+    el agrupador de pandas.
+    """
+    duracion = duracion_fija(freq)
+    if duracion is not None:
+        unidad = np.datetime_data(indice.dtype)[0]
+        paso = duracion // pd.Timedelta(1, unit=unidad)
+        base = pd.Timestamp(origen).to_datetime64().astype(f'M8[{unidad}]').astype(np.int64)
+        codigos = (indice.asi8 - base) // paso
+        primero = codigos[0] if len(codigos) else 0
+        cantidad = (codigos[-1] - primero + 1) if len(codigos) else 0
+        etiquetas = pd.DatetimeIndex((base + (primero + np.arange(cantidad)) * paso).view(f'M8[{unidad}]'),
+                                     name=indice.name)
+        return codigos - primero, etiquetas
+
+    agrupador = pd.DataFrame(index=indice).groupby(pd.Grouper(freq=freq, **_alineacion(freq, origen)))
+    return agrupador.ngroup().to_numpy(), agrupador.size().index.rename(indice.name)
+
+
+def _inicios_segmentos(codigos):
+    """Posición de inicio de cada tramo de códigos iguales consecutivos"""
+    return np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+
+
+def _primero_valido(valores, inicios, ultimo=False, validos=None):
+    """Primer (o último) valor no NaN de cada segmento; NaN si no hay"""
+    if validos is None:
+        validos = ~np.isnan(valores)
+    if validos.all():
+        return valores[np.r_[inicios[1:], len(valores)] - 1] if ultimo else valores[inicios]
+    posiciones = np.arange(len(valores))
+    if ultimo:
+        indice = np.maximum.reduceat(np.where(validos, posiciones, -1), inicios)
+    else:
+        indice = np.minimum.reduceat(np.where(validos, posiciones, len(valores)), inicios)
+    return np.r_[valores, np.nan][indice]
+
+
+def parciales_segmentos(x, inicios):
+    """Parciales de cada segmento contiguo de un arreglo de valores (NaN se ignora)"""
+    validos = ~np.isnan(x)
+    largos = np.diff(np.r_[inicios, len(x)])
+    conteo = np.add.reduceat(validos, inicios).astype(np.int64)
+    suma = np.add.reduceat(np.where(validos, x, 0.0), inicios)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(conteo > 0, suma / conteo, 0.0)
+    desvio = np.where(validos, x - np.repeat(media, largos), 0.0)
+    vacios = conteo == 0
+    return {
+        'count': conteo,
+        'sum': suma,
+        'm2': np.add.reduceat(desvio * desvio, inicios),
+        'min': np.where(vacios, np.nan, np.minimum.reduceat(np.where(validos, x, np.inf), inicios)),
+        'max': np.where(vacios, np.nan, np.maximum.reduceat(np.where(validos, x, -np.inf), inicios)),
+        'first': _primero_valido(x, inicios, validos=validos),
+        'last': _primero_valido(x, inicios, ultimo=True, validos=validos),
+    }
+
+
+def _combinar_segmentos(partes, inicios):
+    """Combina los parciales de cada segmento contiguo de filas (fórmula de Chan para M2)"""
+    conteo_parte = partes['count']
+    largos = np.diff(np.r_[inicios, len(conteo_parte)])
+    conteo = np.add.reduceat(conteo_parte, inicios)
+    suma = np.add.reduceat(partes['sum'], inicios)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_parte = np.where(conteo_parte > 0, partes['sum'] / conteo_parte, 0.0)
+        media = np.where(conteo > 0, suma / conteo, 0.0)
+    desvio = media_parte - np.repeat(media, largos)
+    # Un parcial sin datos es el único con primero/último NaN
+    con_datos = conteo_parte > 0
+    return {
+        'count': conteo,
+        'sum': suma,
+        'm2': np.add.reduceat(partes['m2'] + conteo_parte * desvio * desvio, inicios),
+        'min': np.fmin.reduceat(partes['min'], inicios),
+        'max': np.fmax.reduceat(partes['max'], inicios),
+        'first': _primero_valido(partes['first'], inicios, validos=con_datos),
+        'last': _primero_valido(partes['last'], inicios, ultimo=True, validos=con_datos),
+    }
+
+
+def _tabla_parciales(por_columna, indice):
+    """Arma el DataFrame de parciales desde {columna: {parcial: arreglo}}"""
+    return pd.DataFrame({(columna, parcial): partes[parcial]
+                         for columna, partes in por_columna.items() for parcial in PARCIALES}, index=indice)
+
+
+def parciales_resample(df, freq, columnas, origen=None):
+    """Calcula los agregados parciales de un resample sobre `df`.
+
+    Solo se generan filas para los intervalos con datos. `origen` fija la
+    alineación de los intervalos; al procesar un archivo por bloques debe
+    ser el mismo en todos los bloques para que las etiquetas coincidan.
+    """
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    if origen is None:
+        origen = origen_intervalos(df.index)
+    codigos, etiquetas = intervalos(df.index, freq, origen)
+    inicios = _inicios_segmentos(codigos)
+    por_columna = {columna: parciales_segmentos(df[columna].to_numpy(dtype=np.float64), inicios)
+                   for columna in columnas}
+    return _tabla_parciales(por_columna, etiquetas[codigos[inicios]])
+
+
+def _combinar_por_codigo(parciales, codigos, etiquetas):
+    """Combina las filas de parciales con el mismo código (ya ordenados por código)"""
+    inicios = _inicios_segmentos(codigos)
+    por_columna = {}
+    for columna in parciales.columns.get_level_values(0).unique():
+        partes = {parcial: parciales[(columna, parcial)].to_numpy() for parcial in PARCIALES}
+        por_columna[columna] = _combinar_segmentos(partes, inicios)
+    return _tabla_parciales(por_columna, etiquetas[codigos[inicios]])
+
+
+def combinar_parciales(parciales):
+    """Combina parciales que pueden repetir etiquetas (en orden temporal).
+
+    Acepta un DataFrame o una lista de DataFrames de parciales. Las filas con
+    la misma etiqueta se funden: conteos y sumas se suman, M2 se combina con
+    la fórmula de Chan, y primero/último respetan el orden de llegada.
+    """
+    if not isinstance(parciales, pd.DataFrame):
+        parciales = pd.concat(parciales)
+    if not parciales.index.is_monotonic_increasing:
+        parciales = parciales.sort_index(kind='stable')
+    if parciales.index.is_unique:
+        return parciales
+    codigos, etiquetas = pd.factorize(parciales.index)
+    return _combinar_por_codigo(parciales, codigos, etiquetas.rename(parciales.index.name))
+
+
+def reagrupar_parciales(parciales, freq, origen):
+    """Combina parciales de intervalos finos en los intervalos de `freq`.
+
+    Cada intervalo fino debe caer completo dentro de uno grueso (por
+    ejemplo 15min dentro de h, o D dentro de W); su etiqueta, que es su
+    inicio, decide a qué intervalo grueso pertenece.
+    """
+    codigos, etiquetas = intervalos(parciales.index, freq, origen)
+    return _combinar_por_codigo(parciales, codigos, etiquetas)
+
+
+def finalizar_parciales(parciales, agregados=('mean', 'std', 'min', 'max', 'count'), freq=None):
+    """Convierte parciales combinados en el resultado de `resample().agg(agregados)`.
+
+    Con `freq` se agregan los intervalos vacíos entre el primero y el
+    último, igual que hace pandas. Con una sola columna devuelve columnas
+    simples; con varias, MultiIndex (columna, agregado).
+    """
+    desconocidos = set(agregados) - set(AGREGADOS)
+    if desconocidos:
+        raise ValueError(f"Agregados no soportados: {sorted(desconocidos)}")
+    if freq is not None and len(parciales):
+        completo = pd.date_range(parciales.index[0], parciales.index[-1], freq=freq,
+                                 name=parciales.index.name, unit=parciales.index.unit)
+        parciales = parciales.reindex(completo)
+
+    columnas = list(parciales.columns.get_level_values(0).unique())
+    resultado = {}
+    for columna in columnas:
+        conteo = parciales[(columna, 'count')].fillna(0).astype(np.int64)
+        suma = parciales[(columna, 'sum')].fillna(0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            varianza = (parciales[(columna, 'm2')] / (conteo - 1)).where(conteo > 1)
+        valores = {
+            'count': conteo,
+            'sum': suma,
+            'mean': (suma / conteo).where(conteo > 0),
+            'var': varianza,
+            'std': np.sqrt(varianza),
+            'min': parciales[(columna, 'min')],
+            'max': parciales[(columna, 'max')],
+            'first': parciales[(columna, 'first')],
+            'last': parciales[(columna, 'last')],
+        }
+        for agregado in agregados:
+            resultado[(columna, agregado)] = valores[agregado]
+
+    salida = pd.DataFrame(resultado, index=parciales.index)
+    if len(columnas) == 1:
+        salida.columns = list(agregados)
+    return salida
@@ -0,0 +1,161 @@
+"""
+ALMACÉN MAPEADO EN MEMORIA POR SENSOR
+Sesión 12: Series Temporales en Pandas
+
+Guarda `sensores_temporales` en disco como dos arreglos por sensor: las
+fechas en int64 (época) y los valores en float64 o float32, ordenados por
+fecha. Los arreglos se abren con `np.load(mmap_mode='r')`, de modo que
+seleccionar un rango es una búsqueda binaria sobre las fechas más un corte
+del arreglo, sin copiar ni leer el archivo completo. Varios procesos que
+abren el mismo almacén comparten las páginas a través del cache del
+sistema operativo.
+
+Estructura en `<carpeta del CSV>/.almacen/<nombre>/`:
+    manifiesto.json
+    <sensor_id>/tiempos.npy
+    <sensor_id>/valores.npy
+
+Uso:
+    almacen = abrir_almacen('sensores_temporales')
+    serie = leer_rango(almacen, 'SNS001', '2023-01-10', '2023-01-15')
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from series_temporales import cache
+from series_temporales.carga import ESQUEMAS, cargar_dataset, ruta_dataset
+
+VERSION_ALMACEN = 1
+
+_MANIFIESTO = 'manifiesto.json'
+
+
+def ruta_almacen(ruta_csv):
+    """Carpeta del almacén para un CSV"""
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.parent / '.almacen' / ruta_csv.stem
+
+
+def construir_almacen(nombre='sensores_temporales', ruta=None, destino=None, tipo_valor='float64'):
+    """Escribe el almacén por sensor a partir del CSV y devuelve su carpeta.
+
+    `tipo_valor` permite guardar los valores en float32 para reducir a la
+    mitad el espacio cuando la precisión lo permite.
+    """
+    ruta = Path(ruta) if ruta is not None else ruta_dataset(nombre)
+    destino = Path(destino) if destino is not None else ruta_almacen(ruta)
+    fecha = ESQUEMAS[nombre]['fecha']
+    descriptivas = [columna for columna in ('pozo_id', 'tipo_sensor', 'unidad') if columna in ESQUEMAS[nombre]['tipos']]
+    df = cargar_dataset(nombre, ruta=ruta, columnas=['sensor_id', 'valor', *descriptivas])
+    unidad = np.datetime_data(df.index.dtype)[0]
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = Path(tempfile.mkdtemp(prefix=f'.{destino.name}-', dir=destino.parent))
+    try:
+        temporal.chmod(0o755)
+        sensores = {}
+        for sensor, grupo in df.groupby('sensor_id', observed=True, sort=True):
+            # El índice ya viene ordenado; el orden estable conserva los empates
+            carpeta = temporal / str(sensor)
+            carpeta.mkdir()
+            np.save(carpeta / 'tiempos.npy', grupo.index.to_numpy().view(np.int64), allow_pickle=False)
+            np.save(carpeta / 'valores.npy', grupo['valor'].to_numpy(dtype=tipo_valor), allow_pickle=False)
+            sensores[str(sensor)] = {
+                'filas': len(grupo),
+                'inicio': str(grupo.index[0]),
+                'fin': str(grupo.index[-1]),
+                **{columna: str(grupo[columna].iloc[0]) for columna in descriptivas},
+            }
+
+        manifiesto = {
+            'version': VERSION_ALMACEN,
+            'origen': {**cache._firma(ruta), 'ruta': str(ruta)},
+            'columna_fecha': fecha,
+            'unidad': unidad,
+            'tipo_valor': np.dtype(tipo_valor).name,
+            'sensores': sensores,
+        }
+        (temporal / _MANIFIESTO).write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding='utf-8')
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(temporal, destino)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    return destino
+
+
+def abrir_almacen(nombre='sensores_temporales', ruta=None, carpeta=None, tipo_valor='float64'):
+    """Abre el almacén mapeado en memoria; lo construye si falta o si el CSV cambió.
+
+    Devuelve un diccionario con el manifiesto y, por sensor, el par
+    (tiempos, valores) de arreglos de solo lectura mapeados desde disco.
+    """
+    ruta = Path(ruta) if ruta is not None else ruta_dataset(nombre)
+    carpeta = Path(carpeta) if carpeta is not None else ruta_almacen(ruta)
+
+    manifiesto = _leer_manifiesto(carpeta)
+    vigente = (
+        manifiesto is not None
+        and manifiesto.get('version') == VERSION_ALMACEN
+        and manifiesto['tipo_valor'] == np.dtype(tipo_valor).name
+        and {**cache._firma(ruta), 'ruta': str(ruta)} == manifiesto['origen']
+    )
+    if not vigente:
+        construir_almacen(nombre, ruta=ruta, destino=carpeta, tipo_valor=tipo_valor)
+        manifiesto = _leer_manifiesto(carpeta)
+
+    unidad = manifiesto['unidad']
+    arreglos = {}
+    for sensor in manifiesto['sensores']:
+        tiempos = np.load(carpeta / sensor / 'tiempos.npy', mmap_mode='r')
+        valores = np.load(carpeta / sensor / 'valores.npy', mmap_mode='r')
+        arreglos[sensor] = (tiempos.view(f'datetime64[{unidad}]'), valores)
+    return {'carpeta': carpeta, 'manifiesto': manifiesto, 'arreglos': arreglos}
+
+
+def _leer_manifiesto(carpeta):
+    """Lee el manifiesto del almacén, o None si no existe o está dañado"""
+    try:
+        return json.loads((carpeta / _MANIFIESTO).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _limite(valor, final):
+    """Convierte un límite de rango en Timestamp con la semántica de `df.loc`.
+
+    Una fecha parcial como '2023-01-15' o '2023-01' abarca el período
+    completo: como inicio vale su primer instante y como fin el último.
+    """
+    if isinstance(valor, str):
+        periodo = pd.Period(valor)
+        return periodo.end_time if final else periodo.start_time
+    return pd.Timestamp(valor)
+
+
+def posiciones_rango(tiempos, inicio=None, fin=None):
+    """Posiciones [desde, hasta) de las fechas dentro de [inicio, fin] por búsqueda binaria"""
+    desde = 0 if inicio is None else np.searchsorted(tiempos, _limite(inicio, False).to_datetime64(), side='left')
+    hasta = len(tiempos) if fin is None else np.searchsorted(tiempos, _limite(fin, True).to_datetime64(), side='right')
+    return int(desde), int(hasta)
+
+
+def leer_rango(almacen, sensor_id, inicio=None, fin=None):
+    """Serie de un sensor entre `inicio` y `fin` (inclusive), como `serie.loc[inicio:fin]`.
+
+    Los valores y las fechas son vistas de los arreglos mapeados: no se
+    copian datos ni se lee más que las páginas del rango pedido.
+    """
+    if sensor_id not in almacen['arreglos']:
+        raise ValueError(f"Sensor desconocido: {sensor_id}. Opciones: {sorted(almacen['arreglos'])}")
+    tiempos, valores = almacen['arreglos'][sensor_id]
+    desde, hasta = posiciones_rango(tiempos, inicio, fin)
+    indice = pd.DatetimeIndex(tiempos[desde:hasta], name=almacen['manifiesto']['columna_fecha'], copy=False)
+    return pd.Series(valores[desde:hasta], index=indice, name='valor', copy=False)
@@ -0,0 +1,197 @@
+"""
+DETECTOR INCREMENTAL DE ANOMALÍAS CON LÍMITES DE CONTROL
+Sesión 12: Series Temporales en Pandas
+
+Los límites de control del laboratorio 3 y de la demostración (media móvil
+± k desviaciones estándar sobre 28 lecturas) se recalculan sobre toda la
+historia cada vez que llega un dato. Este detector guarda solo la ventana
+deslizante en un buffer circular junto con su media y su suma de cuadrados
+de desviaciones (M2), que se actualizan con las fórmulas de Welford al
+entrar un valor y salir el más antiguo: cada lectura cuesta O(1).
+
+Para que el error de redondeo no se acumule, media y M2 se recalculan
+exactamente desde el buffer cada vez que este da una vuelta completa, lo
+que suma O(1) amortizado por lectura. Los lotes de al menos una ventana de
+lecturas se procesan de forma vectorizada.
+
+El estado se puede guardar en JSON y restaurar para continuar entre
+ejecuciones.
+
+Uso:
+    detector = DetectorLimites(ventana=28, sigmas=3)
+    resultado = detector.actualizar(df_parametros['caudal_bpd'])
+    detector.guardar('detector.json')
+    ...
+    detector = DetectorLimites.cargar('detector.json')
+    detector.actualizar(nueva_lectura)
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from series_temporales.ventanas import _estadisticas_matriz
+
+VERSION_ESTADO = 1
+
+RESULTADOS = ('media', 'desviacion', 'limite_superior', 'limite_inferior', 'es_anomalia')
+
+
+class DetectorLimites:
+    """Límites de control media ± sigmas·std sobre las últimas `ventana` lecturas.
+
+    Igual que `rolling(window=ventana, min_periods=min_periods)`, la ventana
+    incluye la lectura actual y los NaN no cuentan como lecturas válidas.
+    """
+
+    def __init__(self, ventana=28, sigmas=3, min_periods=None):
+        self.ventana = int(ventana)
+        self.sigmas = float(sigmas)
+        self.min_periods = self.ventana if min_periods is None else int(min_periods)
+        self._buffer = np.full(self.ventana, np.nan)
+        self._posicion = 0
+        self._conteo = 0
+        self._media = 0.0
+        self._m2 = 0.0
+        self.lecturas = 0
+
+    # -- Actualización -------------------------------------------------------
+
+    def _agregar(self, valor):
+        """Agrega una lectura y retira la más antigua; O(1)"""
+        saliente = self._buffer[self._posicion]
+        self._buffer[self._posicion] = valor
+        self._posicion = (self._posicion + 1) % self.ventana
+        self.lecturas += 1
+
+        if not math.isnan(saliente):
+            if self._conteo == 1:
+                self._conteo, self._media, self._m2 = 0, 0.0, 0.0
+            else:
+                self._conteo -= 1
+                delta = saliente - self._media
+                self._media -= delta / self._conteo
+                self._m2 -= delta * (saliente - self._media)
+        if not math.isnan(valor):
+            self._conteo += 1
+            delta = valor - self._media
+            self._media += delta / self._conteo
+            self._m2 += delta * (valor - self._media)
+
+        if self._posicion == 0:
+            self._resincronizar()
+
+    def _resincronizar(self):
+        """Recalcula media y M2 exactamente a partir del buffer"""
+        validos = self._buffer[~np.isnan(self._buffer)]
+        self._conteo = len(validos)
+        self._media = float(validos.mean()) if len(validos) else 0.0
+        self._m2 = float(((validos - self._media) ** 2).sum()) if len(validos) else 0.0
+
+    def _limites(self):
+        """Media, desviación y límites de la ventana actual (NaN si no alcanza)"""
+        if self._conteo < max(self.min_periods, 1):
+            return math.nan, math.nan, math.nan, math.nan
+        desviacion = math.sqrt(max(self._m2, 0.0) / (self._conteo - 1)) if self._conteo > 1 else math.nan
+        return (self._media, desviacion,
+                self._media + self.sigmas * desviacion, self._media - self.sigmas * desviacion)
+
+    def _ventana_ordenada(self):
+        """Contenido del buffer de la lectura más antigua a la más reciente"""
+        return np.roll(self._buffer, -self._posicion)
+
+    def _actualizar_lote(self, valores):
+        """Procesa un lote de al menos `ventana` lecturas de forma vectorizada"""
+        historia = np.concatenate([self._ventana_ordenada(), valores])
+        # Las posiciones vacías de un buffer recién creado no son filas reales
+        faltantes = max(self.ventana - self.lecturas, 0)
+        estadisticas = _estadisticas_matriz(historia[None, faltantes:], ['mean', 'std'],
+                                            [self.ventana], self.min_periods)
+        media, desviacion = estadisticas[0, :, 0, -len(valores):]
+
+        self._buffer = historia[-self.ventana:].copy()
+        self._posicion = 0
+        self.lecturas += len(valores)
+        self._resincronizar()
+        return media, desviacion
+
+    def agregar(self, valor):
+        """Incorpora una sola lectura y devuelve (media, desviacion, superior, inferior, es_anomalia).
+
+        Hace la misma cuenta que `actualizar` con un número, pero sin crear
+        arreglos: es la ruta para lecturas que llegan de a una (ver
+        `servicio.py`).
+        """
+        valor = float(valor)
+        self._agregar(valor)
+        media, desviacion, superior, inferior = self._limites()
+        return media, desviacion, superior, inferior, valor > superior or valor < inferior
+
+    def actualizar(self, valores):
+        """Incorpora una lectura o un lote y devuelve sus límites y anomalías.
+
+        Acepta un número, un arreglo o una Serie. Devuelve un diccionario de
+        arreglos con RESULTADOS (un DataFrame con el mismo índice si la
+        entrada es una Serie).
+        """
+        serie = valores if isinstance(valores, pd.Series) else None
+        valores = np.atleast_1d(np.asarray(valores, dtype=np.float64))
+
+        if len(valores) >= self.ventana:
+            media, desviacion = self._actualizar_lote(valores)
+            superior = media + self.sigmas * desviacion
+            inferior = media - self.sigmas * desviacion
+        else:
+            salida = np.empty((4, len(valores)))
+            for i, valor in enumerate(valores):
+                self._agregar(float(valor))
+                salida[:, i] = self._limites()
+            media, desviacion, superior, inferior = salida
+
+        with np.errstate(invalid='ignore'):
+            es_anomalia = (valores > superior) | (valores < inferior)
+        resultado = dict(zip(RESULTADOS, (media, desviacion, superior, inferior, es_anomalia)))
+        if serie is not None:
+            return pd.DataFrame(resultado, index=serie.index)
+        return resultado
+
+    # -- Estado --------------------------------------------------------------
+
+    def estado(self):
+        """Estado serializable en JSON (la ventana va en orden cronológico)"""
+        return {
+            'version': VERSION_ESTADO,
+            'ventana': self.ventana,
+            'sigmas': self.sigmas,
+            'min_periods': self.min_periods,
+            'lecturas': self.lecturas,
+            'buffer': [None if math.isnan(valor) else valor for valor in self._ventana_ordenada().tolist()],
+        }
+
+    @classmethod
+    def desde_estado(cls, estado):
+        """Reconstruye un detector a partir de `estado()`"""
+        if estado.get('version') != VERSION_ESTADO:
+            raise ValueError(f"Versión de estado no soportada: {estado.get('version')}")
+        detector = cls(estado['ventana'], estado['sigmas'], estado['min_periods'])
+        detector._buffer = np.array([np.nan if valor is None else valor for valor in estado['buffer']],
+                                    dtype=np.float64)
+        detector.lecturas = estado['lecturas']
+        detector._resincronizar()
+        return detector
+
+    def guardar(self, ruta):
+        """Escribe el estado en un archivo JSON (reemplazo atómico)"""
+        ruta = Path(ruta)
+        temporal = ruta.with_name(ruta.name + '.tmp')
+        temporal.write_text(json.dumps(self.estado()), encoding='utf-8')
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Restaura un detector guardado con `guardar`"""
+        return cls.desde_estado(json.loads(Path(ruta).read_text(encoding='utf-8')))
@@ -0,0 +1,174 @@
+"""
+CACHE COLUMNAR DE DATASETS PARSEADOS
+Sesión 12: Series Temporales en Pandas
+
+Guarda cada columna de un DataFrame ya parseado como un archivo `.npy` en
+`<carpeta del CSV>/.cache/<nombre>/`, junto con un manifiesto JSON que
+describe tipos, categorías y la firma del CSV de origen. Leer un `.npy` es
+copiar bytes a memoria, sin parsear texto, y permite cargar solo algunas
+columnas.
+
+El cache se invalida cuando cambia el CSV: si el tamaño y la fecha de
+modificación coinciden se considera válido; si solo cambió la fecha de
+modificación se compara el hash del contenido antes de descartarlo.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+VERSION_CACHE = 2
+
+_MANIFIESTO = 'manifiesto.json'
+
+
+def ruta_cache(ruta_csv):
+    """Carpeta de cache para un CSV"""
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.parent / '.cache' / ruta_csv.stem
+
+
+def hash_contenido(ruta, tamano_bloque=1 << 20):
+    """Hash BLAKE2b del contenido de un archivo, leído por bloques"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as archivo:
+        while bloque := archivo.read(tamano_bloque):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _firma(ruta):
+    """Tamaño y fecha de modificación de un archivo"""
+    estado = os.stat(ruta)
+    return {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+def manifiesto_valido(ruta_csv):
+    """Devuelve el manifiesto del cache si corresponde al CSV actual, o None"""
+    ruta_manifiesto = ruta_cache(ruta_csv) / _MANIFIESTO
+    try:
+        manifiesto = json.loads(ruta_manifiesto.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if manifiesto.get('version') != VERSION_CACHE:
+        return None
+
+    firma = _firma(ruta_csv)
+    origen = manifiesto['origen']
+    if firma['tamano'] != origen['tamano']:
+        return None
+    if firma['mtime_ns'] != origen['mtime_ns']:
+        # El archivo se tocó; solo se descarta el cache si cambió el contenido
+        if hash_contenido(ruta_csv) != origen['hash']:
+            return None
+        origen['mtime_ns'] = firma['mtime_ns']
+        try:
+            ruta_manifiesto.write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding='utf-8')
+        except OSError:
+            pass
+    return manifiesto
+
+
+def codificar_columna(serie):
+    """(arreglo NumPy, descripción) con que se guarda una columna en `.npy`"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), {'tipo': 'category', 'categorias': serie.cat.categories.tolist()}
+    if pd.api.types.is_datetime64_dtype(serie.dtype):
+        return serie.to_numpy().view(np.int64), {'tipo': 'datetime', 'unidad': np.datetime_data(serie.dtype)[0]}
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        valores = serie.to_numpy()
+        return valores, {'tipo': str(valores.dtype)}
+    # Texto libre: se guarda como códigos más diccionario
+    codigos, categorias = pd.factorize(serie)
+    return codigos, {'tipo': 'str', 'categorias': categorias.tolist()}
+
+
+def decodificar_columna(valores, descripcion):
+    """Reconstruye una columna a partir del arreglo guardado y su descripción"""
+    tipo = descripcion['tipo']
+    if tipo == 'category':
+        return pd.Categorical.from_codes(valores, descripcion['categorias'])
+    if tipo == 'str':
+        # El código -1 (faltante) toma el None agregado al final
+        categorias = np.asarray(descripcion['categorias'] + [None], dtype=object)
+        return categorias[valores]
+    if tipo == 'datetime':
+        return valores.view(f"datetime64[{descripcion['unidad']}]")
+    return valores
+
+
+def guardar_cache(df, ruta_csv):
+    """Escribe el DataFrame (índice incluido) como columnas `.npy` con su manifiesto.
+
+    La escritura se hace en una carpeta temporal que luego se renombra, para
+    que una lectura concurrente nunca vea un cache a medio escribir.
+    """
+    destino = ruta_cache(ruta_csv)
+    origen = {**_firma(ruta_csv), 'hash': hash_contenido(ruta_csv)}
+    tabla = df.reset_index()
+    columnas = []
+    temporal = None
+
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporal = Path(tempfile.mkdtemp(prefix=f'.{destino.name}-', dir=destino.parent))
+        temporal.chmod(0o755)
+        for posicion, columna in enumerate(tabla.columns):
+            archivo = f'{posicion:03d}.npy'
+            valores, descripcion = codificar_columna(tabla[columna])
+            np.save(temporal / archivo, valores, allow_pickle=False)
+            columnas.append({'nombre': columna, 'archivo': archivo, **descripcion})
+
+        manifiesto = {
+            'version': VERSION_CACHE,
+            'origen': origen,
+            'indice': tabla.columns[0],
+            'nombre_indice': df.index.name,
+            'filas': len(tabla),
+            'columnas': columnas,
+        }
+        (temporal / _MANIFIESTO).write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding='utf-8')
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(temporal, destino)
+    except OSError as error:
+        warnings.warn(f"No se pudo escribir el cache de {ruta_csv}: {error}")
+        if temporal is not None:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+
+def _leer_columna(carpeta, descripcion, mmap):
+    """Reconstruye una columna a partir de su `.npy` y su descripción"""
+    valores = np.load(carpeta / descripcion['archivo'], mmap_mode='r' if mmap else None, allow_pickle=False)
+    return decodificar_columna(valores, descripcion)
+
+
+def leer_cache(ruta_csv, manifiesto, columnas=None, mmap=False):
+    """Carga el DataFrame desde el cache; `columnas` limita las columnas leídas.
+
+    Con `mmap=True` las columnas numéricas quedan mapeadas en memoria en
+    lugar de copiarse (solo lectura).
+    """
+    carpeta = ruta_cache(ruta_csv)
+    indice = manifiesto['indice']
+    datos = {}
+    for descripcion in manifiesto['columnas']:
+        nombre = descripcion['nombre']
+        if columnas is not None and nombre != indice and nombre not in columnas:
+            continue
+        datos[nombre] = _leer_columna(carpeta, descripcion, mmap)
+
+    df = pd.DataFrame(datos, copy=False).set_index(indice)
+    df.index.name = manifiesto['nombre_indice']
+    return df
+
+
+def invalidar_cache(ruta_csv):
+    """Borra el cache de un CSV"""
+    shutil.rmtree(ruta_cache(ruta_csv), ignore_errors=True)
@@ -0,0 +1,226 @@
+"""
+CARGA TIPADA DE LOS DATASETS
+Sesión 12: Series Temporales en Pandas
+
+Conoce el esquema de los cuatro archivos de `datos/` y los carga con tipos
+fijos: fechas con formato explícito, columnas repetitivas como categóricas y
+columnas enteras en el tipo más angosto que admite su rango. Las columnas con
+decimales se mantienen en float64 para no perder precisión. Devuelve el
+DataFrame con DatetimeIndex ordenado. Si pyarrow está instalado se usa su
+lector CSV multihilo.
+
+Después del esquema se aplica la compactación sin pérdida de
+`compactacion.py` (texto con pocos valores distintos como categórica), así
+que el cache ya guarda la versión compacta. Con `tolerancia` los decimales
+pasan además a float32 si el error relativo queda dentro de ella.
+
+La primera carga de cada archivo escribe un cache columnar (ver `cache.py`)
+y las siguientes se sirven desde él mientras el CSV no cambie.
+
+Uso:
+    df_produccion = cargar_dataset('produccion_historica')
+
+Comparar contra pd.read_csv sin tipos:
+    python -m series_temporales.carga datos/sensores_temporales.csv
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from series_temporales import cache, compactacion
+
+try:
+    import pyarrow  # noqa: F401
+    MOTOR_CSV = 'pyarrow'  # Lector multihilo, opcional
+except ImportError:
+    MOTOR_CSV = 'c'
+
+DIRECTORIO_DATOS = Path(__file__).resolve().parent.parent / 'datos'
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+ESQUEMAS = {
+    'produccion_historica': {
+        'fecha': 'fecha',
+        'tipos': {
+            'pozo_id': 'category',
+            'campo': 'category',
+            'produccion_bpd': 'int32',
+            'presion_psi': 'int16',
+            'temperatura_f': 'int16',
+            'agua_porcentaje': 'int8',
+            'gas_porcentaje': 'int8',
+            'estado_pozo': 'category',
+        },
+    },
+    'sensores_temporales': {
+        'fecha': 'timestamp',
+        'tipos': {
+            'sensor_id': 'category',
+            'pozo_id': 'category',
+            'tipo_sensor': 'category',
+            'valor': 'float64',
+            'unidad': 'category',
+            'calidad_dato': 'category',
+        },
+    },
+    'parametros_pozos': {
+        'fecha': 'fecha',
+        'tipos': {
+            'pozo_id': 'category',
+            'profundidad_ft': 'int32',
+            'presion_fondo_psi': 'int16',
+            'temperatura_fondo_f': 'int16',
+            'caudal_bpd': 'int32',
+            'presion_cabeza_psi': 'int16',
+            'temperatura_cabeza_f': 'int16',
+            'gravedad_api': 'float64',
+            'agua_porcentaje': 'int8',
+            'gas_porcentaje': 'int8',
+            'estado_pozo': 'category',
+        },
+    },
+    'eventos_operacionales': {
+        'fecha': 'fecha_evento',
+        'tipos': {
+            'pozo_id': 'category',
+            'tipo_evento': 'category',
+            'descripcion': 'str',
+            'duracion_horas': 'int16',
+            'impacto_produccion': 'float64',
+            'responsable': 'category',
+        },
+    },
+}
+
+
+def ruta_dataset(nombre):
+    """Devuelve la ruta del CSV de un dataset conocido"""
+    if nombre not in ESQUEMAS:
+        raise ValueError(f"Dataset desconocido: {nombre}. Opciones: {sorted(ESQUEMAS)}")
+    return DIRECTORIO_DATOS / f'{nombre}.csv'
+
+
+def _leer_csv(ruta, fecha, tipos):
+    """Lee un CSV con los tipos dados y la fecha con formato fijo"""
+    return pd.read_csv(
+        ruta,
+        usecols=[fecha, *tipos],
+        dtype=tipos,
+        parse_dates=[fecha],
+        date_format=FORMATO_FECHA,
+        engine=MOTOR_CSV,
+    )
+
+
+def _leer_tipado(nombre, ruta):
+    """Parsea el CSV completo con el esquema del dataset y la fecha como índice ordenado"""
+    fecha = ESQUEMAS[nombre]['fecha']
+    tipos = ESQUEMAS[nombre]['tipos']
+    try:
+        df = _leer_csv(ruta, fecha, tipos)
+    except ValueError:
+        # Una columna entera con faltantes no cabe en int: float32 la
+        # representa sin pérdida mientras los valores sean menores a 2**24
+        tipos = {columna: 'float32' if tipo.startswith('int') else tipo for columna, tipo in tipos.items()}
+        df = _leer_csv(ruta, fecha, tipos)
+
+    df = df.set_index(fecha)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    return df
+
+
+def cargar_dataset(nombre, ruta=None, columnas=None, indexar=True, usar_cache=True, tolerancia=None):
+    """Carga uno de los datasets de `datos/` con su esquema y DatetimeIndex ordenado.
+
+    `ruta` permite leer otro archivo con el mismo esquema. `columnas` limita
+    las columnas devueltas (la fecha siempre se incluye); desde el cache solo
+    se leen esas columnas. Con `indexar=False` la fecha queda como columna en
+    lugar de índice. Con `usar_cache=False` siempre se parsea el CSV.
+    `tolerancia` es el error relativo admitido para guardar los decimales
+    en float32 (None: se mantienen en float64).
+    """
+    ruta = Path(ruta) if ruta is not None else ruta_dataset(nombre)
+
+    manifiesto = cache.manifiesto_valido(ruta) if usar_cache else None
+    if manifiesto is not None:
+        df = cache.leer_cache(ruta, manifiesto, columnas)
+    else:
+        df, _ = compactacion.compactar(_leer_tipado(nombre, ruta), enteros=False)
+        if usar_cache:
+            cache.guardar_cache(df, ruta)
+        if columnas is not None:
+            df = df[[columna for columna in columnas if columna != df.index.name]]
+
+    if tolerancia is not None:
+        df, _ = compactacion.compactar(df, tolerancia=tolerancia, enteros=False)
+    if not indexar:
+        df = df.reset_index()
+    return df
+
+
+def iterar_dataset(nombre, ruta=None, columnas=None, filas_por_bloque=1_000_000):
+    """Lee un dataset por bloques de filas, sin cargar el archivo completo.
+
+    Cada bloque llega con el esquema aplicado y la fecha como índice. No usa
+    el cache ni reordena: los bloques salen en el orden del archivo.
+    """
+    ruta = Path(ruta) if ruta is not None else ruta_dataset(nombre)
+    fecha = ESQUEMAS[nombre]['fecha']
+    tipos = ESQUEMAS[nombre]['tipos']
+    if columnas is not None:
+        tipos = {columna: tipos[columna] for columna in columnas if columna != fecha}
+    # Con faltantes en un bloque la columna entera no sería válida
+    tipos = {columna: 'float32' if tipo.startswith('int') else tipo for columna, tipo in tipos.items()}
+
+    lector = pd.read_csv(
+        ruta,
+        usecols=[fecha, *tipos],
+        dtype=tipos,
+        parse_dates=[fecha],
+        date_format=FORMATO_FECHA,
+        chunksize=filas_por_bloque,
+    )
+    with lector:
+        for bloque in lector:
+            yield bloque.set_index(fecha)
+
+
+def _comparar(ruta):
+    """Compara tiempo y memoria de pd.read_csv sin tipos contra la carga tipada"""
+    ruta = Path(ruta)
+    esquema = ESQUEMAS[ruta.stem]
+
+    inicio = time.perf_counter()
+    sin_tipos = pd.read_csv(ruta)
+    sin_tipos[esquema['fecha']] = pd.to_datetime(sin_tipos[esquema['fecha']])
+    sin_tipos.set_index(esquema['fecha'], inplace=True)
+    tiempo_sin_tipos = time.perf_counter() - inicio
+    memoria_sin_tipos = sin_tipos.memory_usage(deep=True).sum()
+    del sin_tipos
+
+    inicio = time.perf_counter()
+    tipado = cargar_dataset(ruta.stem, ruta=ruta, usar_cache=False)
+    tiempo_tipado = time.perf_counter() - inicio
+    memoria_tipado = tipado.memory_usage(deep=True).sum()
+
+    cache.guardar_cache(tipado, ruta)
+    inicio = time.perf_counter()
+    cargar_dataset(ruta.stem, ruta=ruta)
+    tiempo_cache = time.perf_counter() - inicio
+
+    print(f"Archivo: {ruta} ({len(tipado)} registros)")
+    print(f"• pd.read_csv sin tipos: {tiempo_sin_tipos:.2f} s, {memoria_sin_tipos / 1e6:.1f} MB")
+    print(f"• Carga tipada:          {tiempo_tipado:.2f} s, {memoria_tipado / 1e6:.1f} MB")
+    print(f"• Desde cache:           {tiempo_cache:.3f} s")
+    print(f"• Aceleración: {tiempo_sin_tipos / tiempo_tipado:.1f}x (cache: {tiempo_sin_tipos / tiempo_cache:.0f}x), "
+          f"memoria: {memoria_tipado / memoria_sin_tipos * 100:.0f}% de la original")
+
+
+if __name__ == '__main__':
+    for argumento in sys.argv[1:] or [ruta_dataset(nombre) for nombre in ESQUEMAS]:
+        _comparar(argumento)
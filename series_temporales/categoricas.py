@@ -0,0 +1,158 @@
+"""
+AGREGACIONES CATEGÓRICAS VECTORIZADAS PARA RESAMPLE
+Sesión 12: Series Temporales en Pandas
+
+Reemplaza las lambdas de `resample().agg` que llaman a Python una vez por
+intervalo (`x.mode().iloc[0]`, `x.max() - x.min()`) por kernels sobre
+enteros: cada lectura se convierte en (código de intervalo, código de
+categoría) y los conteos por par salen de un solo `bincount`. Con eso se
+obtienen la moda, la cantidad de categorías distintas y la fracción de una
+categoría en cada intervalo. El rango (máximo - mínimo) usa `reduceat`.
+
+Uso:
+    agregar_resample(df_sensores, 'D', {
+        'valor': ['mean', 'rango'],
+        'calidad_dato': ['moda', 'distintos', ('fraccion', 'Excelente')],
+    })
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales.agregados import intervalos, origen_intervalos
+
+AGREGADOS_CATEGORICOS = ('moda', 'rango', 'distintos', 'fraccion')
+
+# Por encima de este tamaño la tabla (intervalos x categorías) se reemplaza
+# por el conteo de pares únicos ordenados
+_MAXIMO_TABLA = 1 << 24
+
+
+def _codigos(serie, freq):
+    """Código de intervalo de cada lectura, etiquetas de los intervalos y serie ordenada"""
+    if not serie.index.is_monotonic_increasing:
+        serie = serie.sort_index(kind='stable')
+    codigos, etiquetas = intervalos(serie.index, freq, origen_intervalos(serie.index))
+    return codigos, etiquetas, serie
+
+
+def _categorias(serie):
+    """Códigos enteros de la serie (-1 para faltantes) y sus categorías"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    return pd.factorize(serie, sort=True)
+
+
+def _conteos_pares(intervalo, codigo, total_intervalos, total_categorias):
+    """Pares (intervalo, categoría) presentes y su conteo, ordenados por intervalo y categoría"""
+    validos = codigo >= 0
+    clave = intervalo[validos].astype(np.int64) * total_categorias + codigo[validos]
+    if total_intervalos * total_categorias <= max(_MAXIMO_TABLA, 4 * len(clave)):
+        conteos = np.bincount(clave, minlength=total_intervalos * total_categorias)
+        presentes = np.flatnonzero(conteos)
+        conteos = conteos[presentes]
+    else:
+        presentes, conteos = np.unique(clave, return_counts=True)
+    return presentes // total_categorias, presentes % total_categorias, conteos
+
+
+def moda_resample(serie, freq):
+    """Categoría más frecuente por intervalo, como `resample(freq).agg(lambda x: x.mode().iloc[0])`.
+
+    Los empates se resuelven por la primera categoría en orden, igual que
+    `mode()`; los intervalos sin lecturas quedan en NaN.
+    """
+    intervalo, etiquetas, serie = _codigos(serie, freq)
+    codigo, categorias = _categorias(serie)
+    par_intervalo, par_codigo, conteo = _conteos_pares(intervalo, codigo, len(etiquetas), len(categorias))
+
+    # Por intervalo, el par con mayor conteo y, si empata, la menor categoría
+    orden = np.lexsort((par_codigo, -conteo, par_intervalo))
+    primeros = orden[np.r_[True, par_intervalo[orden][1:] != par_intervalo[orden][:-1]]]
+    moda = np.full(len(etiquetas), -1, dtype=np.int64)
+    moda[par_intervalo[primeros]] = par_codigo[primeros]
+    valores = pd.Categorical.from_codes(moda, categories=categorias)
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        valores = np.asarray(valores, dtype=object)
+    return pd.Series(valores, index=etiquetas, name=serie.name)
+
+
+def distintos_resample(serie, freq):
+    """Cantidad de valores distintos por intervalo, como `resample(freq).nunique()`"""
+    intervalo, etiquetas, serie = _codigos(serie, freq)
+    codigo, categorias = _categorias(serie)
+    par_intervalo, _, _ = _conteos_pares(intervalo, codigo, len(etiquetas), len(categorias))
+    return pd.Series(np.bincount(par_intervalo, minlength=len(etiquetas)), index=etiquetas, name=serie.name)
+
+
+def fraccion_resample(serie, freq, categoria):
+    """Fracción de lecturas iguales a `categoria` entre las lecturas con valor de cada intervalo"""
+    intervalo, etiquetas, serie = _codigos(serie, freq)
+    codigo, categorias = _categorias(serie)
+    total = np.bincount(intervalo[codigo >= 0], minlength=len(etiquetas))
+    posicion = categorias.get_indexer([categoria])[0]
+    coincidencias = np.bincount(intervalo[codigo == posicion], minlength=len(etiquetas)) if posicion >= 0 \
+        else np.zeros(len(etiquetas), dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraccion = np.where(total > 0, coincidencias / total, np.nan)
+    return pd.Series(fraccion, index=etiquetas, name=serie.name)
+
+
+def rango_resample(serie, freq):
+    """Máximo menos mínimo por intervalo, como `resample(freq).agg(lambda x: x.max() - x.min())`"""
+    intervalo, etiquetas, serie = _codigos(serie, freq)
+    valores = serie.to_numpy(dtype=np.float64)
+    validos = ~np.isnan(valores)
+    rango = np.full(len(etiquetas), np.nan)
+    if validos.any():
+        intervalo, valores = intervalo[validos], valores[validos]
+        inicios = np.flatnonzero(np.r_[True, intervalo[1:] != intervalo[:-1]])
+        rango[intervalo[inicios]] = np.maximum.reduceat(valores, inicios) - np.minimum.reduceat(valores, inicios)
+    return pd.Series(rango, index=etiquetas, name=serie.name)
+
+
+def _agregar_columna(serie, freq, agregado):
+    """Aplica un agregado categórico; devuelve (nombre de la columna, serie resultante)"""
+    if isinstance(agregado, tuple):
+        nombre, categoria = agregado
+        if nombre != 'fraccion':
+            raise ValueError(f"Agregado con parámetro no soportado: {agregado}")
+        return f'fraccion_{categoria}', fraccion_resample(serie, freq, categoria)
+    funciones = {'moda': moda_resample, 'rango': rango_resample, 'distintos': distintos_resample}
+    return agregado, funciones[agregado](serie, freq)
+
+
+def agregar_resample(df, freq, especificacion):
+    """`df.resample(freq).agg(especificacion)` aceptando también los agregados categóricos.
+
+    `especificacion` es un diccionario {columna: agregado o lista}. Además
+    de los agregados de pandas ('mean', 'max', 'first'...) acepta 'moda',
+    'rango', 'distintos' y ('fraccion', categoria). Las columnas resultantes
+    siguen la misma forma que pandas: MultiIndex (columna, agregado) si
+    alguna columna pide una lista, nombres simples si no.
+    """
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    con_listas = any(isinstance(agregados, list) for agregados in especificacion.values())
+    especificacion = {columna: agregados if isinstance(agregados, list) else [agregados]
+                      for columna, agregados in especificacion.items()}
+    nativos = {columna: [agregado for agregado in agregados
+                         if isinstance(agregado, str) and agregado not in AGREGADOS_CATEGORICOS]
+               for columna, agregados in especificacion.items()}
+    nativos = {columna: agregados for columna, agregados in nativos.items() if agregados}
+    tabla_nativa = df.resample(freq).agg(nativos) if nativos else None
+
+    partes = {}
+    for columna, agregados in especificacion.items():
+        for agregado in agregados:
+            if agregado in nativos.get(columna, []):
+                partes[(columna, agregado)] = tabla_nativa[(columna, agregado)]
+            else:
+                nombre, resultado = _agregar_columna(df[columna], freq, agregado)
+                partes[(columna, nombre)] = resultado
+
+    salida = pd.DataFrame(partes)
+    salida.index.name = df.index.name
+    if not con_listas:
+        salida.columns = salida.columns.get_level_values(0)
+    return salida
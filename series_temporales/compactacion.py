@@ -0,0 +1,155 @@
+"""
+COMPACTACIÓN DE DATAFRAMES Y REPORTE DE MEMORIA
+Sesión 12: Series Temporales en Pandas
+
+Los esquemas de `carga.py` ya fijan tipos angostos para los datasets
+conocidos, pero los DataFrames que se arman en los laboratorios (o los CSV
+con otras columnas) siguen usando int64, float64 y texto como objetos de
+Python, y acumulan columnas derivadas que solo se usaron para un print.
+`compactar` reduce la memoria de un DataFrame columna por columna:
+
+- Enteros: al tipo con signo más angosto que contiene su rango (sin
+  pérdida; el signo se conserva para que `diff` no desborde).
+- Decimales: a float32 solo si se indica `tolerancia` y el error relativo
+  de cada valor queda dentro de ella (`tolerancia=0` exige exactitud).
+- Texto: a categórica si la cantidad de valores distintos es a lo sumo
+  `max_categorias` veces la cantidad de filas.
+- Las columnas de `descartar` se eliminan.
+
+Devuelve además un reporte con tipo y bytes antes y después de cada
+columna. `cargar_dataset` aplica la compactación sin pérdida antes de
+escribir el cache, sin tocar los enteros: el esquema ya fija su tipo según
+el rango posible de cada columna, y angostarlos al rango de los datos de un
+archivo puede desbordar en cálculos posteriores (`produccion_bpd * 30`).
+
+Uso:
+    compactado, reporte = compactar(df_parametros, descartar=['produccion_ma_centrada'])
+    print(reporte)
+
+Desde la línea de comandos (reporte de cada dataset):
+    python -m series_temporales.compactacion datos/eventos_operacionales.csv
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_ENTEROS = (np.int8, np.int16, np.int32, np.int64)
+
+
+def huella_memoria(df):
+    """Bytes por columna (texto incluido) del DataFrame, con el índice como 'Index'"""
+    return df.memory_usage(deep=True)
+
+
+def _entero_angosto(valores):
+    """Tipo entero con signo más angosto que contiene los valores"""
+    if len(valores) == 0:
+        return valores.dtype
+    minimo, maximo = valores.min(), valores.max()
+    for tipo in _ENTEROS:
+        limites = np.iinfo(tipo)
+        if limites.min <= minimo and maximo <= limites.max:
+            return np.dtype(tipo) if np.dtype(tipo).itemsize < valores.dtype.itemsize else valores.dtype
+    return valores.dtype
+
+
+def _cabe_en_float32(valores, tolerancia):
+    """True si pasar a float32 no cambia ningún valor más que `tolerancia` (relativa)"""
+    reducidos = valores.astype(np.float32).astype(np.float64)
+    with np.errstate(invalid='ignore'):
+        error = np.abs(reducidos - valores)
+        permitido = tolerancia * np.abs(valores)
+        # NaN compara como NaN e infinitos como infinitos: solo cuentan los finitos
+        fuera = np.isfinite(valores) & ~(error <= permitido)
+    return not fuera.any()
+
+
+def _compactar_columna(serie, tolerancia, max_categorias, enteros):
+    """(serie compactada, acción) de una columna; la misma serie si no conviene cambiarla"""
+    tipo = serie.dtype
+    if isinstance(tipo, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(tipo) \
+            or pd.api.types.is_datetime64_any_dtype(tipo) or pd.api.types.is_timedelta64_dtype(tipo):
+        return serie, ''
+    if isinstance(tipo, np.dtype) and tipo.kind in 'iu':
+        if not enteros:
+            return serie, ''
+        angosto = _entero_angosto(serie.to_numpy())
+        if angosto != tipo:
+            return serie.astype(angosto), f'entero a {angosto}'
+        return serie, ''
+    if isinstance(tipo, np.dtype) and tipo.kind == 'f':
+        if tolerancia is not None and tipo.itemsize > 4 and _cabe_en_float32(serie.to_numpy(), tolerancia):
+            return serie.astype(np.float32), 'decimal a float32'
+        return serie, ''
+    if pd.api.types.is_object_dtype(tipo) or pd.api.types.is_string_dtype(tipo):
+        distintos = serie.nunique(dropna=True)
+        if len(serie) and distintos <= max_categorias * len(serie):
+            return serie.astype('category'), f'texto a categórica ({distintos} valores)'
+    return serie, ''
+
+
+def compactar(df, tolerancia=None, max_categorias=0.5, descartar=None, enteros=True):
+    """Devuelve (DataFrame compactado, reporte por columna).
+
+    `tolerancia` habilita float64 -> float32 con ese error relativo máximo
+    (None: los decimales no se tocan). `max_categorias` es la fracción
+    máxima de valores distintos para convertir texto en categórica.
+    `descartar` son columnas derivadas que ya no se necesitan. Con
+    `enteros=False` los enteros conservan su tipo. Las columnas que no
+    cambian se comparten con `df`, sin copiarlas.
+
+    El reporte tiene tipo_antes, tipo_despues, bytes_antes, bytes_despues
+    y accion por columna; las descartadas quedan con 0 bytes después.
+    """
+    descartar = set(descartar or ())
+    faltantes = descartar - set(df.columns)
+    if faltantes:
+        raise KeyError(f"Columnas a descartar inexistentes: {sorted(faltantes)}")
+
+    antes = huella_memoria(df)
+    columnas = {}
+    filas = []
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in descartar:
+            filas.append((columna, str(serie.dtype), '', antes[columna], 0, 'descartada'))
+            continue
+        nueva, accion = _compactar_columna(serie, tolerancia, max_categorias, enteros)
+        columnas[columna] = nueva
+        filas.append((columna, str(serie.dtype), str(nueva.dtype), antes[columna],
+                      nueva.memory_usage(deep=True, index=False), accion))
+
+    compactado = pd.DataFrame(columnas, index=df.index, copy=False)
+    reporte = pd.DataFrame(filas, columns=['columna', 'tipo_antes', 'tipo_despues', 'bytes_antes', 'bytes_despues',
+                                           'accion']).set_index('columna')
+    return compactado, reporte
+
+
+def resumir_reporte(reporte):
+    """Texto de una línea con el total antes y después y el porcentaje ahorrado"""
+    antes, despues = reporte['bytes_antes'].sum(), reporte['bytes_despues'].sum()
+    ahorro = (1 - despues / antes) * 100 if antes else 0.0
+    return f"{antes / 1e3:.1f} KB -> {despues / 1e3:.1f} KB ({ahorro:.0f}% menos)"
+
+
+def _reportar(ruta):
+    """Reporte de compactación del CSV de un dataset conocido, leído con su esquema"""
+    from series_temporales.carga import _leer_tipado
+
+    ruta = Path(ruta)
+    df = _leer_tipado(ruta.stem, ruta)
+    _, reporte = compactar(df, tolerancia=1e-6)
+    print(f"Archivo: {ruta} ({len(df)} registros)")
+    with pd.option_context('display.width', None, 'display.max_columns', None):
+        print(reporte)
+    print(f"Total: {resumir_reporte(reporte)}\n")
+
+
+if __name__ == '__main__':
+    from series_temporales.carga import ESQUEMAS, ruta_dataset
+
+    for argumento in sys.argv[1:] or [ruta_dataset(nombre) for nombre in ESQUEMAS]:
+        _reportar(argumento)
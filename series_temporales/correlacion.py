@@ -0,0 +1,123 @@
+"""
+COVARIANZA Y CORRELACIÓN MÓVIL
+Sesión 12: Series Temporales en Pandas
+
+Covarianzas y correlaciones en ventana deslizante para todos los pares de
+columnas a la vez, calculadas con sumas acumuladas por bloques. Reemplaza
+el bucle de `correlacion_movil` que llamaba a `np.corrcoef` fila por fila.
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import como_matriz, iterar_bloques, sumas_moviles, ventanas_constantes
+
+# Filas por bloque: las sumas por pares ocupan filas x columnas² valores
+_BLOQUE_PARES = 1 << 14
+
+
+def _momentos_pares(valores, ventana, min_periods):
+    """Covarianza y varianzas por pares de columnas para cada ventana.
+
+    Cada par usa solo las filas en que ambas columnas son válidas. Devuelve
+    tres arreglos (filas, k, k): covarianza, varianza de la columna i y
+    varianza de la columna j dentro del par, todos con ddof=1. Si una
+    columna es constante en la ventana su varianza y la covarianza son 0
+    exacto, de modo que la correlación queda NaN.
+    """
+    n, k = valores.shape
+    covarianza = np.full((n, k, k), np.nan)
+    varianza_i = np.full((n, k, k), np.nan)
+    varianza_j = np.full((n, k, k), np.nan)
+
+    for origen, inicio, fin in iterar_bloques(n, ventana, _BLOQUE_PARES):
+        segmento = valores[origen:fin]
+        validos = ~np.isnan(segmento)
+
+        # Centrar por bloque evita la cancelación de Σx² - (Σx)²/n
+        conteo_columna = validos.sum(axis=0)
+        centro = np.where(validos, segmento, 0).sum(axis=0) / np.maximum(conteo_columna, 1)
+        x = np.where(validos, segmento - centro, 0.0)
+        m = validos.astype(np.float64)
+
+        desde = inicio - origen
+        # Sumas de x_i restringidas a las filas donde x_j también es válido
+        conteo = sumas_moviles(m[:, :, None] * m[:, None, :], ventana, desde)
+        suma_x = sumas_moviles(x[:, :, None] * m[:, None, :], ventana, desde)
+        suma_xx = sumas_moviles((x * x)[:, :, None] * m[:, None, :], ventana, desde)
+        suma_xy = sumas_moviles(x[:, :, None] * x[:, None, :], ventana, desde)
+        suma_y = np.swapaxes(suma_x, 1, 2)
+        suma_yy = np.swapaxes(suma_xx, 1, 2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (suma_xy - suma_x * suma_y / conteo) / (conteo - 1)
+            var_i = (suma_xx - suma_x * suma_x / conteo) / (conteo - 1)
+            var_j = (suma_yy - suma_y * suma_y / conteo) / (conteo - 1)
+
+        # El centrado por bloque deja un residuo de redondeo en las ventanas
+        # constantes que, dividido por otro residuo, daría correlación ±1
+        pares = validos[:, :, None] & validos[:, None, :]
+        constante_i, = ventanas_constantes(np.broadcast_to(segmento[:, :, None], pares.shape), pares, [ventana], desde)
+        constante_j = np.swapaxes(constante_i, 1, 2)
+        var_i[constante_i] = 0.0
+        var_j[constante_j] = 0.0
+        cov[constante_i | constante_j] = 0.0
+
+        suficientes = conteo >= max(min_periods, 2)
+        covarianza[inicio:fin] = np.where(suficientes, cov, np.nan)
+        varianza_i[inicio:fin] = np.where(suficientes, np.maximum(var_i, 0), np.nan)
+        varianza_j[inicio:fin] = np.where(suficientes, np.maximum(var_j, 0), np.nan)
+
+    return covarianza, varianza_i, varianza_j
+
+
+def _correlacion_pares(valores, ventana, min_periods):
+    """Correlación de Pearson por pares de columnas para cada ventana"""
+    covarianza, varianza_i, varianza_j = _momentos_pares(valores, ventana, min_periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlacion = covarianza / np.sqrt(varianza_i * varianza_j)
+    return np.clip(correlacion, -1.0, 1.0)
+
+
+def _formato_largo(cubo, df):
+    """Convierte un arreglo (filas, k, k) al formato de `df.rolling().corr()`"""
+    n, k, _ = cubo.shape
+    indice = pd.MultiIndex.from_arrays([
+        np.repeat(df.index, k),
+        np.tile(df.columns, n),
+    ], names=[df.index.name, None])
+    return pd.DataFrame(cubo.reshape(n * k, k), index=indice, columns=df.columns)
+
+
+def correlacion_movil(serie1, serie2, ventana=28, min_periods=None):
+    """Calcula la correlación móvil entre dos series"""
+    if min_periods is None:
+        min_periods = ventana
+    valores = np.column_stack([como_matriz(serie1), como_matriz(serie2)])
+    correlacion = _correlacion_pares(valores, ventana, min_periods)
+    return pd.Series(correlacion[:, 0, 1], index=serie1.index)
+
+
+def covarianza_movil(df, ventana, min_periods=None):
+    """Calcula la matriz de covarianza móvil entre todas las columnas.
+
+    Devuelve un DataFrame con índice (fecha, columna) igual que
+    `df.rolling(ventana).cov()`.
+    """
+    if min_periods is None:
+        min_periods = ventana
+    covarianza, _, _ = _momentos_pares(como_matriz(df), ventana, min_periods)
+    return _formato_largo(covarianza, df)
+
+
+def matriz_correlacion_movil(df, ventana, min_periods=None):
+    """Calcula la matriz de correlación móvil entre todas las columnas.
+
+    Devuelve un DataFrame con índice (fecha, columna) igual que
+    `df.rolling(ventana).corr()`. Usar `.xs(columna, level=1)` para obtener
+    la correlación de una columna contra las demás.
+    """
+    if min_periods is None:
+        min_periods = ventana
+    correlacion = _correlacion_pares(como_matriz(df), ventana, min_periods)
+    return _formato_largo(correlacion, df)
@@ -0,0 +1,266 @@
+"""
+MEDIANA, CUANTILES, IQR Y MAD EN VENTANA MÓVIL
+Sesión 12: Series Temporales en Pandas
+
+`rolling().median()` y `rolling().quantile()` mantienen una estructura
+ordenada por columna y por estadística: pedir cinco cuantiles de tres
+ventanas para muchos pozos recorre los datos quince veces por columna, y
+pandas no tiene MAD móvil (con `apply` se ordena cada ventana en Python).
+
+Aquí la serie se corta en segmentos de 2·ventana filas que se solapan en
+una ventana; cada segmento contiene completas las ventanas que terminan en
+su segunda mitad. Cada segmento se ordena una vez y se guarda como una
+matriz wavelet sobre los rangos: con ella el k-ésimo menor de cualquier
+tramo del segmento se obtiene bajando un nivel por bit del rango, O(log w)
+por consulta. Todos los segmentos de todas las columnas se procesan juntos
+con NumPy, y una misma matriz sirve para todos los cuantiles pedidos.
+
+Los NaN se ordenan al final, así que el k-ésimo menor de una ventana con c
+valores válidos (k < c) nunca es un NaN. El MAD (mediana de |x - mediana|)
+se resuelve como el k-ésimo de la unión de dos secuencias ordenadas: las
+distancias de los valores por debajo y por encima de la mediana.
+
+Uso:
+    cuantiles_moviles(df_parametros[['caudal_bpd']], [0.05, 'median', 0.95, 'iqr', 'mad'], [28, 120])
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import BLOQUE, como_matriz
+
+# Estadísticas de orden con nombre; además se acepta cualquier cuantil en [0, 1]
+ESTADISTICAS_ORDEN = ('median', 'iqr', 'mad')
+
+
+def _construir_wavelet(rangos):
+    """Matrices wavelet de varias permutaciones a la vez, una por fila de `rangos`.
+
+    Devuelve (ceros, totales): `ceros[nivel]` es una matriz (filas, largo +
+    1) aplanada donde la posición i de cada fila dice cuántos de los
+    primeros i elementos del nivel tienen el bit en 0, y `totales[nivel]`
+    (filas, 1) cuántos lo tienen en toda la fila. El nivel 0 corresponde al
+    bit más alto.
+    """
+    filas, largo = rangos.shape
+    niveles = max(int(largo - 1).bit_length(), 1)
+    ceros = np.zeros((niveles, filas, largo + 1), dtype=np.int32)
+    totales = np.empty((niveles, filas, 1), dtype=np.int32)
+    desplazamiento = (np.arange(filas, dtype=np.int32) * largo)[:, None]
+    posiciones = np.arange(largo, dtype=np.int32)
+    actual = rangos
+    for nivel in range(niveles):
+        es_cero = ((actual >> (niveles - 1 - nivel)) & 1) == 0
+        acumulado = ceros[nivel, :, 1:]
+        np.cumsum(es_cero, axis=1, out=acumulado)
+        totales[nivel] = acumulado[:, -1:]
+        # Partición estable de cada fila: primero los ceros, después los unos
+        destino = np.where(es_cero, acumulado - 1, totales[nivel] + posiciones - acumulado)
+        siguiente = np.empty_like(actual)
+        siguiente.ravel()[(desplazamiento + destino).ravel()] = actual.ravel()
+        actual = siguiente
+    return ceros.reshape(niveles, -1), totales
+
+
+def _k_esimo(ceros, totales, inicio_fila, izquierda, derecha, k):
+    """Rango del k-ésimo menor (desde 0) de cada tramo [izquierda, derecha) de su fila.
+
+    `izquierda` y `derecha` son posiciones en las filas aplanadas de `ceros`
+    (`inicio_fila` + columna).
+    """
+    rango = np.zeros(k.shape, dtype=np.int32)
+    for nivel in range(len(totales)):
+        ceros_izquierda = ceros[nivel][izquierda]
+        ceros_derecha = ceros[nivel][derecha]
+        en_ceros = ceros_derecha - ceros_izquierda
+        uno = k >= en_ceros
+        rango = (rango << 1) | uno
+        k = np.where(uno, k - en_ceros, k)
+        izquierda = np.where(uno, izquierda + (totales[nivel] - ceros_izquierda), inicio_fila + ceros_izquierda)
+        derecha = np.where(uno, derecha + (totales[nivel] - ceros_derecha), inicio_fila + ceros_derecha)
+    return rango
+
+
+class _Consultas:
+    """k-ésimos de las ventanas de un grupo de segmentos, en las unidades de los valores"""
+
+    def __init__(self, ordenados, ceros, totales, izquierda, derecha, conteo):
+        filas, largo = ordenados.shape
+        self.ordenados = ordenados.ravel()
+        self.inicio_ordenados = (np.arange(filas, dtype=np.int32) * largo)[:, None]
+        self.ceros = ceros
+        self.totales = totales
+        # Posiciones en las filas aplanadas de las matrices wavelet
+        self.inicio_fila = (np.arange(filas, dtype=np.int32) * (largo + 1))[:, None]
+        self.izquierda = self.inicio_fila + izquierda
+        self.derecha = self.inicio_fila + derecha
+        self.conteo = conteo
+        self._tope = np.maximum(conteo - 1, 0)
+
+    def valor(self, posicion):
+        """Valor en la posición `posicion` de cada ventana ordenada (se recorta a las válidas)"""
+        posicion = np.clip(posicion, 0, self._tope)
+        rango = _k_esimo(self.ceros, self.totales, self.inicio_fila, self.izquierda, self.derecha, posicion)
+        return self.ordenados[self.inicio_ordenados + rango]
+
+    def cuantil(self, q):
+        """Cuantil con interpolación lineal, como `rolling().quantile(q)`"""
+        posicion = q * (self.conteo - 1)
+        abajo = np.floor(posicion).astype(np.int32)
+        fraccion = posicion - abajo
+        bajo = self.valor(abajo)
+        if not (fraccion > 0).any():
+            return bajo
+        alto = self.valor(abajo + 1)
+        return np.where(fraccion > 0, bajo + (alto - bajo) * fraccion, bajo)
+
+    def mediana(self):
+        """Mediana con el promedio de los dos centrales, como `rolling().median()`"""
+        bajo = self.valor((self.conteo - 1) // 2)
+        impares = self.conteo % 2 == 1
+        if impares.all():
+            return bajo
+        alto = self.valor(self.conteo // 2)
+        return np.where(impares, bajo, (bajo + alto) / 2)
+
+    def mad(self, mediana, pasos):
+        """Mediana de |x - mediana| de cada ventana"""
+        # Los c // 2 menores quedan debajo de la mediana y el resto encima;
+        # en cada lado las distancias crecen al alejarse de la mediana
+        debajo = self.conteo // 2
+        encima = self.conteo - debajo
+
+        def distancia_debajo(a):
+            return mediana - self.valor(debajo - 1 - a)
+
+        def distancia_encima(b):
+            return self.valor(debajo + b) - mediana
+
+        def t_esima(t):
+            # Cuántas de las t + 1 menores distancias vienen de abajo
+            bajo = np.maximum(t + 1 - encima, 0)
+            alto = np.minimum(t + 1, debajo)
+            for _ in range(pasos):
+                activo = bajo < alto
+                if not activo.any():
+                    break
+                medio = (bajo + alto) // 2
+                mas_de_abajo = activo & (distancia_debajo(medio) < distancia_encima(t - medio))
+                bajo = np.where(mas_de_abajo, medio + 1, bajo)
+                alto = np.where(activo & ~mas_de_abajo, medio, alto)
+            de_abajo = np.where(bajo > 0, distancia_debajo(bajo - 1), -np.inf)
+            de_encima = np.where(t + 1 - bajo > 0, distancia_encima(t - bajo), -np.inf)
+            return np.maximum(de_abajo, de_encima)
+
+        bajo = t_esima((self.conteo - 1) // 2)
+        alto = t_esima(self.conteo // 2)
+        return np.where(self.conteo % 2 == 1, bajo, (bajo + alto) / 2)
+
+
+def _cuantiles_ventana(valores, cuantiles, ventana, min_periods):
+    """Estadísticas de orden de una ventana; arreglo (cuantiles, columnas, filas)"""
+    k, n = valores.shape
+    # El segmento j cubre las filas [(j - 1)·ventana, (j + 1)·ventana): ahí
+    # caben completas las ventanas que terminan entre j·ventana y
+    # (j + 1)·ventana - 1. Las filas anteriores a la 0 y posteriores a la
+    # última son NaN, que no cuentan como válidas.
+    segmentos = -(-n // ventana)
+    largo = 2 * ventana
+    relleno = np.full((k, (segmentos + 1) * ventana), np.nan)
+    relleno[:, ventana:ventana + n] = valores
+    validos = np.zeros((k, relleno.shape[1] + 1), dtype=np.int32)
+    np.cumsum(~np.isnan(relleno), axis=1, out=validos[:, 1:])
+    conteo_total = (validos[:, ventana + 1:] - validos[:, 1:-ventana]).reshape(k * segmentos, ventana)
+
+    minimo = min_periods if min_periods is not None else ventana
+    pasos = int(ventana).bit_length() + 1
+    izquierda_base = np.arange(1, ventana + 1, dtype=np.int32)[None, :]
+    salida = np.full((len(cuantiles), k * segmentos, ventana), np.nan)
+    # Segmentos por grupo para que cada grupo tenga unos BLOQUE valores
+    por_grupo = max(BLOQUE // largo, 1)
+
+    for desde in range(0, k * segmentos, por_grupo):
+        hasta = min(desde + por_grupo, k * segmentos)
+        ids = np.arange(desde, hasta)
+        columna, segmento = np.divmod(ids, segmentos)
+        grupo = relleno[columna[:, None], segmento[:, None] * ventana + np.arange(largo)]
+
+        orden = np.argsort(grupo, axis=1)
+        rangos = np.empty(orden.shape, dtype=np.int32)
+        np.put_along_axis(rangos, orden, np.arange(largo, dtype=np.int32)[None, :], axis=1)
+        ceros, totales = _construir_wavelet(rangos)
+        ordenados = np.take_along_axis(grupo, orden, axis=1)
+
+        izquierda = np.broadcast_to(izquierda_base, (len(ids), ventana))
+        conteo = conteo_total[desde:hasta]
+        consultas = _Consultas(ordenados, ceros, totales, izquierda, izquierda + ventana, conteo)
+        suficientes = conteo >= max(minimo, 1)
+
+        calculados = {}
+        for e, cuantil in enumerate(cuantiles):
+            if cuantil in ('median', 'mad') and 'median' not in calculados:
+                calculados['median'] = consultas.mediana()
+            if cuantil == 'median':
+                valor = calculados['median']
+            elif cuantil == 'iqr':
+                valor = consultas.cuantil(0.75) - consultas.cuantil(0.25)
+            elif cuantil == 'mad':
+                valor = consultas.mad(calculados['median'], pasos)
+            else:
+                valor = consultas.cuantil(float(cuantil))
+            np.copyto(salida[e, desde:hasta], valor, where=suficientes)
+
+    return salida.reshape(len(cuantiles), k, segmentos * ventana)[:, :, :n]
+
+
+def _cuantiles_matriz(valores, cuantiles, ventanas, min_periods):
+    """Calcula cada estadística de orden para cada ventana.
+
+    Recibe una matriz (columnas, filas) y devuelve un arreglo (columnas,
+    cuantiles, ventanas, filas), con la misma disposición que
+    `_estadisticas_matriz`.
+    """
+    k, n = valores.shape
+    resultados = np.full((k, len(cuantiles), len(ventanas), n), np.nan)
+    if n == 0:
+        return resultados
+    for v, ventana in enumerate(ventanas):
+        resultados[:, :, v] = _cuantiles_ventana(valores, cuantiles, ventana, min_periods).transpose(1, 0, 2)
+    return resultados
+
+
+def _validar_cuantiles(cuantiles):
+    """Verifica que cada cuantil sea un nombre conocido o un número en [0, 1]"""
+    for cuantil in cuantiles:
+        if isinstance(cuantil, str):
+            if cuantil not in ESTADISTICAS_ORDEN:
+                raise ValueError(f"Estadística de orden no soportada: {cuantil}")
+        elif not 0 <= cuantil <= 1:
+            raise ValueError(f"El cuantil debe estar entre 0 y 1: {cuantil}")
+
+
+def cuantiles_moviles(df, cuantiles=('median',), ventanas=(28,), min_periods=None):
+    """Mediana, cuantiles, IQR y MAD móviles para varias columnas y ventanas.
+
+    `cuantiles` mezcla números en [0, 1] (interpolación lineal, como
+    `rolling().quantile`) con 'median', 'iqr' (q75 - q25) y 'mad' (mediana
+    de las desviaciones absolutas a la mediana). Devuelve un DataFrame con
+    columnas MultiIndex (columna, cuantil, ventana); con `min_periods=None`
+    cada ventana exige estar completa, igual que `rolling(window=ventana)`.
+
+    Ejemplo:
+        bandas = cuantiles_moviles(df[['caudal_bpd']], [0.05, 0.95], [28])
+        bandas[('caudal_bpd', 0.95, 28)]
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    cuantiles = list(cuantiles)
+    ventanas = list(ventanas)
+    _validar_cuantiles(cuantiles)
+
+    valores = np.ascontiguousarray(como_matriz(df).T)
+    resultados = _cuantiles_matriz(valores, cuantiles, ventanas, min_periods)
+    columnas = pd.MultiIndex.from_tuples(
+        [(columna, cuantil, ventana) for columna in df.columns for cuantil in cuantiles for ventana in ventanas],
+        names=['columna', 'cuantil', 'ventana'])
+    return pd.DataFrame(resultados.reshape(len(columnas), -1).T, index=df.index, columns=columnas, copy=False)
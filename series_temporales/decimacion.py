@@ -0,0 +1,153 @@
+"""
+DECIMACIÓN DE SERIES PARA GRÁFICOS (MIN-MAX POR PÍXEL Y LTTB)
+Sesión 12: Series Temporales en Pandas
+
+Los gráficos de sensores pasan cada lectura de 15 minutos a `axes.plot`:
+con un año de varios sensores son millones de puntos para un eje de unos
+cientos de píxeles de ancho. Dibujarlos tarda minutos y las figuras
+vectoriales pesan decenas de megabytes, sin que se vea ninguna diferencia.
+Aquí cada serie se reduce a un presupuesto de puntos según el ancho del eje:
+
+- 'minmax': divide el rango de tiempo en una cubeta por píxel y conserva la
+  primera, la última, la mínima y la máxima lectura de cada una. La línea
+  dibujada es la misma que con todos los puntos: los picos no se pierden.
+- 'lttb': Largest-Triangle-Three-Buckets; conserva en cada cubeta el punto
+  que forma el triángulo de mayor área con el anterior elegido y el
+  promedio de la cubeta siguiente. Da líneas más limpias con menos puntos.
+
+En ambos métodos se conservan además las posiciones de `conservar` (por
+ejemplo las anomalías marcadas) y el comienzo de cada tramo de NaN, para
+que los huecos sigan cortando la línea.
+
+Uso:
+    reducida = decimar(df_sensores['valor'], 2000, metodo='lttb')
+    graficar_serie(axes[0, 0], df_sensores['valor'], 'b-', linewidth=0.5)
+"""
+
+import numpy as np
+import pandas as pd
+
+METODOS = ('minmax', 'lttb')
+
+# minmax conserva hasta 4 puntos por cubeta y usa una cubeta por píxel
+PUNTOS_POR_PIXEL = {'minmax': 4, 'lttb': 2}
+
+
+def _primero_por_cubeta(posiciones, cubeta):
+    """Primera posición de cada cubeta presente en `posiciones` (ordenadas)"""
+    if len(posiciones) == 0:
+        return posiciones
+    cubetas = cubeta[posiciones]
+    return posiciones[np.r_[True, cubetas[1:] != cubetas[:-1]]]
+
+
+def minmax(x, y, cubetas):
+    """Posiciones de la primera, última, mínima y máxima lectura de cada cubeta de `x`.
+
+    `x` debe estar ordenado; las cubetas tienen el mismo ancho en `x` (un
+    píxel), así que una cubeta sin lecturas no aporta puntos.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    bordes = np.linspace(x[0], x[-1], int(cubetas) + 1)[1:-1]
+    inicios = np.unique(np.r_[0, np.searchsorted(x, bordes, side='left')])
+    inicios = inicios[inicios < n]
+    largos = np.diff(np.r_[inicios, n])
+    cubeta = np.repeat(np.arange(len(inicios)), largos)
+
+    elegidas = [inicios, np.r_[inicios[1:], n] - 1]
+    with np.errstate(invalid='ignore'):
+        for reduccion in (np.fmin, np.fmax):
+            extremo = reduccion.reduceat(y, inicios)
+            elegidas.append(_primero_por_cubeta(np.flatnonzero(y == extremo[cubeta]), cubeta))
+    return np.unique(np.concatenate(elegidas))
+
+
+def lttb(x, y, puntos):
+    """Posiciones elegidas por Largest-Triangle-Three-Buckets (exactamente `puntos` si hay más).
+
+    `x` debe estar ordenado y sin NaN en `y`. El primer y el último punto
+    siempre se conservan; los demás salen uno por cubeta de igual cantidad
+    de lecturas.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    puntos = int(puntos)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(np.int64)
+    # Promedio de cada cubeta (más el último punto como cubeta final) para el tercer vértice
+    sumas_x = np.add.reduceat(x[:n - 1], bordes[:-1])
+    sumas_y = np.add.reduceat(y[:n - 1], bordes[:-1])
+    largos = np.diff(bordes)
+    promedio_x = np.r_[sumas_x[1:] / largos[1:], x[-1]]
+    promedio_y = np.r_[sumas_y[1:] / largos[1:], y[-1]]
+
+    elegidas = np.empty(puntos, dtype=np.int64)
+    elegidas[0], elegidas[-1] = 0, n - 1
+    anterior = 0
+    for k in range(puntos - 2):
+        desde, hasta = bordes[k], bordes[k + 1]
+        ax, ay = x[anterior], y[anterior]
+        area = np.abs((ax - promedio_x[k]) * (y[desde:hasta] - ay) - (ax - x[desde:hasta]) * (promedio_y[k] - ay))
+        anterior = desde + int(np.argmax(area))
+        elegidas[k + 1] = anterior
+    return elegidas
+
+
+def decimar(serie, puntos, metodo='minmax', conservar=None):
+    """Serie reducida a unos `puntos` lecturas conservando su forma, picos y huecos.
+
+    `serie` es una Serie ordenable por su índice (fechas o números);
+    `conservar` es una máscara booleana alineada con ella de lecturas que
+    no se pueden descartar. Devuelve la Serie original si ya tiene
+    `puntos` lecturas o menos.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método no soportado: {metodo}; use uno de {METODOS}")
+    if len(serie) <= puntos:
+        return serie
+    if not serie.index.is_monotonic_increasing:
+        orden = np.argsort(np.asarray(serie.index), kind='stable')
+        serie = serie.iloc[orden]
+        if conservar is not None:
+            conservar = np.asarray(conservar, dtype=bool)[orden]
+
+    indice = serie.index
+    x = indice.asi8 if isinstance(indice, pd.DatetimeIndex) else np.asarray(indice, dtype=np.float64)
+    x = np.asarray(x - x[0], dtype=np.float64)
+    y = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    nulos = np.isnan(y)
+
+    if metodo == 'minmax':
+        elegidas = minmax(x, y, max(puntos // 4, 1))
+    else:
+        validas = np.flatnonzero(~nulos)
+        elegidas = validas[lttb(x[validas], y[validas], puntos)]
+    # El comienzo de cada tramo de NaN mantiene el corte de la línea
+    extras = [elegidas, np.flatnonzero(nulos & ~np.r_[False, nulos[:-1]])]
+    if conservar is not None:
+        extras.append(np.flatnonzero(np.asarray(conservar, dtype=bool)))
+    return serie.iloc[np.unique(np.concatenate(extras))]
+
+
+def presupuesto(ax, metodo='minmax'):
+    """Puntos a dibujar en el eje `ax` según su ancho en píxeles"""
+    figura = ax.figure
+    ancho = ax.get_position().width * figura.get_figwidth() * figura.dpi
+    return max(int(ancho * PUNTOS_POR_PIXEL[metodo]), 16)
+
+
+def graficar_serie(ax, serie, *args, metodo='minmax', conservar=None, puntos=None, **kwargs):
+    """`ax.plot(serie.index, serie, ...)` con la serie decimada al ancho del eje.
+
+    `puntos` fija el presupuesto en vez de calcularlo con `presupuesto`;
+    los demás argumentos pasan sin cambios a `ax.plot`.
+    """
+    reducida = decimar(serie, puntos or presupuesto(ax, metodo), metodo, conservar)
+    return ax.plot(reducida.index, reducida.to_numpy(), *args, **kwargs)
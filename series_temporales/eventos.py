@@ -0,0 +1,134 @@
+"""
+CRUCE DE EVENTOS OPERACIONALES CON MUESTRAS POR INTERVALO
+Sesión 12: Series Temporales en Pandas
+
+Cada evento operacional ocupa el intervalo [fecha_evento, fecha_evento +
+duracion_horas) de su pozo. Sumar los eventos por día y concatenarlos con
+la producción diaria pierde esa duración; este módulo marca cada muestra de
+producción o de sensores con los eventos que estaban activos en su pozo.
+
+Las muestras se ordenan por (pozo, fecha) y dos `searchsorted` sobre la
+clave (pozo, fecha) dan, para todos los eventos a la vez, el tramo de
+muestras que cubre cada uno. Los pares (muestra,
+evento) salen de expandir esos tramos, así que los eventos solapados se
+resuelven sin recorrer fila por fila: el costo es O((muestras + eventos)
+log muestras + pares).
+
+Uso:
+    pares = unir_eventos(df_produccion, df_eventos)
+    marcadas = marcar_eventos(df_sensores, df_eventos, columnas=['tipo_evento'])
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales.grupos import buscar_por_grupo, limites_grupos, ordenar_por_grupo
+
+
+def _ordenar_muestras(muestras, columna_grupo):
+    """Ordena las muestras; devuelve (ordenadas, límites de grupo, nombres de grupo, orden)"""
+    if columna_grupo is None:
+        orden = None if muestras.index.is_monotonic_increasing else np.argsort(muestras.index.asi8, kind='stable')
+        ordenadas = muestras if orden is None else muestras.iloc[orden]
+        return ordenadas, np.array([0, len(muestras)]), None, orden
+    ordenadas, codigos, orden = ordenar_por_grupo(muestras, columna_grupo)
+    inicios = limites_grupos(codigos)
+    nombres = pd.Index(np.asarray(ordenadas[columna_grupo].iloc[inicios]))
+    return ordenadas, np.r_[inicios, len(ordenadas)], nombres, orden
+
+
+def _intervalos(eventos, columna_duracion, unidad, unidad_indice):
+    """Inicio y fin de cada evento como enteros en la unidad del índice de las muestras"""
+    inicio = eventos.index.as_unit(unidad_indice).asi8
+    factor = pd.Timedelta(1, unit=unidad) / pd.Timedelta(1, unit=unidad_indice)
+    duracion = eventos[columna_duracion].to_numpy(dtype=np.float64) * factor
+    validos = ~np.isnan(duracion)
+    fin = inicio + np.where(validos, np.round(duracion), 0).astype(np.int64)
+    return inicio, fin, validos
+
+
+def _pares(muestras, eventos, columna_grupo, columna_duracion, unidad):
+    """Posiciones (muestra, evento) de cada muestra dentro del intervalo de un evento.
+
+    Devuelve (muestra, rango, orden_eventos, inicio, fin). Los pares salen
+    agrupados por evento; `rango` es la posición del evento en
+    `orden_eventos`, el orden por (grupo, inicio), así que dentro de un
+    grupo un rango mayor es un evento que empezó más tarde.
+    """
+    ordenadas, limites, nombres, orden = _ordenar_muestras(muestras, columna_grupo)
+    tiempos = ordenadas.index.asi8
+    inicio, fin, validos = _intervalos(eventos, columna_duracion, unidad, ordenadas.index.unit)
+    if columna_grupo is None:
+        grupo = np.where(validos, 0, -1)
+    else:
+        grupo = np.where(validos, nombres.get_indexer(np.asarray(eventos[columna_grupo])), -1)
+
+    # Eventos ordenados por (grupo, inicio): cada grupo es un tramo contiguo
+    orden_eventos = np.lexsort((inicio, grupo))
+    orden_eventos = orden_eventos[grupo[orden_eventos] >= 0]
+    # Tramo de muestras de cada evento, buscado dentro de su grupo
+    grupo_muestra = np.repeat(np.arange(len(limites) - 1), np.diff(limites))
+    grupo_ordenado = grupo[orden_eventos]
+    desde, hasta = buscar_por_grupo(grupo_muestra, tiempos, np.tile(grupo_ordenado, 2),
+                                    np.r_[inicio[orden_eventos], fin[orden_eventos]], side='left').reshape(2, -1)
+
+    largos = hasta - desde
+    total = int(largos.sum())
+    rango = np.repeat(np.arange(len(orden_eventos)), largos)
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(largos) - largos, largos)
+    muestra = np.repeat(desde, largos) + desplazamiento
+    if orden is not None:
+        muestra = orden[muestra]
+    return muestra, rango, orden_eventos, inicio, fin
+
+
+def unir_eventos(muestras, eventos, columna_grupo='pozo_id', columna_duracion='duracion_horas', unidad='h',
+                 columnas=None):
+    """Une cada muestra con los eventos activos de su grupo (intervalo [inicio, fin)).
+
+    Devuelve un DataFrame con una fila por par (muestra, evento), indexado
+    por la fecha de la muestra: 'muestra' y 'evento' son las posiciones en
+    `muestras` y `eventos`, 'inicio_evento' y 'fin_evento' delimitan el
+    intervalo, y se agregan las `columnas` de los eventos (todas por
+    defecto). Una muestra con eventos solapados aparece una vez por evento;
+    las muestras sin eventos no aparecen.
+    """
+    muestra, rango, orden_eventos, inicio, fin = _pares(muestras, eventos, columna_grupo, columna_duracion, unidad)
+    # El orden estable conserva, para cada muestra, el orden por inicio del evento
+    por_muestra = np.argsort(muestra, kind='stable')
+    muestra, evento = muestra[por_muestra], orden_eventos[rango[por_muestra]]
+    unidad_indice = muestras.index.unit
+    if columnas is None:
+        columnas = list(eventos.columns)
+    pares = pd.DataFrame({
+        'muestra': muestra,
+        'evento': evento,
+        'inicio_evento': pd.DatetimeIndex(inicio[evento].view(f'M8[{unidad_indice}]')),
+        'fin_evento': pd.DatetimeIndex(fin[evento].view(f'M8[{unidad_indice}]')),
+    }, index=muestras.index[muestra])
+    for columna in columnas:
+        pares[columna] = eventos[columna].array.take(evento)
+    return pares
+
+
+def marcar_eventos(muestras, eventos, columna_grupo='pozo_id', columna_duracion='duracion_horas', unidad='h',
+                   columnas=('tipo_evento',)):
+    """Copia de `muestras` con los eventos activos en cada fila.
+
+    Agrega 'eventos_activos' (cantidad de eventos cuyo intervalo contiene a
+    la muestra) y cada una de `columnas` tomada del evento activo que
+    empezó último; las muestras sin eventos quedan en NaN.
+    """
+    muestra, rango, orden_eventos, _, _ = _pares(muestras, eventos, columna_grupo, columna_duracion, unidad)
+    marcadas = muestras.copy()
+    marcadas['eventos_activos'] = np.bincount(muestra, minlength=len(muestras))
+
+    # Todos los eventos de una muestra son de su grupo: el de mayor rango es el último en empezar
+    ultimo_rango = np.full(len(muestras), -1, dtype=np.int64)
+    np.maximum.at(ultimo_rango, muestra, rango)
+    ultimo_evento = np.where(ultimo_rango >= 0, orden_eventos[np.maximum(ultimo_rango, 0)], -1) \
+        if len(orden_eventos) else ultimo_rango
+    for columna in columnas:
+        valores = eventos[columna].reset_index(drop=True).reindex(ultimo_evento)
+        marcadas[columna] = valores.array
+    return marcadas
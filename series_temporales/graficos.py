@@ -0,0 +1,119 @@
+"""
+GRÁFICOS DIFERIDOS Y MODO SIN PANTALLA
+Sesión 12: Series Temporales en Pandas
+
+Los scripts importan `matplotlib.pyplot` al comienzo y terminan con
+`plt.show()`: la importación cuesta más que la de pandas y `show()` bloquea
+la ejecución, así que en corridas por lotes la mayor parte del tiempo se va
+en gráficos que nadie mira. Aquí pyplot se importa recién cuando se pide
+una figura, y el modo decide qué hacer con ella:
+
+- 'mostrar': comportamiento interactivo de siempre (`plt.show()`).
+- 'guardar': backend no interactivo (Agg) y la figura se escribe como
+  PNG, SVG o PDF en una carpeta.
+- 'omitir': no se dibuja nada y pyplot nunca se importa.
+
+El modo se elige con `configurar` o con la variable de entorno
+SERIES_TEMPORALES_GRAFICOS ('mostrar', 'omitir', 'guardar', 'png', 'svg',
+'pdf'); la carpeta, con SERIES_TEMPORALES_GRAFICOS_CARPETA ('graficos' por
+defecto).
+
+Uso:
+    if graficos.activos():
+        plt = graficos.pyplot()
+        fig, axes = plt.subplots(2, 2)
+        ...
+        graficos.mostrar(fig, 'produccion')
+
+Desde la línea de comandos:
+    SERIES_TEMPORALES_GRAFICOS=omitir python demos/demo_series_temporales.py
+    SERIES_TEMPORALES_GRAFICOS=svg python soluciones/lab_01_manipulacion_temporal.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+MODOS = ('mostrar', 'guardar', 'omitir')
+FORMATOS = ('png', 'svg', 'pdf')
+VARIABLE_MODO = 'SERIES_TEMPORALES_GRAFICOS'
+VARIABLE_CARPETA = 'SERIES_TEMPORALES_GRAFICOS_CARPETA'
+
+_configuracion = {}
+
+
+def _desde_entorno():
+    """Modo, formato y carpeta de las variables de entorno"""
+    valor = os.environ.get(VARIABLE_MODO, 'mostrar').strip().lower() or 'mostrar'
+    formato = 'png'
+    if valor in FORMATOS:
+        valor, formato = 'guardar', valor
+    if valor not in MODOS:
+        raise ValueError(f"{VARIABLE_MODO}={valor!r} no es válido; use uno de {MODOS + FORMATOS}")
+    return {'modo': valor, 'formato': formato, 'carpeta': os.environ.get(VARIABLE_CARPETA, 'graficos')}
+
+
+def configurar(modo=None, formato=None, carpeta=None):
+    """Fija el modo ('mostrar', 'guardar', 'omitir'), el formato y la carpeta de las figuras.
+
+    Los valores omitidos se toman de las variables de entorno. Debe
+    llamarse antes de la primera figura: el backend de matplotlib se elige
+    una sola vez al importar pyplot.
+    """
+    actual = _desde_entorno()
+    if modo in FORMATOS:
+        modo, formato = 'guardar', formato or modo
+    if modo is not None and modo not in MODOS:
+        raise ValueError(f"Modo no soportado: {modo}; use uno de {MODOS}")
+    if formato is not None and formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}; use uno de {FORMATOS}")
+    _configuracion.clear()
+    _configuracion.update({
+        'modo': modo or actual['modo'],
+        'formato': formato or actual['formato'],
+        'carpeta': carpeta or actual['carpeta'],
+    })
+    return dict(_configuracion)
+
+
+def configuracion():
+    """Configuración vigente: la de `configurar` o, si no se llamó, la de las variables de entorno"""
+    if not _configuracion:
+        _configuracion.update(_desde_entorno())
+    return dict(_configuracion)
+
+
+def activos():
+    """True si hay que dibujar (modos 'mostrar' y 'guardar')"""
+    return configuracion()['modo'] != 'omitir'
+
+
+def pyplot():
+    """Importa `matplotlib.pyplot` la primera vez que se pide, con Agg fuera del modo 'mostrar'"""
+    if 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        if configuracion()['modo'] != 'mostrar':
+            matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def mostrar(fig, nombre):
+    """Muestra, guarda u omite la figura según el modo; devuelve la ruta si se guardó.
+
+    En el modo 'guardar' la figura se escribe como `<carpeta>/<nombre>.<formato>`
+    y se cierra para liberar su memoria.
+    """
+    config = configuracion()
+    if config['modo'] == 'mostrar':
+        pyplot().show()
+        return None
+    ruta = None
+    if config['modo'] == 'guardar':
+        carpeta = Path(config['carpeta'])
+        carpeta.mkdir(parents=True, exist_ok=True)
+        ruta = carpeta / f"{nombre}.{config['formato']}"
+        fig.savefig(ruta, bbox_inches='tight')
+    if fig is not None and 'matplotlib.pyplot' in sys.modules:
+        pyplot().close(fig)
+    return ruta
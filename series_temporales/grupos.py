@@ -0,0 +1,262 @@
+"""
+VENTANAS Y RESAMPLING POR POZO
+Sesión 12: Series Temporales en Pandas
+
+Con varios pozos (o sensores) en el mismo DataFrame, `rolling` y `resample`
+mezclan las series. Este módulo calcula ambas operaciones por grupo sobre el
+formato largo ordenado por (grupo, fecha), usando los límites de cada
+segmento en lugar de recorrer `groupby` con un ciclo de Python:
+
+- Ventanas móviles: antes de cada grupo se intercalan ventana - 1 filas
+  vacías, así ninguna ventana cruza al grupo anterior y se reutiliza el
+  cálculo de `ventanas.py` sobre todas las filas a la vez.
+- Resampling: cada fila recibe el código de su intervalo y los agregados
+  se calculan con `reduceat` sobre los segmentos (grupo, intervalo).
+
+El costo es lineal en el número de filas más (ventana - 1) por grupo.
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import como_matriz
+from series_temporales.ventanas import ESTADISTICAS, _estadisticas_matriz
+
+AGREGADOS_GRUPO = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max', 'first', 'last')
+
+# Estadísticas que se calculan sobre valores centrados en la media del grupo
+_CENTRADAS = {'sum', 'mean', 'var', 'std'}
+
+# Agregados que conservan el tipo de una columna entera si no hay intervalos
+# vacíos; la suma de enteros siempre queda en int64
+_CONSERVAN_TIPO = ('min', 'max', 'first', 'last')
+
+
+def ordenar_por_grupo(df, columna_grupo):
+    """Devuelve (df ordenado por grupo y fecha, códigos de grupo, orden aplicado).
+
+    `orden` es None si el DataFrame ya estaba ordenado.
+    """
+    codigos, _ = pd.factorize(df[columna_grupo], sort=True)
+    tiempos = df.index.to_numpy()
+    ordenado = bool(np.all(codigos[1:] >= codigos[:-1])) and bool(
+        np.all((tiempos[1:] >= tiempos[:-1]) | (codigos[1:] != codigos[:-1])))
+    if ordenado:
+        return df, codigos, None
+    orden = np.lexsort((tiempos, codigos))
+    return df.iloc[orden], codigos[orden], orden
+
+
+def limites_grupos(codigos):
+    """Posición de inicio de cada grupo en un arreglo de códigos ordenado"""
+    return np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+
+
+def buscar_por_grupo(codigos, tiempos, codigos_buscados, buscados, side='left'):
+    """Como `np.searchsorted(tiempos, buscados, side)`, pero dentro del grupo de cada valor buscado.
+
+    `codigos` y `tiempos` (enteros) son los de filas ordenadas por (grupo,
+    tiempo). Devuelve posiciones globales: un valor anterior a todo su
+    grupo da el inicio del grupo y uno posterior, su fin. Una sola búsqueda
+    sobre la clave int64 (código, tiempo) reemplaza el ciclo por grupo.
+
+    Para que la clave no desborde con miles de grupos y fechas en
+    nanosegundos, el tiempo se mide en pasos del máximo común divisor de
+    las diferencias (15 minutos en los sensores); si aun así desborda se
+    usa la posición entre los tiempos distintos.
+    """
+    tiempos = np.asarray(tiempos, dtype=np.int64)
+    buscados = np.asarray(buscados, dtype=np.int64)
+    codigos = codigos.astype(np.int64) + 1
+    codigos_buscados = np.asarray(codigos_buscados, dtype=np.int64) + 1
+    if len(tiempos) == 0:
+        return np.zeros(len(buscados), dtype=np.int64)
+
+    minimo, maximo = int(tiempos.min()), int(tiempos.max())
+    unidad = max(int(np.gcd.reduce(tiempos - minimo)), 1)
+    paso = (maximo - minimo) // unidad + 3
+    if (int(codigos.max()) + 1) * paso < 2 ** 62:
+        posicion = (tiempos - minimo) // unidad + 1
+        # Los buscados fuera del rango se recortan a un tiempo antes o
+        # después de todas las filas, sin pasar al grupo vecino
+        desplazados = np.clip(buscados, minimo - 1, maximo + 1) - minimo
+        if side == 'left':
+            umbral = -(-desplazados // unidad) + 1
+        else:
+            umbral = desplazados // unidad + 2
+    else:
+        unicos, posicion = np.unique(tiempos, return_inverse=True)
+        paso = len(unicos) + 1
+        # Tiempos distintos antes del buscado: con 'left' los menores, con 'right' los menores o iguales
+        umbral = np.searchsorted(unicos, buscados, side=side)
+    return np.searchsorted(codigos * paso + posicion.ravel(), codigos_buscados * paso + umbral, side='left')
+
+
+def _medias_por_grupo(valores, inicios):
+    """Media de cada columna por grupo ignorando NaN; matriz (columnas, grupos)"""
+    validos = ~np.isnan(valores)
+    sumas = np.add.reduceat(np.where(validos, valores, 0.0), inicios, axis=1)
+    conteos = np.add.reduceat(validos, inicios, axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.where(conteos > 0, sumas / np.maximum(conteos, 1), 0.0)
+
+
+def estadisticas_moviles_por_grupo(df, columna_grupo, estadisticas=('mean', 'std', 'min', 'max'),
+                                   ventanas=(28,), columnas=None, min_periods=None):
+    """Estadísticas móviles por grupo, como `df.groupby(grupo)[columnas].rolling(ventana)`.
+
+    Devuelve un DataFrame alineado con las filas de `df` (en su orden
+    original) y columnas MultiIndex (columna, estadistica, ventana), igual
+    que `estadisticas_moviles`. Dentro de cada grupo las filas se toman en
+    orden de fecha.
+    """
+    estadisticas = list(estadisticas)
+    ventanas = list(ventanas)
+    desconocidas = set(estadisticas) - set(ESTADISTICAS)
+    if desconocidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(desconocidas)}")
+    if columnas is None:
+        columnas = [columna for columna in df.select_dtypes('number').columns if columna != columna_grupo]
+    columnas = list(columnas)
+
+    ordenado, codigos, orden = ordenar_por_grupo(df, columna_grupo)
+    n = len(ordenado)
+    inicios = limites_grupos(codigos)
+    valores = np.ascontiguousarray(como_matriz(ordenado[columnas]).T)
+
+    # Posición de cada fila real dentro del arreglo con relleno entre grupos
+    relleno = max(ventanas) - 1
+    numero_grupo = np.repeat(np.arange(len(inicios)), np.diff(np.r_[inicios, n]))
+    destino = np.arange(n) + relleno * (numero_grupo + 1)
+    con_relleno = np.full((len(columnas), n + relleno * len(inicios)), np.nan)
+
+    resultados = np.empty((len(columnas), len(estadisticas), len(ventanas), n))
+    centradas = [e for e, estadistica in enumerate(estadisticas) if estadistica in _CENTRADAS]
+    directas = [e for e, estadistica in enumerate(estadisticas) if estadistica not in _CENTRADAS]
+    if centradas:
+        # Centrar en la media del grupo evita perder precisión en las sumas
+        # prefijas cuando los pozos tienen niveles muy distintos
+        centro = _medias_por_grupo(valores, inicios)[:, numero_grupo]
+        con_relleno[:, destino] = valores - centro
+        parcial = _estadisticas_matriz(con_relleno, [estadisticas[e] for e in centradas], ventanas, min_periods)
+        resultados[:, centradas] = parcial[..., destino]
+        for e in centradas:
+            if estadisticas[e] == 'mean':
+                resultados[:, e] += centro[:, None, :]
+            elif estadisticas[e] == 'sum':
+                conteo = _estadisticas_matriz(con_relleno, ['count'], ventanas, 0)[:, 0][..., destino]
+                resultados[:, e] += centro[:, None, :] * conteo
+    if directas:
+        con_relleno[:, destino] = valores
+        parcial = _estadisticas_matriz(con_relleno, [estadisticas[e] for e in directas], ventanas, min_periods)
+        resultados[:, directas] = parcial[..., destino]
+
+    if 'count' in estadisticas:
+        # count exige filas suficientes contadas desde el inicio del grupo
+        e = estadisticas.index('count')
+        posicion = np.arange(n) - inicios[numero_grupo]
+        for v, ventana in enumerate(ventanas):
+            minimo = min_periods if min_periods is not None else ventana
+            incompletas = np.minimum(posicion + 1, ventana) < minimo
+            resultados[:, e, v, incompletas] = np.nan
+
+    if orden is not None:
+        resultados[..., orden] = resultados.copy()
+
+    indice_columnas = pd.MultiIndex.from_tuples(
+        [(columna, estadistica, ventana)
+         for columna in columnas for estadistica in estadisticas for ventana in ventanas],
+        names=['columna', 'estadistica', 'ventana'])
+    return pd.DataFrame(resultados.reshape(len(indice_columnas), -1).T, index=df.index,
+                        columns=indice_columnas, copy=False)
+
+
+def resample_por_grupo(df, columna_grupo, freq, columnas=None,
+                       agregados=('mean', 'std', 'min', 'max', 'count')):
+    """Resample por grupo, como `df.groupby(grupo).resample(freq)[columnas].agg(agregados)`.
+
+    Devuelve un DataFrame con índice (grupo, fecha) que incluye los
+    intervalos vacíos entre el primero y el último de cada grupo. Los
+    intervalos se alinean con la fecha más temprana de todo el DataFrame,
+    así todos los grupos comparten las mismas etiquetas; para frecuencias
+    que dividen el día (h, 6h, 15min, D) coincide con pandas.
+    """
+    agregados = list(agregados)
+    desconocidos = set(agregados) - set(AGREGADOS_GRUPO)
+    if desconocidos:
+        raise ValueError(f"Agregados no soportados: {sorted(desconocidos)}")
+    if columnas is None:
+        columnas = [columna for columna in df.select_dtypes('number').columns if columna != columna_grupo]
+    columnas = list(columnas)
+
+    ordenado, codigos, _ = ordenar_por_grupo(df, columna_grupo)
+    # El Grouper necesita fechas ordenadas: se aplica a las fechas únicas
+    unicas, inversa = np.unique(ordenado.index.to_numpy(), return_inverse=True)
+    agrupador = pd.DataFrame(index=pd.DatetimeIndex(unicas)).groupby(pd.Grouper(freq=freq))
+    intervalo = agrupador.ngroup().to_numpy()[inversa.ravel()]
+    etiquetas = agrupador.size().index
+    nombres_grupo = pd.Index(ordenado[columna_grupo]).unique()
+
+    # Segmentos (grupo, intervalo) con datos
+    inicios = np.flatnonzero(np.r_[True, (codigos[1:] != codigos[:-1]) | (intervalo[1:] != intervalo[:-1])])
+    largos = np.diff(np.r_[inicios, len(ordenado)])
+    grupo_segmento = codigos[inicios]
+    intervalo_segmento = intervalo[inicios]
+
+    # Todos los intervalos entre el primero y el último de cada grupo
+    inicio_grupo = limites_grupos(grupo_segmento)
+    fin_grupo = np.r_[inicio_grupo[1:], len(inicios)] - 1
+    desde = intervalo_segmento[inicio_grupo]
+    cantidad = intervalo_segmento[fin_grupo] - desde + 1
+    grupo_salida = np.repeat(np.arange(len(inicio_grupo)), cantidad)
+    intervalo_salida = np.arange(cantidad.sum()) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad) \
+        + np.repeat(desde, cantidad)
+    fila_salida = np.searchsorted(grupo_salida * len(etiquetas) + intervalo_salida,
+                                  grupo_segmento * len(etiquetas) + intervalo_segmento)
+
+    valores = como_matriz(ordenado[columnas])
+    posiciones = np.arange(len(ordenado))
+    resultado = {}
+    for c, columna in enumerate(columnas):
+        tipo = ordenado[columna].dtype
+        entero = isinstance(tipo, np.dtype) and tipo.kind in 'iu'
+        x = valores[:, c]
+        validos = ~np.isnan(x)
+        conteo = np.add.reduceat(validos, inicios)
+        suma = np.add.reduceat(np.where(validos, x, 0.0), inicios)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = suma / conteo
+            desvio = np.where(validos, x - np.repeat(media, largos), 0.0)
+            varianza = np.add.reduceat(desvio * desvio, inicios) / (conteo - 1)
+        varianza[conteo < 2] = np.nan
+        primero = np.minimum.reduceat(np.where(validos, posiciones, len(x)), inicios)
+        ultimo = np.maximum.reduceat(np.where(validos, posiciones, -1), inicios)
+        x_extendido = np.r_[x, np.nan]
+        por_segmento = {
+            'count': conteo,
+            # La suma de enteros se hace en int64 para que sea exacta
+            'sum': np.add.reduceat(ordenado[columna].to_numpy(np.int64), inicios) if entero else suma,
+            'mean': media,
+            'var': varianza,
+            'std': np.sqrt(varianza),
+            'min': np.where(conteo > 0, np.minimum.reduceat(np.where(validos, x, np.inf), inicios), np.nan),
+            'max': np.where(conteo > 0, np.maximum.reduceat(np.where(validos, x, -np.inf), inicios), np.nan),
+            'first': x_extendido[primero],
+            'last': x_extendido[ultimo],
+        }
+        for agregado in agregados:
+            vacio = 0 if agregado in ('count', 'sum') else np.nan
+            entera = agregado == 'count' or (entero and agregado == 'sum')
+            salida = np.full(len(grupo_salida), vacio, dtype=np.int64 if entera else np.float64)
+            salida[fila_salida] = por_segmento[agregado]
+            if entero and agregado in _CONSERVAN_TIPO and not np.isnan(salida).any():
+                salida = salida.astype(tipo)
+            resultado[(columna, agregado)] = salida
+
+    indice = pd.MultiIndex.from_arrays(
+        [nombres_grupo[grupo_salida], etiquetas[intervalo_salida]],
+        names=[columna_grupo, df.index.name])
+    salida = pd.DataFrame(resultado, index=indice)
+    if len(columnas) == 1:
+        salida.columns = agregados
+    return salida
@@ -0,0 +1,214 @@
+"""
+ÍNDICE DE HUECOS Y RELLENO CON LÍMITES
+Sesión 12: Series Temporales en Pandas
+
+`resample('H').mean().fillna(method='ffill')` rellena cualquier hueco, dure
+una hora o un mes. Este módulo primero arma el índice de huecos de cada
+serie (tramos consecutivos de NaN, con su inicio, fin, largo y las lecturas
+válidas que los rodean) en una pasada vectorizada, y las estrategias de
+relleno lo usan para decidir qué rellenar:
+
+- 'ffill' / 'bfill': repiten la lectura anterior / siguiente, solo hasta
+  `limite` de distancia en el tiempo.
+- 'lineal': interpolación ponderada por el tiempo entre las lecturas que
+  rodean el hueco (los huecos en los bordes no se extrapolan).
+- `max_hueco`: los huecos más largos que este umbral quedan en NaN.
+
+Con `columna_grupo` (por ejemplo 'pozo_id') se trabaja sobre el formato
+largo sin pivotear: ningún hueco ni relleno cruza de un pozo a otro.
+
+Uso:
+    huecos = indice_huecos(df_hora, columnas=['valor'])
+    relleno, cobertura = rellenar_huecos(df_hora, 'lineal', columnas=['valor'], max_hueco='6h')
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import como_matriz
+from series_temporales.grupos import limites_grupos, ordenar_por_grupo
+
+METODOS_RELLENO = ('ffill', 'bfill', 'lineal')
+
+
+def _preparar(df, columnas, columna_grupo):
+    """Ordena por (grupo, fecha) y devuelve (ordenado, columnas, grupo de cada fila, límites, orden)"""
+    if columnas is None:
+        columnas = [columna for columna in df.select_dtypes('number').columns if columna != columna_grupo]
+    columnas = list(columnas)
+    if columna_grupo is None:
+        orden = None if df.index.is_monotonic_increasing else np.argsort(df.index.asi8, kind='stable')
+        ordenado = df if orden is None else df.iloc[orden]
+        inicios = np.array([0], dtype=np.int64)
+    else:
+        ordenado, codigos, orden = ordenar_por_grupo(df, columna_grupo)
+        inicios = limites_grupos(codigos)
+    limites = np.r_[inicios, len(ordenado)]
+    numero_grupo = np.repeat(np.arange(len(inicios)), np.diff(limites))
+    return ordenado, columnas, numero_grupo, limites, orden
+
+
+def _huecos_columna(faltantes, numero_grupo, limites):
+    """Tramos de NaN consecutivos de una columna, sin cruzar grupos.
+
+    Devuelve (desde, hasta, anterior, siguiente): posiciones de la primera
+    fila faltante, una después de la última, y de la lectura válida
+    anterior y siguiente dentro del grupo (-1 si el hueco toca el borde).
+    """
+    n = len(faltantes)
+    es_inicio_grupo = np.zeros(n, dtype=bool)
+    es_inicio_grupo[limites[:-1][limites[:-1] < n]] = True
+    previo = np.r_[False, faltantes[:-1]] & ~es_inicio_grupo
+    desde = np.flatnonzero(faltantes & ~previo)
+    siguiente_faltante = np.r_[faltantes[1:], False] & ~np.r_[es_inicio_grupo[1:], True]
+    hasta = np.flatnonzero(faltantes & ~siguiente_faltante) + 1
+
+    grupo = numero_grupo[desde]
+    anterior = np.where(desde > limites[grupo], desde - 1, -1)
+    siguiente = np.where(hasta < limites[grupo + 1], hasta, -1)
+    return desde, hasta, anterior, siguiente
+
+
+def _duraciones(tiempos, desde, hasta, anterior, siguiente):
+    """Tiempo sin datos de cada hueco, entre las lecturas válidas que lo rodean.
+
+    En los bordes se mide desde (o hasta) la fila faltante más lejana.
+    """
+    izquierda = np.where(anterior >= 0, tiempos[np.maximum(anterior, 0)], tiempos[desde])
+    derecha = np.where(siguiente >= 0, tiempos[np.maximum(siguiente, 0)], tiempos[hasta - 1])
+    return derecha - izquierda
+
+
+def indice_huecos(df, columnas=None, columna_grupo=None):
+    """Índice de huecos (tramos consecutivos de NaN) de cada columna y grupo.
+
+    Devuelve un DataFrame con una fila por hueco: grupo (si hay
+    `columna_grupo`), columna, inicio y fin (primera y última fecha
+    faltante), filas, anterior y siguiente (fechas de las lecturas válidas
+    que lo rodean, NaT en los bordes) y duracion (tiempo sin datos entre
+    ellas).
+    """
+    ordenado, columnas, numero_grupo, limites, _ = _preparar(df, columnas, columna_grupo)
+    indice = ordenado.index
+    tiempos = indice.asi8
+    valores = como_matriz(ordenado[columnas])
+    unidad = f'timedelta64[{indice.unit}]'
+
+    partes = []
+    for c, columna in enumerate(columnas):
+        desde, hasta, anterior, siguiente = _huecos_columna(np.isnan(valores[:, c]), numero_grupo, limites)
+        parte = pd.DataFrame({
+            'columna': columna,
+            'inicio': indice[desde],
+            'fin': indice[hasta - 1],
+            'filas': hasta - desde,
+            'anterior': indice[np.maximum(anterior, 0)].where(anterior >= 0),
+            'siguiente': indice[np.maximum(siguiente, 0)].where(siguiente >= 0),
+            'duracion': _duraciones(tiempos, desde, hasta, anterior, siguiente).astype(unidad),
+        })
+        if columna_grupo is not None:
+            parte.insert(0, columna_grupo, ordenado[columna_grupo].iloc[desde].to_numpy())
+        partes.append(parte)
+    return pd.concat(partes, ignore_index=True)
+
+
+def _a_unidades(duracion, indice):
+    """Convierte una duración ('6h', Timedelta) a enteros en la unidad del índice"""
+    if duracion is None:
+        return None
+    return pd.Timedelta(duracion) // pd.Timedelta(1, unit=indice.unit)
+
+
+def rellenar_huecos(df, metodo='lineal', columnas=None, columna_grupo=None, limite=None, max_hueco=None):
+    """Rellena los huecos usando el índice de huecos y devuelve métricas de cobertura.
+
+    - metodo: 'ffill', 'bfill' o 'lineal' (ponderada por el tiempo).
+    - limite: con 'ffill'/'bfill', solo se rellenan las filas a lo sumo a
+      esta distancia en el tiempo de la lectura que se repite.
+    - max_hueco: los huecos con más tiempo sin datos que este umbral quedan
+      sin rellenar.
+
+    Devuelve (relleno, cobertura): una copia de `df` con las columnas
+    rellenadas (mismo orden de filas y tipos) y un DataFrame por columna (y grupo)
+    con faltantes, rellenados, sin_rellenar, huecos, hueco_maximo y la
+    cobertura antes y después del relleno.
+    """
+    if metodo not in METODOS_RELLENO:
+        raise ValueError(f"Método de relleno no soportado: {metodo}")
+    if limite is not None and metodo == 'lineal':
+        raise ValueError("`limite` aplica a 'ffill' y 'bfill'; para 'lineal' usar `max_hueco`")
+    ordenado, columnas, numero_grupo, limites, orden = _preparar(df, columnas, columna_grupo)
+    indice = ordenado.index
+    tiempos = indice.asi8
+    limite = _a_unidades(limite, indice)
+    max_hueco = _a_unidades(max_hueco, indice)
+    valores = como_matriz(ordenado[columnas]).copy()
+    grupos = len(limites) - 1
+    filas_grupo = np.diff(limites)
+
+    metricas = []
+    for c, columna in enumerate(columnas):
+        x = valores[:, c]
+        faltantes = np.isnan(x)
+        desde, hasta, anterior, siguiente = _huecos_columna(faltantes, numero_grupo, limites)
+        duracion = _duraciones(tiempos, desde, hasta, anterior, siguiente)
+
+        # Cada fila faltante hereda los datos de su hueco
+        largos = hasta - desde
+        posiciones = np.flatnonzero(faltantes)
+        previa = np.repeat(anterior, largos)
+        proxima = np.repeat(siguiente, largos)
+        aceptado = np.ones(len(desde), dtype=bool) if max_hueco is None else duracion <= max_hueco
+        aceptado = np.repeat(aceptado, largos)
+
+        t = tiempos[posiciones]
+        t_previa = tiempos[np.maximum(previa, 0)]
+        t_proxima = tiempos[np.maximum(proxima, 0)]
+        if metodo == 'ffill':
+            rellenar = aceptado & (previa >= 0)
+            if limite is not None:
+                rellenar &= t - t_previa <= limite
+            nuevos = x[np.maximum(previa, 0)]
+        elif metodo == 'bfill':
+            rellenar = aceptado & (proxima >= 0)
+            if limite is not None:
+                rellenar &= t_proxima - t <= limite
+            nuevos = x[np.maximum(proxima, 0)]
+        else:
+            rellenar = aceptado & (previa >= 0) & (proxima >= 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                peso = (t - t_previa) / (t_proxima - t_previa)
+            y_previa = x[np.maximum(previa, 0)]
+            nuevos = y_previa + (x[np.maximum(proxima, 0)] - y_previa) * peso
+        x[posiciones[rellenar]] = nuevos[rellenar]
+
+        grupo_hueco = numero_grupo[desde]
+        hueco_maximo = np.full(grupos, np.iinfo(np.int64).min)
+        np.maximum.at(hueco_maximo, grupo_hueco, duracion)
+        faltan = np.bincount(numero_grupo[posiciones], minlength=grupos)
+        rellenados = np.bincount(numero_grupo[posiciones[rellenar]], minlength=grupos)
+        metricas.append(pd.DataFrame({
+            'columna': columna,
+            'faltantes': faltan,
+            'rellenados': rellenados,
+            'sin_rellenar': faltan - rellenados,
+            'huecos': np.bincount(grupo_hueco, minlength=grupos),
+            'hueco_maximo': pd.to_timedelta(np.where(faltan > 0, hueco_maximo, 0), unit=indice.unit)
+                              .where(faltan > 0),
+            'cobertura_inicial': 1 - faltan / np.maximum(filas_grupo, 1),
+            'cobertura_final': 1 - (faltan - rellenados) / np.maximum(filas_grupo, 1),
+        }))
+
+    if orden is not None:
+        valores[orden] = valores.copy()
+    relleno = df.copy()
+    relleno[columnas] = valores
+    relleno = relleno.astype(df[columnas].dtypes.to_dict())
+    cobertura = pd.concat(metricas, ignore_index=True)
+    if columna_grupo is not None:
+        cobertura.insert(0, columna_grupo, np.tile(ordenado[columna_grupo].iloc[limites[:-1]].to_numpy(),
+                                                   len(columnas)))
+        cobertura = cobertura.set_index([columna_grupo, 'columna'])
+    else:
+        cobertura = cobertura.set_index('columna')
+    return relleno, cobertura
@@ -0,0 +1,228 @@
+"""
+INSTRUMENTACIÓN POR ETAPAS: TIEMPO, CPU, MEMORIA Y FILAS
+Sesión 12: Series Temporales en Pandas
+
+La demostración y los laboratorios son scripts planos: cuando una corrida
+se vuelve lenta no hay forma de saber qué etapa la enlentece. Este módulo
+registra, para cada etapa con nombre (carga, resample, rolling,
+correlación, gráficos...), el tiempo de reloj, el tiempo de CPU, el pico de
+memoria asignada (tracemalloc) y las filas procesadas, y escribe el reporte
+en JSON o CSV.
+
+Las etapas se pueden anidar: el pico de una etapa incluye el de sus
+etapas internas. Con la instrumentación desactivada `etapa` devuelve un
+contexto vacío compartido y `medir` deja la función sin envolver, así que
+el costo es una comparación por etapa.
+
+Uso:
+    instrumentacion = Instrumentacion()
+    with instrumentacion.etapa('carga') as registro:
+        df = cargar_dataset('sensores_temporales')
+        registro.filas = len(df)
+
+    @instrumentacion.medir('resample', filas=len)
+    def resumir(df):
+        return df.resample('D').mean()
+
+    instrumentacion.escribir('reporte_etapas.json')
+"""
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ('etapa', 'detalle', 'padre', 'nivel', 'inicio_s', 'segundos', 'cpu_segundos', 'memoria_pico_mb',
+            'filas', 'filas_por_segundo')
+
+
+class _Registro:
+    """Medición en curso de una etapa; `filas` y `detalle` se pueden asignar dentro del bloque"""
+
+    __slots__ = ('etapa', 'detalle', 'filas', 'padre', 'nivel', '_reloj', '_cpu', '_base', '_pico')
+
+    def __init__(self, etapa, detalle, filas, padre, nivel):
+        self.etapa = etapa
+        self.detalle = detalle
+        self.filas = filas
+        self.padre = padre
+        self.nivel = nivel
+
+
+class _RegistroNulo:
+    """Contexto vacío de la instrumentación desactivada; ignora lo que se le asigna"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+    def __setattr__(self, nombre, valor):
+        pass
+
+
+_NULO = _RegistroNulo()
+
+
+class _Etapa:
+    """Contexto de una etapa activa"""
+
+    __slots__ = ('_instrumentacion', '_registro')
+
+    def __init__(self, instrumentacion, registro):
+        self._instrumentacion = instrumentacion
+        self._registro = registro
+
+    def __enter__(self):
+        self._instrumentacion._abrir(self._registro)
+        return self._registro
+
+    def __exit__(self, *excepcion):
+        self._instrumentacion._cerrar(self._registro)
+        return False
+
+
+def entorno():
+    """Versiones y plataforma de la corrida, para acompañar los reportes"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'procesadores': os.cpu_count(),
+    }
+
+
+class Instrumentacion:
+    """Registro de etapas con tiempo de reloj, CPU, pico de memoria y filas.
+
+    `memoria=False` omite tracemalloc, que enlentece las asignaciones de
+    Python; `activa=False` desactiva todo el registro.
+    """
+
+    def __init__(self, activa=True, memoria=True):
+        self.activa = activa
+        self.memoria = memoria
+        self.registros = []
+        self._pila = []
+        self._iniciado_tracemalloc = False
+        self._inicio = time.perf_counter()
+
+    def etapa(self, nombre, filas=None, detalle=None):
+        """Contexto que mide el bloque como la etapa `nombre`; devuelve el registro (asignar `filas`)"""
+        if not self.activa:
+            return _NULO
+        padre = self._pila[-1].etapa if self._pila else None
+        return _Etapa(self, _Registro(nombre, detalle, filas, padre, len(self._pila)))
+
+    def medir(self, nombre=None, filas=None):
+        """Decorador que mide cada llamada como una etapa.
+
+        `nombre` es por defecto el de la función; `filas` es una función
+        que recibe el primer argumento de la llamada (por ejemplo `len`).
+        """
+        def decorador(funcion):
+            if not self.activa:
+                return funcion
+            etiqueta = nombre or funcion.__name__
+
+            def envoltura(*args, **kwargs):
+                conteo = filas(args[0]) if filas is not None and args else None
+                with self.etapa(etiqueta, filas=conteo):
+                    return funcion(*args, **kwargs)
+
+            envoltura.__name__ = funcion.__name__
+            envoltura.__doc__ = funcion.__doc__
+            envoltura.__wrapped__ = funcion
+            return envoltura
+        return decorador
+
+    def _abrir(self, registro):
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._iniciado_tracemalloc = True
+            actual, pico = tracemalloc.get_traced_memory()
+            # El pico acumulado de la etapa externa se guarda antes de reiniciarlo
+            if self._pila:
+                self._pila[-1]._pico = max(self._pila[-1]._pico, pico)
+            tracemalloc.reset_peak()
+            registro._base = actual
+            registro._pico = actual
+        self._pila.append(registro)
+        registro._cpu = time.process_time()
+        registro._reloj = time.perf_counter()
+
+    def _cerrar(self, registro):
+        fin = time.perf_counter()
+        cpu = time.process_time() - registro._cpu
+        self._pila.pop()
+        pico_mb = None
+        if self.memoria:
+            pico = max(registro._pico, tracemalloc.get_traced_memory()[1])
+            pico_mb = (pico - registro._base) / 1e6
+            if self._pila:
+                self._pila[-1]._pico = max(self._pila[-1]._pico, pico)
+                tracemalloc.reset_peak()
+            elif self._iniciado_tracemalloc:
+                tracemalloc.stop()
+                self._iniciado_tracemalloc = False
+
+        segundos = fin - registro._reloj
+        filas = None if registro.filas is None else int(registro.filas)
+        self.registros.append({
+            'etapa': registro.etapa,
+            'detalle': registro.detalle,
+            'padre': registro.padre,
+            'nivel': registro.nivel,
+            'inicio_s': registro._reloj - self._inicio,
+            'segundos': segundos,
+            'cpu_segundos': cpu,
+            'memoria_pico_mb': pico_mb,
+            'filas': filas,
+            'filas_por_segundo': filas / segundos if filas is not None and segundos > 0 else None,
+        })
+
+    # -- Reportes --------------------------------------------------------------
+
+    def tabla(self):
+        """Los registros como DataFrame, en el orden en que empezaron las etapas"""
+        return (pd.DataFrame(self.registros, columns=list(COLUMNAS))
+                .astype({'nivel': 'int64', 'filas': 'Int64'})
+                .sort_values('inicio_s', kind='stable')
+                .reset_index(drop=True))
+
+    def por_etapa(self):
+        """Totales por nombre de etapa: llamadas, segundos, CPU, pico máximo y filas"""
+        totales = self.tabla().groupby('etapa', sort=False).agg(
+            llamadas=('segundos', 'size'),
+            segundos=('segundos', 'sum'),
+            cpu_segundos=('cpu_segundos', 'sum'),
+            memoria_pico_mb=('memoria_pico_mb', 'max'),
+            filas=('filas', 'sum'),
+            con_filas=('filas', 'count'),
+        )
+        # Las etapas que nunca informaron filas quedan en NaN, no en 0
+        totales['filas'] = totales['filas'].where(totales.pop('con_filas') > 0)
+        return totales.sort_values('segundos', ascending=False)
+
+    def escribir(self, ruta):
+        """Escribe el reporte: CSV si la ruta termina en .csv, JSON (con el entorno) en otro caso"""
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        if ruta.suffix.lower() == '.csv':
+            self.tabla().to_csv(ruta, index=False)
+        else:
+            reporte = {'entorno': entorno(), 'etapas': self.tabla().astype(object)
+                       .where(lambda tabla: tabla.notna(), None).to_dict('records')}
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+        return ruta
@@ -0,0 +1,168 @@
+"""
+ANÁLISIS DE POZOS EN PARALELO
+Sesión 12: Series Temporales en Pandas
+
+Ejecuta el análisis del laboratorio 3 (medias móviles, tendencia, límites de
+control, correlación móvil y descomposición) para muchos pozos repartidos
+entre procesos con `ProcessPoolExecutor`. Cada pozo es independiente, así
+que el trabajo se divide en lotes de pozos sin comunicación entre procesos.
+
+Entre procesos solo viajan arreglos de NumPy: cada lote lleva una matriz
+(columnas, filas) por pozo y devuelve una matriz (salidas, filas), que se
+serializan como bloques de bytes en lugar de DataFrames con índice y tipos.
+Cada proceso informa cuántos pozos y filas procesó y en cuánto tiempo.
+
+Uso:
+    resultados, rendimiento = analizar_pozos_en_paralelo(df_parametros, trabajadores=8)
+
+Desde la línea de comandos (parametros_pozos.csv u otro archivo con el
+mismo esquema):
+    python -m series_temporales.paralelo 8 datos/parametros_pozos.csv
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import como_matriz
+from series_temporales.carga import cargar_dataset
+from series_temporales.correlacion import _correlacion_pares
+from series_temporales.grupos import limites_grupos, ordenar_por_grupo
+from series_temporales.tendencias import _regresion_matriz
+from series_temporales.ventanas import _estadisticas_matriz
+
+# Columnas de entrada y resultados de analizar_pozo, en orden
+ENTRADAS = ('caudal_bpd', 'presion_cabeza_psi')
+
+SALIDAS = (
+    'produccion_ma_7d',
+    'produccion_std_7d',
+    'produccion_ma_30d',
+    'limite_superior',
+    'limite_inferior',
+    'es_anomalia',
+    'tendencia_7d',
+    'tendencia_30d',
+    'correlacion_prod_presion',
+    'residuos',
+)
+
+
+def analizar_pozo(valores, ventana_corta=28, ventana_larga=120, sigmas=3):
+    """Análisis del laboratorio 3 para un pozo.
+
+    Recibe una matriz (2, filas) con caudal y presión de cabeza en orden de
+    fecha y devuelve una matriz (len(SALIDAS), filas) en float64.
+    """
+    caudal, presion = valores
+    n = len(caudal)
+    salida = np.empty((len(SALIDAS), n))
+
+    estadisticas = _estadisticas_matriz(caudal[None, :], ['mean', 'std'], [ventana_corta, ventana_larga], None)
+    media_corta, media_larga = estadisticas[0, 0]
+    desviacion_corta = estadisticas[0, 1, 0]
+    salida[0] = media_corta
+    salida[1] = desviacion_corta
+    salida[2] = media_larga
+
+    # Límites de control y anomalías (NaN mientras no hay ventana completa)
+    salida[3] = media_corta + sigmas * desviacion_corta
+    salida[4] = media_corta - sigmas * desviacion_corta
+    salida[5] = (caudal > salida[3]) | (caudal < salida[4])
+
+    columna = caudal[:, None]
+    salida[6] = _regresion_matriz(columna, ventana_corta, ventana_corta)[0][:, 0]
+    salida[7] = _regresion_matriz(columna, ventana_larga, ventana_larga)[0][:, 0]
+    salida[8] = _correlacion_pares(valores.T, ventana_corta, ventana_corta)[:, 0, 1]
+
+    # Descomposición: datos - tendencia (30 días) - estacionalidad (7 días)
+    salida[9] = caudal - media_larga - media_corta
+    return salida
+
+
+def _procesar_lote(lote, parametros):
+    """Analiza un lote de pozos dentro de un proceso y mide su rendimiento"""
+    inicio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    resultados = [analizar_pozo(valores, **parametros) for valores in lote]
+    rendimiento = {
+        'pid': os.getpid(),
+        'pozos': len(lote),
+        'filas': sum(valores.shape[1] for valores in lote),
+        'segundos': time.perf_counter() - inicio,
+        'segundos_cpu': time.process_time() - inicio_cpu,
+    }
+    return resultados, rendimiento
+
+
+def _resumir_rendimiento(registros, segundos_totales):
+    """Agrupa los registros por proceso y calcula filas y pozos por segundo"""
+    tabla = pd.DataFrame(registros)
+    resumen = tabla.groupby('pid').agg(
+        lotes=('pozos', 'size'),
+        pozos=('pozos', 'sum'),
+        filas=('filas', 'sum'),
+        segundos=('segundos', 'sum'),
+        segundos_cpu=('segundos_cpu', 'sum'),
+    )
+    resumen['filas_por_segundo'] = resumen['filas'] / resumen['segundos']
+    resumen['pozos_por_segundo'] = resumen['pozos'] / resumen['segundos']
+    # Fracción del tiempo total que cada proceso estuvo ocupado
+    resumen['ocupacion'] = resumen['segundos'] / segundos_totales
+    return resumen
+
+
+def analizar_pozos_en_paralelo(df, columna_grupo='pozo_id', trabajadores=None, pozos_por_lote=None,
+                               columnas=ENTRADAS, **parametros):
+    """Aplica `analizar_pozo` a cada pozo repartiendo lotes entre procesos.
+
+    `trabajadores` es el número de procesos (por defecto, los núcleos
+    disponibles); con 1 se ejecuta en el proceso actual. `pozos_por_lote`
+    controla cuántos pozos lleva cada tarea: lotes más grandes reducen el
+    costo de comunicación y lotes más chicos reparten mejor la carga (por
+    defecto, unos cuatro lotes por proceso). Los demás parámetros se pasan
+    a `analizar_pozo`.
+
+    Devuelve (resultados, rendimiento): un DataFrame con las columnas de
+    SALIDAS alineado con las filas de `df`, y un DataFrame por proceso con
+    lotes, pozos, filas, tiempo y filas por segundo.
+    """
+    inicio = time.perf_counter()
+    trabajadores = trabajadores or os.cpu_count() or 1
+    ordenado, codigos, orden = ordenar_por_grupo(df, columna_grupo)
+    limites = np.r_[limites_grupos(codigos), len(ordenado)]
+    valores = np.ascontiguousarray(como_matriz(ordenado[list(columnas)]).T)
+    pozos = [valores[:, desde:hasta] for desde, hasta in zip(limites[:-1], limites[1:])]
+
+    if pozos_por_lote is None:
+        pozos_por_lote = max(1, -(-len(pozos) // (4 * trabajadores)))
+    lotes = [pozos[i:i + pozos_por_lote] for i in range(0, len(pozos), pozos_por_lote)]
+
+    if trabajadores == 1:
+        respuestas = [_procesar_lote(lote, parametros) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+            respuestas = list(ejecutor.map(_procesar_lote, lotes, [parametros] * len(lotes)))
+
+    matriz = np.concatenate([resultado for resultados, _ in respuestas for resultado in resultados], axis=1)
+    if orden is not None:
+        matriz[:, orden] = matriz.copy()
+    resultados = pd.DataFrame(matriz.T, index=df.index, columns=list(SALIDAS), copy=False)
+    resultados['es_anomalia'] = resultados['es_anomalia'].astype(bool)
+
+    rendimiento = _resumir_rendimiento([registro for _, registro in respuestas], time.perf_counter() - inicio)
+    return resultados, rendimiento
+
+
+if __name__ == '__main__':
+    trabajadores = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    ruta = sys.argv[2] if len(sys.argv) > 2 else None
+    df_parametros = cargar_dataset('parametros_pozos', ruta=ruta)
+    resultados, rendimiento = analizar_pozos_en_paralelo(df_parametros, trabajadores=trabajadores)
+    print(f"Pozos: {df_parametros['pozo_id'].nunique()}, registros: {len(df_parametros)}, "
+          f"anomalías: {resultados['es_anomalia'].sum()}")
+    print(rendimiento.round(3).to_string())
@@ -0,0 +1,246 @@
+"""
+DATASETS PARTICIONADOS POR POZO Y MES CON PODA DE PARTICIONES
+Sesión 12: Series Temporales en Pandas
+
+El laboratorio 1 selecciona por fecha (`loc['2023-01-15']`, `loc['2023-01']`,
+la primera semana) sobre el DataFrame completo en memoria. Con un archivo de
+varios años eso obliga a leer gigabytes para mostrar un día. Aquí cada
+dataset se escribe en disco partido por `pozo_id` y mes, con las columnas de
+cada partición como archivos `.npy` (la misma codificación que `cache.py`).
+El manifiesto guarda la primera y la última fecha de cada partición, de modo
+que una consulta descarta las particiones que no tocan el rango (o los pozos)
+pedidos antes de abrir ningún archivo, y dentro de las que quedan busca el
+rango con búsqueda binaria sobre las fechas: del resto de las columnas se
+leen solo los bytes de ese tramo.
+
+Estructura en `<carpeta del CSV>/.particiones/<nombre>/`:
+    manifiesto.json
+    <pozo_id>/<AAAA-MM>/<posición de la columna>.npy
+
+Uso:
+    particiones = abrir_particiones('produccion_historica')
+    dia = leer_particiones(particiones, '2023-01-15', '2023-01-15')
+    pz001 = leer_particiones(particiones, '2023-01', '2023-01', pozos=['PZ001'], columnas=['produccion_bpd'])
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from series_temporales import cache
+from series_temporales.almacen import _limite
+from series_temporales.carga import cargar_dataset, ruta_dataset
+
+VERSION_PARTICIONES = 1
+
+COLUMNA_POZO = 'pozo_id'
+
+_MANIFIESTO = 'manifiesto.json'
+
+
+def ruta_particiones(ruta_csv):
+    """Carpeta del dataset particionado para un CSV"""
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.parent / '.particiones' / ruta_csv.stem
+
+
+def construir_particiones(nombre, ruta=None, destino=None):
+    """Escribe el dataset partido por pozo y mes a partir del CSV y devuelve su carpeta.
+
+    Las filas de cada partición quedan ordenadas por fecha. Las categorías y
+    los diccionarios de texto son comunes a todas las particiones, así que
+    los códigos se pueden concatenar sin traducirlos.
+    """
+    ruta = Path(ruta) if ruta is not None else ruta_dataset(nombre)
+    destino = Path(destino) if destino is not None else ruta_particiones(ruta)
+    df = cargar_dataset(nombre, ruta=ruta)
+    tabla = df.reset_index()
+    fechas = df.index.to_numpy()
+
+    # Clave de partición: código del pozo y mes, ordenada de forma estable
+    # para que cada partición conserve el orden por fecha. Los pozos
+    # faltantes (código -1) forman su propia partición
+    pozos, nombres = pd.factorize(tabla[COLUMNA_POZO], sort=True)
+    meses = fechas.astype('M8[M]').astype(np.int64)
+    meses -= meses.min(initial=0)
+    clave = (pozos.astype(np.int64) + 1) * (meses.max(initial=0) + 1) + meses
+    orden = np.argsort(clave, kind='stable')
+    clave = clave[orden]
+    inicios = np.flatnonzero(np.r_[True, clave[1:] != clave[:-1]])[:len(orden)]
+    fines = np.r_[inicios[1:], len(orden)]
+
+    codificadas = []
+    for posicion, columna in enumerate(tabla.columns):
+        valores, descripcion = cache.codificar_columna(tabla[columna])
+        codificadas.append((valores, {'nombre': columna, 'archivo': f'{posicion:03d}.npy', **descripcion}))
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = Path(tempfile.mkdtemp(prefix=f'.{destino.name}-', dir=destino.parent))
+    try:
+        temporal.chmod(0o755)
+        particiones = []
+        for desde, hasta in zip(inicios, fines):
+            filas = orden[desde:hasta]
+            codigo_pozo = pozos[filas[0]]
+            pozo = str(nombres[codigo_pozo]) if codigo_pozo >= 0 else None
+            mes = str(fechas[filas[0]].astype('M8[M]'))
+            carpeta = f"{quote(pozo, safe='') if pozo is not None else '_sin_pozo'}/{mes}"
+            (temporal / carpeta).mkdir(parents=True)
+            for valores, descripcion in codificadas:
+                np.save(temporal / carpeta / descripcion['archivo'], valores[filas], allow_pickle=False)
+            particiones.append({
+                'pozo': pozo,
+                'mes': mes,
+                'carpeta': carpeta,
+                'filas': len(filas),
+                'inicio': str(fechas[filas[0]]),
+                'fin': str(fechas[filas[-1]]),
+            })
+
+        manifiesto = {
+            'version': VERSION_PARTICIONES,
+            'origen': {**cache._firma(ruta), 'ruta': str(ruta)},
+            'indice': tabla.columns[0],
+            'nombre_indice': df.index.name,
+            'filas': len(tabla),
+            'columnas': [descripcion for _, descripcion in codificadas],
+            'particiones': particiones,
+        }
+        (temporal / _MANIFIESTO).write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding='utf-8')
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(temporal, destino)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    return destino
+
+
+def abrir_particiones(nombre, ruta=None, carpeta=None):
+    """Abre el dataset particionado; lo construye si falta o si el CSV cambió.
+
+    Devuelve un diccionario con la carpeta, el manifiesto y, para la poda,
+    los arreglos de primera y última fecha y el pozo de cada partición.
+    """
+    ruta = Path(ruta) if ruta is not None else ruta_dataset(nombre)
+    carpeta = Path(carpeta) if carpeta is not None else ruta_particiones(ruta)
+
+    manifiesto = _leer_manifiesto(carpeta)
+    vigente = (
+        manifiesto is not None
+        and manifiesto.get('version') == VERSION_PARTICIONES
+        and {**cache._firma(ruta), 'ruta': str(ruta)} == manifiesto['origen']
+    )
+    if not vigente:
+        construir_particiones(nombre, ruta=ruta, destino=carpeta)
+        manifiesto = _leer_manifiesto(carpeta)
+
+    particiones = manifiesto['particiones']
+    return {
+        'carpeta': carpeta,
+        'manifiesto': manifiesto,
+        'inicios': np.array([particion['inicio'] for particion in particiones], dtype='datetime64[ns]'),
+        'fines': np.array([particion['fin'] for particion in particiones], dtype='datetime64[ns]'),
+        'pozos': np.array([particion['pozo'] for particion in particiones], dtype=object),
+    }
+
+
+def _leer_manifiesto(carpeta):
+    """Lee el manifiesto del dataset particionado, o None si no existe o está dañado"""
+    try:
+        return json.loads((carpeta / _MANIFIESTO).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def seleccionar_particiones(particiones, inicio=None, fin=None, pozos=None):
+    """Posiciones (en el manifiesto) de las particiones que pueden tener filas del rango y los pozos.
+
+    Solo usa la primera y la última fecha de cada partición: no abre
+    ningún archivo.
+    """
+    elegidas = np.ones(len(particiones['inicios']), dtype=bool)
+    if inicio is not None:
+        elegidas &= particiones['fines'] >= _limite(inicio, False).to_datetime64()
+    if fin is not None:
+        elegidas &= particiones['inicios'] <= _limite(fin, True).to_datetime64()
+    if pozos is not None:
+        elegidas &= np.isin(particiones['pozos'], [str(pozo) for pozo in pozos])
+    return np.flatnonzero(elegidas)
+
+
+def leer_particiones(particiones, inicio=None, fin=None, pozos=None, columnas=None):
+    """Filas entre `inicio` y `fin` (inclusive, como `df.loc[inicio:fin]`) de los `pozos` pedidos.
+
+    Se leen solo las particiones que quedan después de la poda, y de cada
+    una solo el tramo del rango y las `columnas` pedidas (la fecha siempre
+    se incluye como índice). Las filas salen ordenadas por fecha; las de
+    igual fecha, por pozo.
+    """
+    manifiesto = particiones['manifiesto']
+    indice = manifiesto['indice']
+    descripciones = [descripcion for descripcion in manifiesto['columnas']
+                     if columnas is None or descripcion['nombre'] == indice or descripcion['nombre'] in columnas]
+    fecha = next(descripcion for descripcion in descripciones if descripcion['nombre'] == indice)
+    tipo_fecha = f"datetime64[{fecha['unidad']}]"
+    desde_fecha = None if inicio is None else _limite(inicio, False).to_datetime64()
+    hasta_fecha = None if fin is None else _limite(fin, True).to_datetime64()
+
+    tramos = {descripcion['nombre']: [] for descripcion in descripciones}
+    for posicion in seleccionar_particiones(particiones, inicio, fin, pozos):
+        carpeta = particiones['carpeta'] / manifiesto['particiones'][posicion]['carpeta']
+        tiempos = _leer_tramo(carpeta / fecha['archivo']).view(tipo_fecha)
+        desde = 0 if desde_fecha is None else int(np.searchsorted(tiempos, desde_fecha, side='left'))
+        hasta = len(tiempos) if hasta_fecha is None else int(np.searchsorted(tiempos, hasta_fecha, side='right'))
+        if desde == hasta:
+            continue
+        for descripcion in descripciones:
+            if descripcion is fecha:
+                tramo = tiempos[desde:hasta].view(np.int64)
+            else:
+                tramo = _leer_tramo(carpeta / descripcion['archivo'], desde, hasta)
+            tramos[descripcion['nombre']].append(tramo)
+
+    datos = {}
+    for descripcion in descripciones:
+        partes = tramos[descripcion['nombre']]
+        valores = np.concatenate(partes) if partes else np.empty(0, dtype=_tipo_guardado(descripcion))
+        datos[descripcion['nombre']] = valores
+    # Cada tramo ya está ordenado: el orden estable intercala los pozos por fecha
+    orden = np.argsort(datos[indice], kind='stable')
+    df = pd.DataFrame({nombre: cache.decodificar_columna(valores[orden], descripcion)
+                       for (nombre, valores), descripcion in zip(datos.items(), descripciones)}, copy=False)
+    df = df.set_index(indice)
+    df.index.name = manifiesto['nombre_indice']
+    return df
+
+
+def _leer_tramo(archivo, desde=0, hasta=None):
+    """Filas [desde, hasta) de un `.npy` unidimensional, leyendo solo esos bytes.
+
+    Las particiones son chicas: abrir cada archivo con `mmap_mode` cuesta
+    más que leer el encabezado y saltar al tramo pedido.
+    """
+    with open(archivo, 'rb') as entrada:
+        version = np.lib.format.read_magic(entrada)
+        if version == (1, 0):
+            forma, _, tipo = np.lib.format.read_array_header_1_0(entrada)
+        else:
+            forma, _, tipo = np.lib.format.read_array_header_2_0(entrada)
+        hasta = forma[0] if hasta is None else hasta
+        entrada.seek(desde * tipo.itemsize, os.SEEK_CUR)
+        return np.fromfile(entrada, dtype=tipo, count=hasta - desde)
+
+
+def _tipo_guardado(descripcion):
+    """Tipo NumPy con que se guardó una columna, para armar resultados vacíos"""
+    if descripcion['tipo'] in ('category', 'str'):
+        return np.int8
+    if descripcion['tipo'] == 'datetime':
+        return np.int64
+    return np.dtype(descripcion['tipo'])
@@ -0,0 +1,215 @@
+"""
+PERFILES DE CALENDARIO SIN COLUMNAS AUXILIARES
+Sesión 12: Series Temporales en Pandas
+
+El laboratorio 1 agrega 'año', 'mes', 'dia', 'hora' y 'dia_semana' como
+columnas completas al DataFrame de producción solo para agruparlas después
+por hora del día o día de la semana. Aquí el componente de calendario se
+calcula desde el índice de fechas con aritmética entera (truncar a horas,
+días o meses con los tipos datetime64 de NumPy) y las estadísticas salen de
+`np.bincount` y `ufunc.at` sobre esos códigos: no se copia el DataFrame ni
+se le agregan columnas.
+
+Con `columna_grupo` el perfil se calcula por pozo (o sensor) en la misma
+pasada, combinando el código del grupo con el del calendario. Varias
+métricas comparten los códigos.
+
+Uso:
+    por_hora = perfil_calendario(df['produccion_bpd'], 'hora', ['mean', 'std', 'min', 'max'])
+    por_pozo = perfil_calendario(df, 'dia_semana', columnas=['caudal_bpd'], columna_grupo='pozo_id')
+    perfiles = perfiles_calendario(df['produccion_bpd'], ['hora', 'dia_semana', 'mes'])
+"""
+
+import numpy as np
+import pandas as pd
+
+ESTADISTICAS = ('mean', 'std', 'var', 'min', 'max', 'count', 'sum')
+_CONSERVAN_TIPO = ('min', 'max', 'sum')
+
+# Campo: (cantidad de valores, primer valor). 'año' depende de los datos
+CAMPOS = {
+    'minuto': (60, 0),
+    'hora': (24, 0),
+    'dia_semana': (7, 0),
+    'dia': (31, 1),
+    'mes': (12, 1),
+    'trimestre': (4, 1),
+    'año': (None, None),
+}
+
+# Nombres de los atributos de DatetimeIndex aceptados como sinónimos
+_ALIAS = {
+    'minute': 'minuto',
+    'hour': 'hora',
+    'dayofweek': 'dia_semana',
+    'day_of_week': 'dia_semana',
+    'weekday': 'dia_semana',
+    'day': 'dia',
+    'month': 'mes',
+    'quarter': 'trimestre',
+    'year': 'año',
+}
+
+
+def _campo(campo):
+    campo = _ALIAS.get(campo, campo)
+    if campo not in CAMPOS:
+        raise ValueError(f"Campo de calendario no soportado: {campo}; use uno de {list(CAMPOS)}")
+    return campo
+
+
+def codigos_calendario(indice, campo):
+    """Códigos 0..k-1 del `campo` de cada fecha, k y el valor del primer código.
+
+    Las fechas con zona horaria se toman en hora local. Las fechas NaT
+    quedan con código -1.
+    """
+    campo = _campo(campo)
+    if not isinstance(indice, pd.DatetimeIndex):
+        raise TypeError("El perfil de calendario necesita un DatetimeIndex")
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    fechas = indice.to_numpy()
+    nulas = np.isnat(fechas)
+
+    if campo == 'minuto':
+        codigos = fechas.astype('M8[m]').astype(np.int64) % 60
+    elif campo == 'hora':
+        codigos = fechas.astype('M8[h]').astype(np.int64) % 24
+    elif campo == 'dia_semana':
+        # El 1970-01-01 fue jueves (3 con lunes = 0)
+        codigos = (fechas.astype('M8[D]').astype(np.int64) + 3) % 7
+    elif campo == 'dia':
+        codigos = (fechas.astype('M8[D]') - fechas.astype('M8[M]').astype('M8[D]')).astype(np.int64)
+    elif campo in ('mes', 'trimestre'):
+        codigos = fechas.astype('M8[M]').astype(np.int64) % 12
+        if campo == 'trimestre':
+            codigos //= 3
+    else:
+        anios = fechas.astype('M8[Y]').astype(np.int64)
+        primero = int(anios[~nulas].min()) if (~nulas).any() else 0
+        codigos = anios - primero
+        codigos[nulas] = -1
+        return codigos, int(codigos.max()) + 1 if len(codigos) else 0, 1970 + primero
+
+    k, base = CAMPOS[campo]
+    codigos[nulas] = -1
+    return codigos, k, base
+
+
+def _estadisticas(codigos, valores, k, estadisticas):
+    """{estadistica: arreglo de largo k} de `valores` agrupados por `codigos` (0..k-1)"""
+    validos = ~np.isnan(valores)
+    c, v = (codigos, valores) if validos.all() else (codigos[validos], valores[validos])
+    conteo = np.bincount(c, minlength=k)
+    suma = np.bincount(c, weights=v, minlength=k)
+    vacios = conteo == 0
+    resultado = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = suma / conteo
+        if 'std' in estadisticas or 'var' in estadisticas:
+            # Segunda pasada sobre los desvíos: la fórmula con sumas de cuadrados pierde precisión
+            m2 = np.bincount(c, weights=(v - media[c]) ** 2, minlength=k)
+            varianza = np.where(conteo > 1, m2 / (conteo - 1), np.nan)
+    for estadistica in estadisticas:
+        if estadistica == 'mean':
+            resultado[estadistica] = media
+        elif estadistica == 'std':
+            resultado[estadistica] = np.sqrt(varianza)
+        elif estadistica == 'var':
+            resultado[estadistica] = varianza
+        elif estadistica == 'count':
+            resultado[estadistica] = conteo
+        elif estadistica == 'sum':
+            resultado[estadistica] = suma
+        else:
+            extremo = np.full(k, np.inf if estadistica == 'min' else -np.inf)
+            (np.minimum if estadistica == 'min' else np.maximum).at(extremo, c, v)
+            extremo[vacios] = np.nan
+            resultado[estadistica] = extremo
+    return resultado
+
+
+def _preparar(datos, columnas, columna_grupo):
+    """(columnas, valores float64 de cada columna, tipos originales, códigos de grupo, nombres de grupo)"""
+    if isinstance(datos, pd.Series):
+        columnas = [datos.name]
+        series = [datos]
+    else:
+        if columnas is None:
+            columnas = [columna for columna in datos.select_dtypes('number').columns if columna != columna_grupo]
+        columnas = list(columnas)
+        series = [datos[columna] for columna in columnas]
+    valores = [serie.to_numpy(dtype=np.float64, na_value=np.nan) for serie in series]
+    tipos = [serie.dtype for serie in series]
+    if columna_grupo is None:
+        return columnas, valores, tipos, None, None
+    grupos, nombres = pd.factorize(datos[columna_grupo], sort=True)
+    return columnas, valores, tipos, grupos, nombres
+
+
+def _perfil(datos, campo, estadisticas, columnas, valores, tipos, grupos, nombres, columna_grupo):
+    codigos, k, base = codigos_calendario(datos.index, campo)
+    nombre = _campo(campo)
+    if grupos is not None:
+        codigos = np.where((grupos >= 0) & (codigos >= 0), grupos * k + codigos, -1)
+        total = k * len(nombres)
+    else:
+        total = k
+    validos = codigos >= 0
+    if not validos.all():
+        codigos = codigos[validos]
+        valores = [serie[validos] for serie in valores]
+    # Como groupby: aparecen los valores del calendario presentes aunque sus métricas sean NaN
+    presentes = np.flatnonzero(np.bincount(codigos, minlength=total))
+
+    bloques = {}
+    for columna, serie, tipo in zip(columnas, valores, tipos):
+        calculadas = _estadisticas(codigos, serie, total, estadisticas)
+        for estadistica in estadisticas:
+            resultado = calculadas[estadistica][presentes]
+            # Como groupby: min, max y sum de enteros siguen siendo enteros
+            if estadistica in _CONSERVAN_TIPO and tipo.kind in 'iu' and not np.isnan(resultado).any():
+                resultado = resultado.astype(np.int64 if estadistica == 'sum' else tipo)
+            bloques[(columna, estadistica)] = resultado
+
+    etiquetas = presentes % k + base
+    if grupos is None:
+        indice = pd.Index(etiquetas, name=nombre)
+    else:
+        indice = pd.MultiIndex.from_arrays([nombres.take(presentes // k), etiquetas], names=[columna_grupo, nombre])
+    if isinstance(datos, pd.Series):
+        return pd.DataFrame({estadistica: bloques[(datos.name, estadistica)] for estadistica in estadisticas},
+                            index=indice)
+    return pd.DataFrame(bloques, index=indice, columns=pd.MultiIndex.from_tuples(list(bloques)))
+
+
+def perfil_calendario(datos, campo='hora', estadisticas=('mean', 'std', 'min', 'max', 'count'), columnas=None,
+                      columna_grupo=None):
+    """Estadísticas de `datos` por componente de calendario de su índice.
+
+    Equivale a `datos.groupby(datos.index.hour)[columnas].agg(estadisticas)`
+    (con `campo='hora'`) sin crear la columna auxiliar. `campo` es uno de
+    CAMPOS (o su nombre en pandas: 'hour', 'dayofweek', 'month'...). Con
+    `columna_grupo` el índice del resultado es (grupo, campo). Una Serie
+    devuelve una columna por estadística; un DataFrame, columnas
+    (columna, estadistica).
+    """
+    estadisticas = list(estadisticas)
+    desconocidas = set(estadisticas) - set(ESTADISTICAS)
+    if desconocidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(desconocidas)}")
+    columnas, valores, tipos, grupos, nombres = _preparar(datos, columnas, columna_grupo)
+    return _perfil(datos, campo, estadisticas, columnas, valores, tipos, grupos, nombres, columna_grupo)
+
+
+def perfiles_calendario(datos, campos=('hora', 'dia_semana', 'mes'),
+                        estadisticas=('mean', 'std', 'min', 'max', 'count'), columnas=None, columna_grupo=None):
+    """{campo: perfil} para varios campos, convirtiendo los valores y los grupos una sola vez"""
+    estadisticas = list(estadisticas)
+    desconocidas = set(estadisticas) - set(ESTADISTICAS)
+    if desconocidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(desconocidas)}")
+    columnas, valores, tipos, grupos, nombres = _preparar(datos, columnas, columna_grupo)
+    return {campo: _perfil(datos, campo, estadisticas, columnas, valores, tipos, grupos, nombres, columna_grupo)
+            for campo in campos}
@@ -0,0 +1,478 @@
+"""
+PIPELINE DIFERIDO CON ELIMINACIÓN DE SUBEXPRESIONES COMUNES
+Sesión 12: Series Temporales en Pandas
+
+Los laboratorios y la demostración recalculan los mismos pasos: la media
+móvil de 28 lecturas se calcula dos veces en la demostración, varios
+`resample('D')` repiten el mismo agrupamiento y `select_dtypes` se repite.
+Aquí cada paso (rolling, resample, diff, pct_change, aritmética...) se
+declara como un nodo y no se calcula hasta `evaluar`:
+
+- Dos nodos con la misma operación, parámetros y entradas son el mismo
+  nodo, así que declarar dos veces un paso no lo calcula dos veces.
+- `evaluar` recorre el grafo en orden topológico desde los objetivos y
+  libera cada resultado intermedio apenas lo usa su último consumidor.
+- Los rolling sobre la misma entrada se calculan juntos en una sola
+  pasada de `estadisticas_moviles` (medias, desvíos y ventanas a la vez).
+
+El grafo se puede armar con métodos parecidos a los de pandas o desde una
+especificación declarativa (ver `construir_pipeline`).
+
+Uso:
+    pipeline = Pipeline()
+    bpd = pipeline.fuente('produccion', 'produccion_historica')['produccion_bpd']
+    media = bpd.rolling(28).mean()
+    limite = media + 2 * bpd.rolling(28).std()
+    resultados = pipeline.evaluar({'media': media, 'limite': limite})
+"""
+
+import operator
+
+import pandas as pd
+
+from series_temporales.carga import cargar_dataset
+from series_temporales.categoricas import agregar_resample
+from series_temporales.perfiles import ESTADISTICAS as ESTADISTICAS_PERFIL, perfil_calendario
+from series_temporales.ventanas import ESTADISTICAS, estadisticas_moviles
+
+OPERACIONES = ('fuente', 'constante', 'columna', 'numericas', 'rolling', 'resample', 'diff', 'pct_change',
+               'aritmetica', 'agrupar', 'calendario', 'concatenar', 'metodo')
+
+_OPERADORES = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '&': operator.and_,
+    '|': operator.or_,
+}
+
+
+def _congelar(valor):
+    """Convierte parámetros (listas, diccionarios) en una clave hashable; el tipo distingue 2 de 2.0 y de True"""
+    if isinstance(valor, dict):
+        return ('dict', tuple((_congelar(clave), _congelar(v)) for clave, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return (type(valor).__name__, tuple(_congelar(v) for v in valor))
+    return (type(valor).__name__, valor)
+
+
+class Nodo:
+    """Paso diferido del pipeline: operación, parámetros y nodos de entrada.
+
+    No se construye directamente: lo devuelven `Pipeline` y los métodos de
+    otros nodos, que reutilizan el nodo existente si ya se declaró uno igual.
+    """
+
+    def __init__(self, pipeline, numero, operacion, parametros, entradas):
+        self.pipeline = pipeline
+        self.numero = numero
+        self.operacion = operacion
+        self.parametros = parametros
+        self.entradas = entradas
+
+    def __repr__(self):
+        detalle = ', '.join(f'{clave}={valor!r}' for clave, valor in self.parametros.items())
+        return f"Nodo({self.numero}: {self.operacion}({detalle}))"
+
+    # -- Selección de columnas ------------------------------------------------
+
+    def __getitem__(self, columna):
+        return self.pipeline._nodo('columna', (self,), nombre=columna)
+
+    def numericas(self):
+        """Columnas numéricas, como `select_dtypes(include=[np.number])`"""
+        return self.pipeline._nodo('numericas', (self,))
+
+    # -- Pasos temporales -----------------------------------------------------
+
+    def rolling(self, ventana, min_periods=None):
+        return _Rolling(self, ventana, min_periods)
+
+    def resample(self, freq):
+        return _Resample(self, freq)
+
+    def diff(self, periodos=1):
+        return self.pipeline._nodo('diff', (self,), periodos=periodos)
+
+    def pct_change(self, periodos=1):
+        return self.pipeline._nodo('pct_change', (self,), periodos=periodos)
+
+    def agrupar(self, por, especificacion):
+        """`groupby(por, observed=True).agg(especificacion)`"""
+        return self.pipeline._nodo('agrupar', (self,), por=por, especificacion=especificacion)
+
+    def calendario(self, campo, agregados, nombre=None):
+        """Agrega por un campo del índice de fechas ('hour', 'dayofweek', 'month'...)"""
+        return self.pipeline._nodo('calendario', (self,), campo=campo, agregados=agregados, nombre=nombre)
+
+    def metodo(self, nombre, *args, **kwargs):
+        """Llama a un método de pandas del resultado (fillna, corr, round, rename...)"""
+        return self.pipeline._nodo('metodo', (self,), nombre=nombre, args=args, kwargs=kwargs)
+
+    # -- Aritmética -------------------------------------------------------------
+
+    def _aritmetica(self, operador, otro, invertido=False):
+        if not isinstance(otro, Nodo):
+            otro = self.pipeline.constante(otro)
+        entradas = (otro, self) if invertido else (self, otro)
+        return self.pipeline._nodo('aritmetica', entradas, operador=operador)
+
+    def __add__(self, otro):
+        return self._aritmetica('+', otro)
+
+    def __radd__(self, otro):
+        return self._aritmetica('+', otro, invertido=True)
+
+    def __sub__(self, otro):
+        return self._aritmetica('-', otro)
+
+    def __rsub__(self, otro):
+        return self._aritmetica('-', otro, invertido=True)
+
+    def __mul__(self, otro):
+        return self._aritmetica('*', otro)
+
+    def __rmul__(self, otro):
+        return self._aritmetica('*', otro, invertido=True)
+
+    def __truediv__(self, otro):
+        return self._aritmetica('/', otro)
+
+    def __rtruediv__(self, otro):
+        return self._aritmetica('/', otro, invertido=True)
+
+    def __gt__(self, otro):
+        return self._aritmetica('>', otro)
+
+    def __lt__(self, otro):
+        return self._aritmetica('<', otro)
+
+    def __ge__(self, otro):
+        return self._aritmetica('>=', otro)
+
+    def __le__(self, otro):
+        return self._aritmetica('<=', otro)
+
+    def __and__(self, otro):
+        return self._aritmetica('&', otro)
+
+    def __or__(self, otro):
+        return self._aritmetica('|', otro)
+
+
+class _Rolling:
+    """Ventana móvil diferida; cada estadística devuelve un nodo"""
+
+    def __init__(self, nodo, ventana, min_periods):
+        self.nodo = nodo
+        self.ventana = ventana
+        self.min_periods = min_periods
+
+    def agg(self, estadistica):
+        if estadistica not in ESTADISTICAS:
+            raise ValueError(f"Estadística no soportada: {estadistica}")
+        return self.nodo.pipeline._nodo('rolling', (self.nodo,), ventana=self.ventana, estadistica=estadistica,
+                                        min_periods=self.min_periods)
+
+    def mean(self):
+        return self.agg('mean')
+
+    def std(self):
+        return self.agg('std')
+
+    def var(self):
+        return self.agg('var')
+
+    def sum(self):
+        return self.agg('sum')
+
+    def min(self):
+        return self.agg('min')
+
+    def max(self):
+        return self.agg('max')
+
+    def median(self):
+        return self.agg('median')
+
+
+class _Resample:
+    """Resample diferido"""
+
+    def __init__(self, nodo, freq):
+        self.nodo = nodo
+        self.freq = freq
+
+    def agg(self, especificacion):
+        return self.nodo.pipeline._nodo('resample', (self.nodo,), freq=self.freq, especificacion=especificacion)
+
+    def mean(self):
+        return self.agg('mean')
+
+
+# -- Ejecución de cada operación ---------------------------------------------------
+
+def _rolling_fusionado(entrada, nodos):
+    """Calcula en una pasada todos los rolling de `nodos` (misma entrada y min_periods)"""
+    estadisticas = list(dict.fromkeys(nodo.parametros['estadistica'] for nodo in nodos))
+    ventanas = list(dict.fromkeys(nodo.parametros['ventana'] for nodo in nodos))
+    tabla = estadisticas_moviles(entrada, estadisticas, ventanas, nodos[0].parametros['min_periods'])
+    resultados = {}
+    for nodo in nodos:
+        clave = (nodo.parametros['estadistica'], nodo.parametros['ventana'])
+        if isinstance(entrada, pd.Series):
+            resultados[nodo] = tabla[(tabla.columns[0][0],) + clave].rename(entrada.name)
+        else:
+            resultados[nodo] = pd.DataFrame({columna: tabla[(columna,) + clave] for columna in entrada.columns})
+    return resultados
+
+
+def _resample(entrada, freq, especificacion):
+    if isinstance(especificacion, dict) and isinstance(entrada, pd.DataFrame):
+        return agregar_resample(entrada, freq, especificacion)
+    return entrada.resample(freq).agg(especificacion)
+
+
+def _calendario(entrada, campo, agregados, nombre):
+    numericos = isinstance(entrada, pd.Series) or len(entrada.select_dtypes('number').columns) == entrada.shape[1]
+    if isinstance(agregados, (list, tuple)) and set(agregados) <= set(ESTADISTICAS_PERFIL) and numericos:
+        # Sin materializar la columna del componente de calendario
+        return perfil_calendario(entrada, campo, agregados).rename_axis(nombre or campo)
+    clave = pd.Index(getattr(entrada.index, campo), name=nombre or campo)
+    return entrada.groupby(clave).agg(agregados)
+
+
+def _ejecutar(nodo, entradas, fuentes):
+    """Resultado de un nodo a partir de los resultados de sus entradas"""
+    p = nodo.parametros
+    operacion = nodo.operacion
+    if operacion == 'fuente':
+        if p['nombre'] in fuentes:
+            return fuentes[p['nombre']]
+        return cargar_dataset(p['dataset'] or p['nombre'])
+    if operacion == 'constante':
+        return p['valor']
+    if operacion == 'columna':
+        return entradas[0][p['nombre']]
+    if operacion == 'numericas':
+        return entradas[0].select_dtypes('number')
+    if operacion == 'resample':
+        return _resample(entradas[0], p['freq'], p['especificacion'])
+    if operacion == 'diff':
+        return entradas[0].diff(p['periodos'])
+    if operacion == 'pct_change':
+        return entradas[0].pct_change(p['periodos'])
+    if operacion == 'aritmetica':
+        return _OPERADORES[p['operador']](*entradas)
+    if operacion == 'agrupar':
+        return entradas[0].groupby(p['por'], observed=True).agg(p['especificacion'])
+    if operacion == 'calendario':
+        return _calendario(entradas[0], p['campo'], p['agregados'], p['nombre'])
+    if operacion == 'concatenar':
+        return pd.concat(entradas, axis=p['eje'])
+    if operacion == 'metodo':
+        return getattr(entradas[0], p['nombre'])(*p['args'], **p['kwargs'])
+    raise ValueError(f"Operación desconocida: {operacion}")
+
+
+class Pipeline:
+    """Grafo de pasos diferidos con nodos únicos por (operación, parámetros, entradas)"""
+
+    def __init__(self):
+        self._nodos = {}
+        self.declarados = 0
+        self.resumen = {}
+
+    def _nodo(self, operacion, entradas=(), **parametros):
+        """Devuelve el nodo existente con la misma clave o crea uno nuevo"""
+        if operacion not in OPERACIONES:
+            raise ValueError(f"Operación no soportada: {operacion}")
+        self.declarados += 1
+        clave = (operacion, _congelar(parametros), tuple(entrada.numero for entrada in entradas))
+        nodo = self._nodos.get(clave)
+        if nodo is None:
+            nodo = Nodo(self, len(self._nodos), operacion, parametros, tuple(entradas))
+            self._nodos[clave] = nodo
+        return nodo
+
+    def fuente(self, nombre, dataset=None):
+        """Datos de entrada; en `evaluar` se toman de `fuentes` o se cargan con `cargar_dataset(dataset)`"""
+        return self._nodo('fuente', nombre=nombre, dataset=dataset)
+
+    def constante(self, valor):
+        return self._nodo('constante', valor=valor)
+
+    def concatenar(self, nodos, eje=1):
+        """`pd.concat(nodos, axis=eje)`"""
+        return self._nodo('concatenar', tuple(nodos), eje=eje)
+
+    # -- Planificación ---------------------------------------------------------
+
+    def planificar(self, objetivos):
+        """Orden de ejecución desde los objetivos y qué resultados liberar después de cada paso.
+
+        Devuelve una lista de (nodo, nodos a liberar): un intermedio se
+        libera después de su último consumidor; los objetivos no se liberan.
+        """
+        objetivos = set(objetivos)
+        orden, visitados = [], set()
+        pendientes = [(nodo, False) for nodo in sorted(objetivos, key=lambda nodo: -nodo.numero)]
+        while pendientes:
+            nodo, listo = pendientes.pop()
+            if listo:
+                orden.append(nodo)
+                continue
+            if nodo in visitados:
+                continue
+            visitados.add(nodo)
+            pendientes.append((nodo, True))
+            pendientes.extend((entrada, False) for entrada in reversed(nodo.entradas) if entrada not in visitados)
+
+        ultimo_uso = {}
+        for paso, nodo in enumerate(orden):
+            for entrada in nodo.entradas:
+                ultimo_uso[entrada] = paso
+        liberar = [[] for _ in orden]
+        for nodo, paso in ultimo_uso.items():
+            if nodo not in objetivos:
+                liberar[paso].append(nodo)
+        return list(zip(orden, liberar))
+
+    def describir_plan(self, objetivos):
+        """El plan como DataFrame: paso, nodo, operación, entradas y resultados liberados"""
+        objetivos = objetivos.values() if isinstance(objetivos, dict) else objetivos
+        return pd.DataFrame([
+            {'nodo': nodo.numero, 'operacion': nodo.operacion,
+             'entradas': [entrada.numero for entrada in nodo.entradas],
+             'libera': [liberado.numero for liberado in liberados]}
+            for nodo, liberados in self.planificar(objetivos)
+        ]).rename_axis('paso')
+
+    # -- Evaluación ------------------------------------------------------------
+
+    @staticmethod
+    def _paso(nodo, entradas, fuentes, grupos_rolling, resultados):
+        """Ejecuta un nodo y guarda su resultado; devuelve 1 si fue una pasada de rolling"""
+        if nodo.operacion == 'rolling':
+            grupo = grupos_rolling[(nodo.entradas[0], nodo.parametros['min_periods'])]
+            resultados.update(_rolling_fusionado(entradas[0], grupo))
+            return 1
+        resultados[nodo] = _ejecutar(nodo, entradas, fuentes)
+        return 0
+
+    def evaluar(self, objetivos, fuentes=None, instrumentacion=None):
+        """Calcula los objetivos ({nombre: nodo} o lista de nodos) y devuelve sus resultados.
+
+        `fuentes` es {nombre: DataFrame} para los nodos de fuente; las que
+        falten se cargan con `cargar_dataset`. En `self.resumen` quedan los
+        nodos declarados, distintos y ejecutados, las pasadas de rolling y el
+        máximo de resultados en memoria a la vez. Con una `Instrumentacion`,
+        cada paso ejecutado se registra como una etapa con el nombre de su
+        operación y las filas de su primera entrada.
+        """
+        fuentes = fuentes or {}
+        nombres = objetivos if isinstance(objetivos, dict) else dict(enumerate(objetivos))
+        plan = self.planificar(nombres.values())
+        etiquetas = {nodo: str(nombre) for nombre, nodo in nombres.items()}
+
+        # Rolling pendientes agrupados por (entrada, min_periods) para calcularlos juntos
+        grupos_rolling = {}
+        for nodo, _ in plan:
+            if nodo.operacion == 'rolling':
+                grupos_rolling.setdefault((nodo.entradas[0], nodo.parametros['min_periods']), []).append(nodo)
+
+        resultados = {}
+        pasadas_rolling = 0
+        maximo = 0
+        for nodo, liberados in plan:
+            if nodo not in resultados:
+                entradas = [resultados[entrada] for entrada in nodo.entradas]
+                if instrumentacion is None:
+                    pasadas_rolling += self._paso(nodo, entradas, fuentes, grupos_rolling, resultados)
+                else:
+                    with instrumentacion.etapa(nodo.operacion, detalle=etiquetas.get(nodo, f'nodo {nodo.numero}')) \
+                            as registro:
+                        pasadas_rolling += self._paso(nodo, entradas, fuentes, grupos_rolling, resultados)
+                        medido = entradas[0] if entradas else resultados[nodo]
+                        registro.filas = len(medido) if hasattr(medido, '__len__') else None
+            maximo = max(maximo, len(resultados))
+            for liberado in liberados:
+                del resultados[liberado]
+
+        self.resumen = {
+            'declarados': self.declarados,
+            'distintos': len(self._nodos),
+            'ejecutados': len(plan),
+            'pasadas_rolling': pasadas_rolling,
+            'maximo_en_memoria': maximo,
+        }
+        salida = {nombre: resultados[nodo] for nombre, nodo in nombres.items()}
+        return salida if isinstance(objetivos, dict) else list(salida.values())
+
+
+def _construir_entrada(entrada, pipeline, nodos):
+    """Nodo de una entrada de la especificación: nombre, paso anónimo (tupla) o constante"""
+    if isinstance(entrada, str):
+        if entrada not in nodos:
+            raise ValueError(f"Referencia desconocida en la especificación: {entrada}")
+        return nodos[entrada]
+    if isinstance(entrada, tuple):
+        return _construir_paso(entrada, pipeline, nodos)
+    return pipeline.constante(entrada)
+
+
+def _construir_paso(paso, pipeline, nodos):
+    """Nodo de un paso (operacion, entradas, parametros) de la especificación"""
+    operacion, entradas = paso[0], paso[1]
+    parametros = dict(paso[2]) if len(paso) > 2 else {}
+    entradas = [entradas] if isinstance(entradas, (str, tuple)) else list(entradas)
+    entradas = [_construir_entrada(entrada, pipeline, nodos) for entrada in entradas]
+    if operacion in _OPERADORES:
+        return pipeline._nodo('aritmetica', entradas, operador=operacion)
+    if operacion == 'columna':
+        return entradas[0][parametros['nombre']]
+    if operacion == 'numericas':
+        return entradas[0].numericas()
+    if operacion == 'rolling':
+        return entradas[0].rolling(parametros['ventana'], parametros.get('min_periods')).agg(
+            parametros['estadistica'])
+    if operacion == 'resample':
+        return entradas[0].resample(parametros['freq']).agg(parametros['especificacion'])
+    if operacion in ('diff', 'pct_change'):
+        return getattr(entradas[0], operacion)(parametros.get('periodos', 1))
+    if operacion == 'agrupar':
+        return entradas[0].agrupar(parametros['por'], parametros['especificacion'])
+    if operacion == 'calendario':
+        return entradas[0].calendario(parametros['campo'], parametros['agregados'], parametros.get('nombre'))
+    if operacion == 'concatenar':
+        return pipeline.concatenar(entradas, parametros.get('eje', 1))
+    if operacion == 'metodo':
+        return entradas[0].metodo(parametros['nombre'], *parametros.get('args', ()), **parametros.get('kwargs', {}))
+    raise ValueError(f"Operación no soportada en la especificación: {operacion}")
+
+
+def construir_pipeline(especificacion, pipeline=None):
+    """Arma el pipeline desde una especificación declarativa.
+
+    La especificación es un diccionario con:
+    - 'fuentes': {alias: nombre del dataset} (nombre None si los datos se
+      pasan a `evaluar` en `fuentes`).
+    - 'pasos': {nombre: (operacion, entradas, parametros)}, donde las
+      entradas son nombres de fuentes o de pasos anteriores, pasos anónimos
+      con la misma forma o constantes, y la operación es una de
+      `OPERACIONES` o un operador ('+', '*', '>', '|'...).
+
+    Devuelve (pipeline, {nombre: nodo}) con las fuentes y todos los pasos.
+    Los pasos repetidos, con nombre o anónimos, se convierten en un solo
+    nodo.
+    """
+    pipeline = pipeline or Pipeline()
+    nodos = {alias: pipeline.fuente(alias, dataset) for alias, dataset in especificacion.get('fuentes', {}).items()}
+    for nombre, paso in especificacion['pasos'].items():
+        nodos[nombre] = _construir_paso(paso, pipeline, nodos)
+    return pipeline, nodos
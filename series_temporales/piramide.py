@@ -0,0 +1,84 @@
+"""
+PIRÁMIDE DE RESAMPLING MULTIRESOLUCIÓN
+Sesión 12: Series Temporales en Pandas
+
+Calcula varios resamplings de los mismos datos (por ejemplo 15min, h, 6h,
+D y W) recorriendo los datos originales una sola vez. El nivel más fino se
+calcula desde los datos como agregados parciales combinables (ver
+`agregados.py`) y cada nivel más grueso se arma combinando los parciales
+del nivel anterior en el que sus intervalos caben completos: 15min → h →
+6h → D → W. Cada nivel cuesta lo que tiene filas el nivel de origen, no los
+datos originales.
+
+Uso:
+    niveles = piramide_resample(df_sensores['valor'], ['15min', 'h', '6h', 'D', 'W'])
+    niveles['D']  # igual a df_sensores.resample('D')['valor'].agg(['mean', 'std', 'count'])
+"""
+
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from series_temporales.agregados import (
+    duracion_fija,
+    finalizar_parciales,
+    origen_intervalos,
+    parciales_resample,
+    reagrupar_parciales,
+)
+
+_UN_DIA = pd.Timedelta(days=1)
+
+
+def _duracion_aproximada(offset):
+    """Duración típica de un intervalo, para ordenar frecuencias de fina a gruesa"""
+    base = pd.Timestamp('2000-01-03')
+    return (base + 2 * offset) - (base + offset)
+
+
+def _anida(fina, gruesa):
+    """Indica si cada intervalo de `fina` cae completo dentro de uno de `gruesa`.
+
+    Ambas se alinean con la medianoche del primer día, así que una frecuencia
+    fija anida en otra si la divide, y en una de calendario (W, MS, ME...) si
+    divide al día.
+    """
+    duracion_fina = duracion_fija(fina)
+    if duracion_fina is None:
+        return False
+    duracion_gruesa = duracion_fija(gruesa)
+    if duracion_gruesa is not None:
+        return duracion_gruesa % duracion_fina == pd.Timedelta(0)
+    return _UN_DIA % duracion_fina == pd.Timedelta(0)
+
+
+def piramide_parciales(df, frecuencias, columnas):
+    """Parciales de cada frecuencia; cada nivel se arma desde el más grueso que anida en él"""
+    offsets = {freq: to_offset(freq) for freq in frecuencias}
+    orden = sorted(frecuencias, key=lambda freq: _duracion_aproximada(offsets[freq]))
+    origen = origen_intervalos(df.index)
+
+    niveles = {}
+    for freq in orden:
+        fuentes = [previa for previa in niveles if _anida(offsets[previa], offsets[freq])]
+        if fuentes:
+            # La fuente más gruesa es la que tiene menos filas
+            fuente = min(fuentes, key=lambda previa: len(niveles[previa]))
+            niveles[freq] = reagrupar_parciales(niveles[fuente], freq, origen)
+        else:
+            niveles[freq] = parciales_resample(df, freq, columnas, origen=origen)
+    return niveles
+
+
+def piramide_resample(datos, frecuencias, agregados=('mean', 'std', 'count'), columnas=None):
+    """Resample de `datos` a todas las `frecuencias` en una sola llamada.
+
+    Acepta una Serie o un DataFrame con DatetimeIndex. Devuelve un
+    diccionario {frecuencia: resultado}, donde cada resultado es igual a
+    `datos.resample(freq).agg(agregados)` (columnas simples para una Serie
+    o una sola columna; MultiIndex (columna, agregado) para varias).
+    """
+    if isinstance(datos, pd.Series):
+        datos = datos.to_frame()
+    columnas = list(datos.columns if columnas is None else columnas)
+    niveles = piramide_parciales(datos, frecuencias, columnas)
+    return {freq: finalizar_parciales(niveles[freq], agregados, freq=freq) for freq in frecuencias}
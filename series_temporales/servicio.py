@@ -0,0 +1,420 @@
+"""
+SERVICIO DE INGESTA EN VIVO DE SENSORES
+Sesión 12: Series Temporales en Pandas
+
+Todo lo demás del paquete trabaja por lotes sobre `sensores_temporales.csv`.
+Este servicio asyncio recibe las lecturas a medida que llegan, como líneas
+con el esquema del CSV (`timestamp,sensor_id,pozo_id,tipo_sensor,valor,
+unidad,calidad_dato`), por un socket TCP o Unix local o siguiendo un archivo
+que crece (`tail -f`). Por cada sensor mantiene en memoria:
+
+- Agregados por intervalo de 1 hora, 6 horas y 1 día (conteo, media,
+  desviación, mínimo y máximo), alineados como `resample`. El intervalo
+  abierto se actualiza en O(1) por lectura y al cerrarse pasa a un
+  historial acotado.
+- Un `DetectorLimites` con la ventana de 28 lecturas y ± 3 desviaciones del
+  laboratorio 3; cada lectura fuera de los límites se publica como alerta
+  en el mismo paso, sin esperar a que cierre ningún intervalo.
+
+Las alertas llegan a las colas de `suscribir()`. Las líneas se leen por
+bloques y se procesan sin pandas; cada alerta lleva el instante en que se
+recibió su bloque para medir la latencia de publicación.
+
+Uso:
+    servicio = ServicioIngesta()
+    alertas = servicio.suscribir()
+    servidor = await servicio.servir_tcp(puerto=8765)
+    ...
+    await reproducir('datos/sensores_temporales.csv', puerto=8765, velocidad=3600)
+    servicio.agregados('6h')
+
+Desde la línea de comandos (las alertas salen como JSON, una por línea):
+    python -m series_temporales.servicio servir --puerto 8765
+    python -m series_temporales.servicio reproducir datos/sensores_temporales.csv --puerto 8765 --velocidad 3600
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from series_temporales.anomalias import DetectorLimites
+
+COLUMNAS = ('timestamp', 'sensor_id', 'pozo_id', 'tipo_sensor', 'valor', 'unidad', 'calidad_dato')
+
+FRECUENCIAS = ('h', '6h', 'D')
+
+_EPOCA = datetime(1970, 1, 1)
+_MICROSEGUNDO = timedelta(microseconds=1)
+# Unas 200 lecturas: acota lo que espera una alerta antes de que corran los suscriptores
+_BLOQUE = 1 << 14
+_DIA = 86_400 * 10**9
+
+
+class _Intervalo:
+    """Agregado de un intervalo abierto: conteo, media y M2 (Welford), mínimo y máximo"""
+
+    __slots__ = ('inicio', 'lecturas', 'conteo', 'media', 'm2', 'minimo', 'maximo')
+
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.lecturas = 0
+        self.conteo = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def agregar(self, valor):
+        self.lecturas += 1
+        if valor != valor:  # NaN: cuenta como lectura pero no entra en las estadísticas
+            return
+        self.conteo += 1
+        delta = valor - self.media
+        self.media += delta / self.conteo
+        self.m2 += delta * (valor - self.media)
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def resultado(self):
+        """(inicio, count, mean, std, min, max) con NaN donde no hay lecturas, como `resample`"""
+        if self.conteo == 0:
+            return self.inicio, 0, math.nan, math.nan, math.nan, math.nan
+        desviacion = math.sqrt(max(self.m2, 0.0) / (self.conteo - 1)) if self.conteo > 1 else math.nan
+        return self.inicio, self.conteo, self.media, desviacion, self.minimo, self.maximo
+
+
+class _Sensor:
+    """Estado en memoria de un sensor: intervalos abiertos, historial y detector"""
+
+    __slots__ = ('descripcion', 'abiertos', 'cerrados', 'detector', 'ultima')
+
+    def __init__(self, descripcion, frecuencias, historia, ventana, sigmas):
+        self.descripcion = descripcion
+        self.abiertos = [None] * len(frecuencias)
+        self.cerrados = [deque(maxlen=historia) for _ in frecuencias]
+        self.detector = DetectorLimites(ventana=ventana, sigmas=sigmas)
+        self.ultima = -math.inf
+
+
+class ServicioIngesta:
+    """Agregados móviles y límites de control por sensor sobre lecturas en vivo.
+
+    `frecuencias` son los intervalos de los agregados (alias de pandas de
+    ancho fijo que dividen el día); `historia` es la cantidad de intervalos
+    cerrados que se conservan por sensor y frecuencia. `ventana` y `sigmas`
+    configuran el detector de cada sensor. `maximo_alertas` acota cada cola de
+    suscripción: si un suscriptor no consume, se descartan sus alertas más
+    antiguas en lugar de frenar la ingesta.
+    """
+
+    def __init__(self, frecuencias=FRECUENCIAS, historia=48, ventana=28, sigmas=3, maximo_alertas=10_000):
+        self.frecuencias = tuple(frecuencias)
+        self._anchos = [to_offset(frecuencia).nanos for frecuencia in self.frecuencias]
+        # Los intervalos se alinean desde la época: coincide con `resample` si dividen el día
+        if any(_DIA % ancho for ancho in self._anchos):
+            raise ValueError(f"Las frecuencias deben dividir el día en partes iguales: {self.frecuencias}")
+        self.historia = historia
+        self.ventana = ventana
+        self.sigmas = sigmas
+        self.maximo_alertas = maximo_alertas
+        self.sensores = {}
+        self._suscriptores = []
+        self._ultimo_texto = None
+        self._ultimo_ns = 0
+        self.lineas = 0
+        self.lecturas = 0
+        self.invalidas = 0
+        self.tardias = 0
+        self.alertas = 0
+
+    # -- Procesamiento -------------------------------------------------------
+
+    def _nanosegundos(self, texto):
+        """Fecha 'AAAA-MM-DD HH:MM:SS' en ns desde la época; las lecturas de un mismo instante la reutilizan"""
+        if texto != self._ultimo_texto:
+            self._ultimo_ns = (datetime.fromisoformat(texto) - _EPOCA) // _MICROSEGUNDO * 1000
+            self._ultimo_texto = texto
+        return self._ultimo_ns
+
+    def procesar_linea(self, linea, recibido=None):
+        """Incorpora una línea CSV y devuelve la alerta publicada, o None.
+
+        Las líneas vacías o de encabezado se ignoran; las que no se pueden
+        interpretar se cuentan en `invalidas` y las anteriores a la última
+        lectura del mismo sensor, en `tardias` (sus intervalos ya se
+        cerraron).
+        """
+        self.lineas += 1
+        campos = linea.rstrip('\r\n').split(',')
+        if campos[0] in ('', COLUMNAS[0]):
+            return None
+        if len(campos) != len(COLUMNAS):
+            self.invalidas += 1
+            return None
+        try:
+            instante = self._nanosegundos(campos[0])
+            valor = float(campos[4]) if campos[4] else math.nan
+        except ValueError:
+            self.invalidas += 1
+            return None
+
+        sensor = self.sensores.get(campos[1])
+        if sensor is None:
+            descripcion = dict(zip(('sensor_id', 'pozo_id', 'tipo_sensor', 'unidad'), campos[1:4] + campos[5:6]))
+            sensor = self.sensores[campos[1]] = _Sensor(descripcion, self.frecuencias, self.historia,
+                                                        self.ventana, self.sigmas)
+        if instante < sensor.ultima:
+            self.tardias += 1
+            return None
+        sensor.ultima = instante
+        self.lecturas += 1
+
+        for posicion, ancho in enumerate(self._anchos):
+            inicio = instante - instante % ancho
+            abierto = sensor.abiertos[posicion]
+            if abierto is None or abierto.inicio != inicio:
+                if abierto is not None:
+                    sensor.cerrados[posicion].append(abierto.resultado())
+                abierto = sensor.abiertos[posicion] = _Intervalo(inicio)
+            abierto.agregar(valor)
+
+        media, _, superior, inferior, es_anomalia = sensor.detector.agregar(valor)
+        if not es_anomalia:
+            return None
+        alerta = {
+            **sensor.descripcion,
+            'timestamp': campos[0],
+            'valor': valor,
+            'media': media,
+            'limite_inferior': inferior,
+            'limite_superior': superior,
+            'calidad_dato': campos[6],
+            'recibido': time.perf_counter() if recibido is None else recibido,
+        }
+        self._publicar(alerta)
+        return alerta
+
+    def procesar_bloque(self, texto, recibido=None):
+        """Procesa varias líneas completas separadas por '\\n'"""
+        recibido = time.perf_counter() if recibido is None else recibido
+        for linea in texto.split('\n'):
+            if linea:
+                self.procesar_linea(linea, recibido)
+
+    # -- Alertas -------------------------------------------------------------
+
+    def suscribir(self):
+        """Cola asyncio que recibe cada alerta publicada desde ahora"""
+        cola = asyncio.Queue(maxsize=self.maximo_alertas)
+        self._suscriptores.append(cola)
+        return cola
+
+    def desuscribir(self, cola):
+        self._suscriptores.remove(cola)
+
+    def _publicar(self, alerta):
+        self.alertas += 1
+        for cola in self._suscriptores:
+            if cola.full():
+                cola.get_nowait()
+            cola.put_nowait(alerta)
+
+    # -- Entradas ------------------------------------------------------------
+
+    async def _consumir(self, lector):
+        """Lee bloques de un StreamReader hasta el fin y procesa las líneas completas"""
+        resto = b''
+        while bloque := await lector.read(_BLOQUE):
+            recibido = time.perf_counter()
+            completas, _, resto = (resto + bloque).rpartition(b'\n')
+            if completas:
+                self.procesar_bloque(completas.decode('utf-8'), recibido)
+            # `read` no cede el control si ya hay datos en el buffer: sin esta
+            # pausa los suscriptores no verían las alertas hasta vaciarlo
+            await asyncio.sleep(0)
+        if resto:
+            self.procesar_bloque(resto.decode('utf-8'))
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión: procesa las lecturas hasta que el cliente cierra"""
+        try:
+            await self._consumir(lector)
+        finally:
+            escritor.close()
+
+    async def servir_tcp(self, host='127.0.0.1', puerto=8765):
+        """Servidor TCP local; devuelve el `asyncio.Server` (ya escuchando)"""
+        return await asyncio.start_server(self.atender, host, puerto, limit=_BLOQUE)
+
+    async def servir_unix(self, ruta):
+        """Servidor en un socket Unix; devuelve el `asyncio.Server` (ya escuchando)"""
+        return await asyncio.start_unix_server(self.atender, ruta, limit=_BLOQUE)
+
+    async def seguir_archivo(self, ruta, desde_inicio=False, espera=0.05):
+        """Sigue un archivo que crece (como `tail -f`) hasta que se cancele la tarea.
+
+        Sin `desde_inicio` solo se procesan las líneas agregadas después de
+        abrirlo. Una línea sin terminar espera al bloque siguiente.
+        """
+        with open(ruta, 'rb') as archivo:
+            if not desde_inicio:
+                archivo.seek(0, 2)
+            resto = b''
+            while True:
+                bloque = archivo.read(_BLOQUE)
+                if not bloque:
+                    await asyncio.sleep(espera)
+                    continue
+                recibido = time.perf_counter()
+                completas, _, resto = (resto + bloque).rpartition(b'\n')
+                if completas:
+                    self.procesar_bloque(completas.decode('utf-8'), recibido)
+                await asyncio.sleep(0)
+
+    # -- Consultas -----------------------------------------------------------
+
+    def agregados(self, frecuencia='h', sensor_id=None, incluir_abierto=True):
+        """DataFrame (sensor_id, inicio) con count, mean, std, min y max de cada intervalo.
+
+        Los intervalos cerrados dan lo mismo que
+        `df.groupby('sensor_id').resample(frecuencia)['valor'].agg(...)` en
+        los intervalos con lecturas. Con `incluir_abierto` se agrega el
+        intervalo en curso de cada sensor.
+        """
+        posicion = self.frecuencias.index(frecuencia)
+        sensores = self.sensores if sensor_id is None else {sensor_id: self.sensores[sensor_id]}
+        filas = []
+        for nombre, sensor in sensores.items():
+            intervalos = list(sensor.cerrados[posicion])
+            if incluir_abierto and sensor.abiertos[posicion] is not None:
+                intervalos.append(sensor.abiertos[posicion].resultado())
+            filas.extend((nombre, *intervalo) for intervalo in intervalos)
+        df = pd.DataFrame(filas, columns=['sensor_id', 'inicio', 'count', 'mean', 'std', 'min', 'max'])
+        df['inicio'] = pd.to_datetime(df['inicio'], unit='ns')
+        return df.set_index(['sensor_id', 'inicio']).sort_index()
+
+    def limites(self):
+        """DataFrame por sensor con lecturas, media, desviación y límites actuales del detector"""
+        filas = {}
+        for nombre, sensor in self.sensores.items():
+            media, desviacion, superior, inferior = sensor.detector._limites()
+            filas[nombre] = {**sensor.descripcion, 'lecturas': sensor.detector.lecturas, 'media': media,
+                             'desviacion': desviacion, 'limite_superior': superior, 'limite_inferior': inferior}
+        return pd.DataFrame.from_dict(filas, orient='index').drop(columns='sensor_id', errors='ignore')
+
+    def resumen(self):
+        """Contadores del servicio"""
+        return {
+            'sensores': len(self.sensores),
+            'lineas': self.lineas,
+            'lecturas': self.lecturas,
+            'invalidas': self.invalidas,
+            'tardias': self.tardias,
+            'alertas': self.alertas,
+        }
+
+
+async def reproducir(ruta, puerto=8765, host='127.0.0.1', unix=None, velocidad=None, lineas_por_envio=1000):
+    """Envía las lecturas de un CSV al servicio, como lo haría el gateway de campo.
+
+    Con `velocidad=None` las envía tan rápido como el socket las acepta; con
+    un número respeta el tiempo entre lecturas acelerado por ese factor
+    (3600: una hora de datos por segundo). Devuelve la cantidad de líneas
+    enviadas.
+    """
+    if unix is not None:
+        _, escritor = await asyncio.open_unix_connection(unix)
+    else:
+        _, escritor = await asyncio.open_connection(host, puerto)
+
+    enviadas = 0
+    lote = []
+    primera = comienzo = None
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            encabezado = archivo.readline()
+            if not encabezado.startswith(COLUMNAS[0]):
+                lote.append(encabezado)
+            for linea in archivo:
+                if velocidad is not None:
+                    instante = datetime.fromisoformat(linea[:linea.index(',')])
+                    if primera is None:
+                        primera, comienzo = instante, time.perf_counter()
+                    adelanto = (instante - primera).total_seconds() / velocidad - (time.perf_counter() - comienzo)
+                    if adelanto > 0:
+                        escritor.write(''.join(lote).encode('utf-8'))
+                        enviadas += len(lote)
+                        lote = []
+                        await escritor.drain()
+                        await asyncio.sleep(adelanto)
+                lote.append(linea if linea.endswith('\n') else linea + '\n')
+                if len(lote) >= lineas_por_envio:
+                    escritor.write(''.join(lote).encode('utf-8'))
+                    enviadas += len(lote)
+                    lote = []
+                    await escritor.drain()
+        escritor.write(''.join(lote).encode('utf-8'))
+        enviadas += len(lote)
+        await escritor.drain()
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+    return enviadas
+
+
+async def _servir(argumentos):
+    servicio = ServicioIngesta()
+    alertas = servicio.suscribir()
+    tareas = []
+    if argumentos.unix:
+        servidor = await servicio.servir_unix(argumentos.unix)
+    else:
+        servidor = await servicio.servir_tcp(argumentos.host, argumentos.puerto)
+    if argumentos.seguir:
+        tareas.append(asyncio.create_task(servicio.seguir_archivo(argumentos.seguir)))
+    print(f"Escuchando en {argumentos.unix or f'{argumentos.host}:{argumentos.puerto}'}", file=sys.stderr)
+    async with servidor:
+        while True:
+            alerta = await alertas.get()
+            latencia = (time.perf_counter() - alerta['recibido']) * 1e3
+            print(json.dumps({**{clave: valor for clave, valor in alerta.items() if clave != 'recibido'},
+                              'latencia_ms': round(latencia, 3)}, ensure_ascii=False), flush=True)
+
+
+async def _reproducir(argumentos):
+    inicio = time.perf_counter()
+    enviadas = await reproducir(argumentos.archivo, argumentos.puerto, argumentos.host, argumentos.unix,
+                                argumentos.velocidad)
+    segundos = time.perf_counter() - inicio
+    print(f"Lecturas enviadas: {enviadas} en {segundos:.2f} s ({enviadas / segundos:,.0f} por segundo)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servicio de ingesta en vivo y cliente de reproducción')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    for nombre in ('servir', 'reproducir'):
+        subcomando = subcomandos.add_parser(nombre)
+        if nombre == 'reproducir':
+            subcomando.add_argument('archivo', help='CSV con el esquema de sensores_temporales')
+            subcomando.add_argument('--velocidad', type=float, default=None,
+                                    help='factor sobre el tiempo real (por defecto, sin pausas)')
+        else:
+            subcomando.add_argument('--seguir', help='archivo a seguir además del socket')
+        subcomando.add_argument('--host', default='127.0.0.1')
+        subcomando.add_argument('--puerto', type=int, default=8765)
+        subcomando.add_argument('--unix', help='ruta de un socket Unix en lugar de TCP')
+    argumentos = parser.parse_args()
+    try:
+        asyncio.run(_servir(argumentos) if argumentos.comando == 'servir' else _reproducir(argumentos))
+    except KeyboardInterrupt:
+        pass
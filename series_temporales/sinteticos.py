@@ -0,0 +1,264 @@
+"""
+GENERADOR DE DATOS SINTÉTICOS A ESCALA
+Sesión 12: Series Temporales en Pandas
+
+Los archivos de `datos/` tienen entre 63 y 191 filas de un solo pozo, muy
+pocas para medir rendimiento. Este módulo genera los cuatro datasets con el
+mismo esquema (columnas, tipos y formato de fecha) para cualquier cantidad
+de pozos, sensores y años:
+
+- produccion_historica y parametros_pozos: una lectura cada 6 horas por pozo.
+- sensores_temporales: una lectura cada 15 minutos por sensor.
+- eventos_operacionales: eventos por pozo con duración en horas, que se
+  pueden solapar.
+
+Las series tienen tendencia, ciclo diario y ruido. `tasa_huecos` quita
+tramos consecutivos de lecturas (huecos en el tiempo) y `tasa_anomalias`
+agrega picos. Todo se genera con NumPy vectorizado a partir de `semilla`,
+así que la misma configuración produce los mismos datos.
+
+Uso:
+    datasets = generar_datasets(pozos=50, sensores_por_pozo=4, anios=1)
+    rutas = escribir_datasets('/tmp/datos_grandes', pozos=50)
+    df = cargar_dataset('sensores_temporales', ruta=rutas['sensores_temporales'])
+
+Desde la línea de comandos (destino, pozos, años):
+    python -m series_temporales.sinteticos /tmp/datos_grandes 50 1
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from series_temporales.carga import ESQUEMAS, FORMATO_FECHA
+
+FRECUENCIA_POZOS = '6h'
+
+FRECUENCIA_SENSORES = '15min'
+
+TIPOS_SENSOR = {
+    'Presion': ('psi', 1900.0, 60.0),
+    'Temperatura': ('F', 160.0, 8.0),
+    'Caudal': ('bpd', 1500.0, 120.0),
+    'Vibracion': ('mm/s', 4.0, 0.8),
+}
+
+CALIDADES = ('Excelente', 'Buena', 'Regular')
+
+TIPOS_EVENTO = {
+    'Mantenimiento Preventivo': ('Revisión de válvulas de control', 4, 0.15),
+    'Mantenimiento Correctivo': ('Reparación de bomba electrosumergible', 6, 0.25),
+    'Parada Programada': ('Cambio de filtros de separación', 2, 0.10),
+    'Inspección': ('Análisis de muestras de agua', 1, 0.05),
+}
+
+RESPONSABLES = ('Equipo Técnico A', 'Equipo Técnico B', 'Equipo Técnico C', 'Equipo Técnico D')
+
+CAMPOS = ('Campo Norte', 'Campo Sur', 'Campo Este', 'Campo Oeste')
+
+
+def _grilla(inicio, anios, freq):
+    """Fechas regulares desde `inicio` durante `anios` (fracciones permitidas)"""
+    inicio = pd.Timestamp(inicio)
+    fin = inicio + pd.Timedelta(days=round(365 * anios))
+    return pd.date_range(inicio, fin, freq=freq, inclusive='left')
+
+
+def _mascara_huecos(rng, filas, series, tasa, largo_medio=4):
+    """Filas que se conservan: quita tramos de largo geométrico hasta cubrir ~`tasa` de cada serie"""
+    conservar = np.ones((series, filas), dtype=bool)
+    if tasa <= 0 or filas == 0:
+        return conservar
+    tramos = rng.binomial(filas, tasa / largo_medio, size=series)
+    serie = np.repeat(np.arange(series), tramos)
+    inicios = rng.integers(0, filas, size=len(serie))
+    largos = rng.geometric(1 / largo_medio, size=len(serie))
+    # Cada tramo se expande a sus filas; las que pasan el final se descartan
+    desplazamiento = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    filas_hueco = np.repeat(inicios, largos) + desplazamiento
+    dentro = filas_hueco < filas
+    conservar[np.repeat(serie, largos)[dentro], filas_hueco[dentro]] = False
+    return conservar
+
+
+def _senal(rng, fechas, series, base, escala, tasa_anomalias):
+    """Matriz (series, filas) con tendencia, ciclo diario, ruido y picos"""
+    filas = len(fechas)
+    dias = (fechas.asi8 - fechas.asi8[0]) / 86_400e9 if filas else np.zeros(0)
+    hora = np.asarray(fechas.hour + fechas.minute / 60.0)
+    tendencia = rng.normal(0.0, 0.4, size=(series, 1)) * escala / 30.0
+    nivel = base + rng.normal(0.0, 2 * escala, size=(series, 1))
+    ciclo = 0.5 * escala * np.sin(2 * np.pi * (hora - 6.0) / 24.0)
+    valores = nivel + tendencia * dias + ciclo + rng.normal(0.0, escala * 0.3, size=(series, filas))
+    if tasa_anomalias > 0:
+        picos = rng.random((series, filas)) < tasa_anomalias
+        signo = np.where(rng.random(picos.sum()) < 0.5, -1.0, 1.0)
+        valores[picos] += signo * rng.uniform(4.0, 8.0, size=picos.sum()) * escala
+    return valores
+
+
+def _ids(prefijo, cantidad):
+    return np.array([f'{prefijo}{numero:03d}' for numero in range(1, cantidad + 1)], dtype=object)
+
+
+def _categoricas(nombres, codigos):
+    """Categórica con las categorías presentes en orden alfabético, como la que deja `cargar_dataset`"""
+    nombres = np.asarray(nombres, dtype=object)
+    orden = np.argsort(nombres)
+    posicion = np.empty_like(orden)
+    posicion[orden] = np.arange(len(orden))
+    return pd.Categorical.from_codes(posicion[codigos], categories=nombres[orden]).remove_unused_categories()
+
+
+def _tipar(df, nombre):
+    """Aplica los tipos del esquema y deja la fecha como índice, como `cargar_dataset`"""
+    esquema = ESQUEMAS[nombre]
+    df = df.astype(esquema['tipos'])
+    return df.set_index(esquema['fecha'])
+
+
+def _pozos(rng, pozos, fechas, tasa_huecos, tasa_anomalias):
+    """produccion_historica y parametros_pozos (una serie por pozo)"""
+    conservar = _mascara_huecos(rng, len(fechas), pozos, tasa_huecos)
+    caudal = np.clip(_senal(rng, fechas, pozos, 1500.0, 80.0, tasa_anomalias), 50, None)
+    presion = np.clip(_senal(rng, fechas, pozos, 1900.0, 40.0, tasa_anomalias), 100, 30_000)
+    temperatura = np.clip(_senal(rng, fechas, pozos, 150.0, 4.0, 0.0), 50, 400)
+    agua = np.clip(_senal(rng, fechas, pozos, 30.0, 3.0, 0.0), 0, 100)
+    gas = np.clip(_senal(rng, fechas, pozos, 20.0, 2.0, 0.0), 0, 100)
+    profundidad = rng.integers(6000, 12000, size=pozos)
+    api = np.round(rng.uniform(20.0, 40.0, size=pozos), 1)
+    campo = np.array(CAMPOS, dtype=object)[np.arange(pozos) % len(CAMPOS)]
+
+    serie, fila = np.nonzero(conservar)
+    orden = np.lexsort((serie, fila))
+    serie, fila = serie[orden], fila[orden]
+    comunes = {
+        'pozo_id': _ids('PZ', pozos)[serie],
+        'agua_porcentaje': np.round(agua[serie, fila]).astype(np.int64),
+        'gas_porcentaje': np.round(gas[serie, fila]).astype(np.int64),
+        'estado_pozo': np.where(caudal[serie, fila] > 200, 'Activo', 'Inactivo'),
+    }
+    produccion = pd.DataFrame({
+        'fecha': fechas[fila],
+        'pozo_id': comunes['pozo_id'],
+        'campo': campo[serie],
+        'produccion_bpd': np.round(caudal[serie, fila]).astype(np.int64),
+        'presion_psi': np.round(presion[serie, fila]).astype(np.int64),
+        'temperatura_f': np.round(temperatura[serie, fila]).astype(np.int64),
+        'agua_porcentaje': comunes['agua_porcentaje'],
+        'gas_porcentaje': comunes['gas_porcentaje'],
+        'estado_pozo': comunes['estado_pozo'],
+    })
+    parametros = pd.DataFrame({
+        'fecha': fechas[fila],
+        'pozo_id': comunes['pozo_id'],
+        'profundidad_ft': profundidad[serie],
+        'presion_fondo_psi': np.round(presion[serie, fila] + 1000).astype(np.int64),
+        'temperatura_fondo_f': np.round(temperatura[serie, fila] + 40).astype(np.int64),
+        'caudal_bpd': np.round(caudal[serie, fila]).astype(np.int64),
+        'presion_cabeza_psi': np.round(presion[serie, fila]).astype(np.int64),
+        'temperatura_cabeza_f': np.round(temperatura[serie, fila]).astype(np.int64),
+        'gravedad_api': api[serie],
+        'agua_porcentaje': comunes['agua_porcentaje'],
+        'gas_porcentaje': comunes['gas_porcentaje'],
+        'estado_pozo': comunes['estado_pozo'],
+    })
+    return produccion, parametros
+
+
+def _sensores(rng, pozos, sensores_por_pozo, fechas, tasa_huecos, tasa_anomalias):
+    """sensores_temporales (una serie por sensor, tipos de sensor rotando por pozo)"""
+    series = pozos * sensores_por_pozo
+    tipos = list(TIPOS_SENSOR)
+    tipo = np.arange(series) % len(tipos)
+    valores = np.empty((series, len(fechas)))
+    for posicion, nombre in enumerate(tipos):
+        seleccion = tipo == posicion
+        if seleccion.any():
+            _, base, escala = TIPOS_SENSOR[nombre]
+            valores[seleccion] = _senal(rng, fechas, int(seleccion.sum()), base, escala, tasa_anomalias)
+    conservar = _mascara_huecos(rng, len(fechas), series, tasa_huecos)
+
+    serie, fila = np.nonzero(conservar)
+    orden = np.lexsort((serie, fila))
+    serie, fila = serie[orden], fila[orden]
+    calidad = rng.choice(len(CALIDADES), size=len(serie), p=(0.7, 0.25, 0.05))
+    return pd.DataFrame({
+        'timestamp': fechas[fila],
+        'sensor_id': _categoricas(_ids('SNS', series), serie),
+        'pozo_id': _categoricas(_ids('PZ', pozos), serie // sensores_por_pozo),
+        'tipo_sensor': _categoricas(tipos, tipo[serie]),
+        'valor': np.round(valores[serie, fila], 1),
+        'unidad': _categoricas([TIPOS_SENSOR[nombre][0] for nombre in tipos], tipo[serie]),
+        'calidad_dato': _categoricas(CALIDADES, calidad),
+    })
+
+
+def _eventos(rng, pozos, fechas, eventos_por_pozo_mes):
+    """eventos_operacionales en horas enteras; los de un mismo pozo se pueden solapar"""
+    meses = max(len(fechas) / (4 * 30.4), 0)
+    cantidad = rng.poisson(eventos_por_pozo_mes * meses, size=pozos)
+    pozo = np.repeat(np.arange(pozos), cantidad)
+    horas = int((fechas[-1] - fechas[0]) / pd.Timedelta(hours=1)) if len(fechas) else 0
+    inicio = fechas[0] + pd.to_timedelta(rng.integers(0, max(horas, 1), size=len(pozo)), unit='h')
+    tipos = list(TIPOS_EVENTO)
+    tipo = rng.integers(0, len(tipos), size=len(pozo))
+    duracion_tipica = np.array([TIPOS_EVENTO[nombre][1] for nombre in tipos])[tipo]
+    impacto_tipico = np.array([TIPOS_EVENTO[nombre][2] for nombre in tipos])[tipo]
+    eventos = pd.DataFrame({
+        'fecha_evento': inicio,
+        'pozo_id': _ids('PZ', pozos)[pozo],
+        'tipo_evento': np.array(tipos, dtype=object)[tipo],
+        'descripcion': np.array([TIPOS_EVENTO[nombre][0] for nombre in tipos], dtype=object)[tipo],
+        'duracion_horas': np.maximum(1, duracion_tipica + rng.integers(-1, 3, size=len(pozo))),
+        'impacto_produccion': np.round(impacto_tipico * rng.uniform(0.6, 1.4, size=len(pozo)), 2),
+        'responsable': np.array(RESPONSABLES, dtype=object)[rng.integers(0, len(RESPONSABLES), size=len(pozo))],
+    })
+    return eventos.sort_values('fecha_evento', kind='stable', ignore_index=True)
+
+
+def generar_datasets(pozos=10, sensores_por_pozo=4, anios=1.0, tasa_huecos=0.01, tasa_anomalias=0.002,
+                     eventos_por_pozo_mes=4, semilla=0, inicio='2023-01-01'):
+    """Genera los cuatro datasets con el esquema de `datos/`.
+
+    Devuelve {nombre: DataFrame} con los tipos de `ESQUEMAS` y la fecha
+    como índice ordenado, igual que `cargar_dataset`. Las lecturas de
+    varios pozos o sensores quedan intercaladas por fecha.
+    """
+    rng = np.random.default_rng(semilla)
+    fechas_pozos = _grilla(inicio, anios, FRECUENCIA_POZOS)
+    fechas_sensores = _grilla(inicio, anios, FRECUENCIA_SENSORES)
+    produccion, parametros = _pozos(rng, pozos, fechas_pozos, tasa_huecos, tasa_anomalias)
+    datasets = {
+        'produccion_historica': produccion,
+        'sensores_temporales': _sensores(rng, pozos, sensores_por_pozo, fechas_sensores, tasa_huecos,
+                                         tasa_anomalias),
+        'eventos_operacionales': _eventos(rng, pozos, fechas_pozos, eventos_por_pozo_mes),
+        'parametros_pozos': parametros,
+    }
+    return {nombre: _tipar(df, nombre) for nombre, df in datasets.items()}
+
+
+def escribir_datasets(destino, **parametros):
+    """Genera los datasets y los escribe como CSV en `destino` con el formato de `datos/`.
+
+    Acepta los mismos parámetros que `generar_datasets` y devuelve
+    {nombre: ruta del CSV}.
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    rutas = {}
+    for nombre, df in generar_datasets(**parametros).items():
+        rutas[nombre] = destino / f'{nombre}.csv'
+        df.to_csv(rutas[nombre], date_format=FORMATO_FECHA)
+    return rutas
+
+
+if __name__ == '__main__':
+    destino = sys.argv[1] if len(sys.argv) > 1 else 'datos_sinteticos'
+    pozos = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    anios = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    for nombre, ruta in escribir_datasets(destino, pozos=pozos, anios=anios).items():
+        print(f"{nombre}: {ruta}")
@@ -0,0 +1,83 @@
+"""
+RESAMPLING POR BLOQUES
+Sesión 12: Series Temporales en Pandas
+
+Calcula un resample sobre un CSV que no cabe en memoria. El archivo se lee
+por bloques de filas; de cada bloque se guardan solo los agregados parciales
+por intervalo (ver `agregados.py`). Un intervalo que queda partido entre dos
+bloques permanece abierto y se combina con el bloque siguiente; los
+intervalos anteriores al primero del bloque nuevo ya están completos. La
+memoria usada depende del tamaño del bloque y del número de intervalos, no
+del tamaño del archivo.
+
+El archivo debe estar ordenado por fecha (como lo exportan los sensores).
+
+Uso:
+    diario = resample_por_bloques('sensores_temporales', 'D')
+    # Igual a cargar_dataset(...).resample('D')['valor'].agg(['mean', 'std', 'min', 'max', 'count'])
+"""
+
+import pandas as pd
+
+from series_temporales.agregados import (
+    combinar_parciales,
+    finalizar_parciales,
+    origen_intervalos,
+    parciales_resample,
+)
+from series_temporales.carga import iterar_dataset
+
+
+def parciales_por_bloques(bloques, freq, columnas, filtro=None):
+    """Genera los parciales de intervalos completos a medida que llegan bloques.
+
+    `bloques` es un iterable de DataFrames con DatetimeIndex en orden
+    temporal. `filtro`, si se da, recibe cada bloque y devuelve las filas a
+    conservar. Cada valor generado contiene intervalos que ya no recibirán
+    más datos.
+    """
+    origen = None
+    pendiente = None
+    ultimo_emitido = None
+    for bloque in bloques:
+        if filtro is not None:
+            bloque = filtro(bloque)
+        if bloque.empty:
+            continue
+        if origen is None:
+            origen = origen_intervalos(bloque.index)
+        parcial = parciales_resample(bloque, freq, columnas, origen=origen)
+        primero = parcial.index[0]
+        if ultimo_emitido is not None and primero <= ultimo_emitido:
+            raise ValueError(f"El archivo no está ordenado por fecha: llegaron datos de {primero} "
+                             f"después de cerrar ese intervalo")
+
+        if pendiente is not None:
+            cerrados = pendiente[pendiente.index < primero]
+            if len(cerrados):
+                ultimo_emitido = cerrados.index[-1]
+                yield cerrados
+            parcial = combinar_parciales([pendiente[pendiente.index >= primero], parcial])
+        # El último intervalo puede continuar en el bloque siguiente
+        pendiente = parcial
+
+    if pendiente is not None:
+        yield pendiente
+
+
+def resample_por_bloques(nombre='sensores_temporales', freq='D', columnas=('valor',),
+                         agregados=('mean', 'std', 'min', 'max', 'count'), ruta=None,
+                         filas_por_bloque=1_000_000):
+    """Resample de un dataset leído por bloques, con el mismo resultado que en memoria.
+
+    Equivale a `cargar_dataset(nombre)[columnas].resample(freq).agg(agregados)`
+    (con una sola columna, a `...resample(freq)[columna].agg(agregados)`),
+    pero nunca tiene más de `filas_por_bloque` filas en memoria.
+    """
+    columnas = list(columnas)
+    bloques = iterar_dataset(nombre, ruta=ruta, columnas=columnas, filas_por_bloque=filas_por_bloque)
+    cerrados = list(parciales_por_bloques(bloques, freq, columnas))
+    if not cerrados:
+        raise ValueError(f"No hay datos para agregar en {nombre}")
+    parciales = pd.concat(cerrados)
+    return finalizar_parciales(parciales, agregados, freq=freq)
@@ -0,0 +1,103 @@
+"""
+TENDENCIAS MÓVILES CON REGRESIÓN LINEAL
+Sesión 12: Series Temporales en Pandas
+
+Pendiente, intercepto y R² de mínimos cuadrados en ventana deslizante,
+calculados con sumas acumuladas en O(n) sin importar el tamaño de la ventana.
+Reemplaza a `rolling(window=...).apply(calcular_tendencia)`, que llama a
+`np.polyfit` una vez por fila.
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import como_matriz, iterar_bloques, sumas_moviles, ventanas_constantes
+
+
+def _regresion_matriz(valores, ventana, min_periods):
+    """Pendiente, intercepto y R² por columna para cada ventana que termina en cada fila.
+
+    El eje x es la posición dentro de la ventana (0, 1, 2, ...), igual que en
+    `calcular_tendencia`. Los NaN se excluyen del ajuste pero conservan su
+    posición en el eje x.
+    """
+    n, k = valores.shape
+    pendiente = np.full((n, k), np.nan)
+    intercepto = np.full((n, k), np.nan)
+    r2 = np.full((n, k), np.nan)
+    minimo = max(min_periods, 2)
+
+    for origen, inicio, fin in iterar_bloques(n, ventana):
+        segmento = valores[origen:fin]
+        validos = ~np.isnan(segmento)
+
+        # Centrar cada columna reduce la cancelación en las sumas de cuadrados
+        conteo_columna = validos.sum(axis=0)
+        centro = np.where(conteo_columna > 0,
+                          np.where(validos, segmento, 0).sum(axis=0) / np.maximum(conteo_columna, 1),
+                          0.0)
+        y = np.where(validos, segmento - centro, 0.0)
+
+        # Las sumas de posiciones son enteras y por lo tanto exactas
+        t = np.arange(len(segmento), dtype=np.int64)[:, None]
+        mascara = validos.astype(np.int64)
+        desde = inicio - origen
+        conteo = sumas_moviles(mascara, ventana, desde)
+        suma_t = sumas_moviles(mascara * t, ventana, desde)
+        suma_tt = sumas_moviles(mascara * t * t, ventana, desde)
+        suma_y = sumas_moviles(y, ventana, desde)
+        suma_ty = sumas_moviles(y * t, ventana, desde)
+        suma_yy = sumas_moviles(y * y, ventana, desde)
+
+        sxx = (conteo * suma_tt - suma_t * suma_t).astype(np.float64)
+        sxy = conteo * suma_ty - suma_t * suma_y
+        syy = conteo * suma_yy - suma_y * suma_y
+        # En una ventana constante el centrado deja un residuo en syy y sxy:
+        # la pendiente es 0 y R² queda indefinido, como con np.corrcoef
+        constantes, = ventanas_constantes(segmento, validos, [ventana], desde)
+        sxy[constantes] = 0.0
+        syy[constantes] = 0.0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            b = sxy / sxx
+            t_inicio = np.maximum(np.arange(desde, len(segmento)) - ventana + 1, 0)[:, None]
+            a = suma_y / conteo + centro - b * (suma_t / conteo - t_inicio)
+            r = np.where(syy > 0, sxy * sxy / (sxx * syy), np.nan)
+
+        suficientes = (conteo >= minimo) & (sxx > 0)
+        pendiente[inicio:fin] = np.where(suficientes, b, np.nan)
+        intercepto[inicio:fin] = np.where(suficientes, a, np.nan)
+        r2[inicio:fin] = np.where(suficientes, r, np.nan)
+
+    return pendiente, intercepto, r2
+
+
+def regresion_movil(serie, ventana, min_periods=None):
+    """Calcula pendiente, intercepto y R² de la tendencia lineal en ventana móvil.
+
+    Devuelve un DataFrame con las columnas `pendiente`, `intercepto` y `r2`
+    alineado con el índice de la serie. El intercepto corresponde al primer
+    punto de cada ventana.
+    """
+    if min_periods is None:
+        min_periods = ventana
+    pendiente, intercepto, r2 = _regresion_matriz(como_matriz(serie), ventana, min_periods)
+    return pd.DataFrame({
+        'pendiente': pendiente[:, 0],
+        'intercepto': intercepto[:, 0],
+        'r2': r2[:, 0],
+    }, index=serie.index)
+
+
+def pendiente_movil(datos, ventana, min_periods=None):
+    """Calcula la pendiente de la línea de tendencia en una ventana móvil.
+
+    Acepta una Serie o un DataFrame (una pendiente por columna) y devuelve
+    el mismo tipo. Equivale a `rolling(window=ventana).apply(calcular_tendencia)`.
+    """
+    if min_periods is None:
+        min_periods = ventana
+    pendiente, _, _ = _regresion_matriz(como_matriz(datos), ventana, min_periods)
+    if isinstance(datos, pd.Series):
+        return pd.Series(pendiente[:, 0], index=datos.index, name=datos.name)
+    return pd.DataFrame(pendiente, index=datos.index, columns=datos.columns)
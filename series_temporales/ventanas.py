@@ -0,0 +1,150 @@
+"""
+ESTADÍSTICAS MÓVILES EN UNA SOLA PASADA
+Sesión 12: Series Temporales en Pandas
+
+Calcula varias estadísticas para varias ventanas sobre un bloque de columnas
+compartiendo los cálculos intermedios: las sumas prefijas se construyen una
+vez por bloque y sirven para todas las ventanas, y los mínimos/máximos usan
+el algoritmo de van Herk/Gil-Werman, que cuesta O(n) por ventana. La
+mediana se calcula con el motor de estadísticas de orden de `cuantiles.py`.
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import como_matriz, iterar_bloques, ventanas_constantes
+from series_temporales.cuantiles import _cuantiles_matriz
+
+ESTADISTICAS = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max', 'median')
+
+
+def extremo_movil(valores, ventana, funcion=np.maximum):
+    """Máximo (o mínimo con np.minimum) en ventana deslizante sobre el último eje.
+
+    Algoritmo de van Herk/Gil-Werman: divide la serie en bloques del tamaño
+    de la ventana y combina un acumulado hacia adelante con otro hacia atrás,
+    así cada ventana se resuelve con una sola comparación. Los valores NaN
+    deben reemplazarse antes por el neutro (-inf para máximo, inf para mínimo).
+    """
+    *forma, n = valores.shape
+    neutro = -np.inf if funcion is np.maximum else np.inf
+    bloques = -(-(n + ventana - 1) // ventana)
+    relleno = np.full((*forma, bloques * ventana), neutro)
+    relleno[..., ventana - 1:ventana - 1 + n] = valores
+    por_bloque = relleno.reshape(*forma, bloques, ventana)
+    adelante = funcion.accumulate(por_bloque, axis=-1).reshape(*forma, -1)
+    atras = funcion.accumulate(por_bloque[..., ::-1], axis=-1)[..., ::-1].reshape(*forma, -1)
+    return funcion(atras[..., :n], adelante[..., ventana - 1:ventana - 1 + n])
+
+
+def _restar_ventana(acumulado, desde, ventana):
+    """Diferencia de sumas prefijas (último eje) para las ventanas que terminan desde `desde`"""
+    total = acumulado.shape[-1] - 1
+    suma = acumulado[..., desde + 1:].copy()
+    # Las ventanas que empiezan antes de la fila 0 restan el prefijo vacío
+    corte = max(ventana - 1 - desde, 0)
+    if corte < total - desde:
+        suma[..., corte:] -= acumulado[..., desde + 1 + corte - ventana:total + 1 - ventana]
+    return suma
+
+
+def _estadisticas_matriz(valores, estadisticas, ventanas, min_periods):
+    """Calcula cada estadística para cada ventana.
+
+    Recibe una matriz (columnas, filas) y devuelve un arreglo (columnas,
+    estadisticas, ventanas, filas): con las filas en el último eje,
+    `reshape(-1, filas).T` es un DataFrame sin copia.
+    """
+    k, n = valores.shape
+    resultados = np.full((k, len(estadisticas), len(ventanas), n), np.nan)
+    necesita_extremos = {'min', 'max'} & set(estadisticas)
+
+    for origen, inicio, fin in iterar_bloques(n, max(ventanas)):
+        segmento = valores[:, origen:fin]
+        validos = ~np.isnan(segmento)
+        desde = inicio - origen
+
+        conteo_columna = validos.sum(axis=1, keepdims=True)
+        centro = np.where(validos, segmento, 0).sum(axis=1, keepdims=True) / np.maximum(conteo_columna, 1)
+        x = np.where(validos, segmento - centro, 0.0)
+
+        # Sumas prefijas compartidas por todas las ventanas
+        acumulado = np.zeros((3, k, segmento.shape[1] + 1))
+        np.cumsum(validos, axis=1, out=acumulado[0, :, 1:])
+        np.cumsum(x, axis=1, out=acumulado[1, :, 1:])
+        np.cumsum(x * x, axis=1, out=acumulado[2, :, 1:])
+        # El centrado por bloque deja un residuo en la varianza de las ventanas constantes
+        constantes = ventanas_constantes(segmento.T, validos.T, ventanas, desde)
+        if necesita_extremos:
+            con_menos_inf = np.where(validos, segmento, -np.inf)
+            con_mas_inf = np.where(validos, segmento, np.inf)
+
+        filas = np.arange(inicio, fin)
+        for v, ventana in enumerate(ventanas):
+            conteo, suma, suma_cuadrados = _restar_ventana(acumulado, desde, ventana)
+            minimo = min_periods if min_periods is not None else ventana
+            suficientes = conteo >= max(minimo, 1)
+            # Igual que pandas, count solo exige filas suficientes, no valores
+            # válidos, y sum con min_periods=0 da 0 en una ventana sin valores
+            completas = np.minimum(filas + 1, ventana) >= minimo
+            con_suma = conteo >= minimo
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                media = suma / conteo
+                varianza = np.maximum(suma_cuadrados - suma * media, 0) / (conteo - 1)
+            varianza[constantes[v].T] = 0.0
+            varianza[conteo < 2] = np.nan
+
+            for e, estadistica in enumerate(estadisticas):
+                if estadistica == 'count':
+                    valor, filtro = conteo, completas
+                elif estadistica == 'sum':
+                    valor, filtro = suma + centro * conteo, con_suma
+                elif estadistica == 'mean':
+                    valor, filtro = media + centro, suficientes
+                elif estadistica == 'var':
+                    valor, filtro = varianza, suficientes
+                elif estadistica == 'std':
+                    valor, filtro = np.sqrt(varianza), suficientes
+                elif estadistica == 'max':
+                    valor, filtro = extremo_movil(con_menos_inf, ventana, np.maximum)[:, desde:], suficientes
+                elif estadistica == 'min':
+                    valor, filtro = extremo_movil(con_mas_inf, ventana, np.minimum)[:, desde:], suficientes
+                else:
+                    continue
+                destino = resultados[:, e, v, inicio:fin]
+                np.copyto(destino, valor, where=np.broadcast_to(filtro, destino.shape))
+
+    if 'median' in estadisticas:
+        e = estadisticas.index('median')
+        resultados[:, e] = _cuantiles_matriz(valores, ['median'], ventanas, min_periods)[:, 0]
+
+    return resultados
+
+
+def estadisticas_moviles(df, estadisticas=('mean', 'std', 'min', 'max'), ventanas=(28,), min_periods=None):
+    """Calcula varias estadísticas móviles para varias ventanas en una sola pasada.
+
+    Devuelve un DataFrame con columnas MultiIndex (columna, estadistica,
+    ventana). Con `min_periods=None` cada ventana exige estar completa,
+    igual que `rolling(window=ventana)`.
+
+    Ejemplo:
+        stats = estadisticas_moviles(df[['caudal_bpd']], ['mean', 'std'], [28, 120])
+        stats[('caudal_bpd', 'mean', 28)]
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    estadisticas = list(estadisticas)
+    ventanas = list(ventanas)
+    desconocidas = set(estadisticas) - set(ESTADISTICAS)
+    if desconocidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(desconocidas)}")
+
+    valores = np.ascontiguousarray(como_matriz(df).T)
+    resultados = _estadisticas_matriz(valores, estadisticas, ventanas, min_periods)
+    columnas = pd.MultiIndex.from_tuples(
+        [(columna, estadistica, ventana)
+         for columna in df.columns for estadistica in estadisticas for ventana in ventanas],
+        names=['columna', 'estadistica', 'ventana'])
+    return pd.DataFrame(resultados.reshape(len(columnas), -1).T, index=df.index, columns=columnas, copy=False)
@@ -0,0 +1,308 @@
+"""
+VENTANAS MÓVILES POR TIEMPO
+Sesión 12: Series Temporales en Pandas
+
+Las ventanas por cantidad de registros ("28 registros de 6 horas" = 7 días)
+dejan de medir 7 días cuando faltan lecturas o el muestreo es irregular.
+Aquí la ventana que termina en cada fila es (t - ventana, t], igual que
+`rolling('7D')`. Su inicio se busca una sola vez con `searchsorted` sobre
+las fechas en enteros y se reutiliza para todas las columnas y
+estadísticas:
+
+- count, sum, mean, var y std: diferencias de sumas prefijas por bloques,
+  sobre valores centrados (en la media del bloque o la del grupo).
+- min y max: tabla dispersa (sparse table) por bloque, que resuelve el
+  extremo de cualquier tramo con dos consultas.
+- pendiente y correlación: sumas prefijas de los momentos cruzados; la
+  pendiente usa el tiempo transcurrido, no la posición de la fila.
+
+Con `columna_grupo` (por ejemplo 'pozo_id') ninguna ventana cruza de un
+grupo a otro.
+
+Uso:
+    estadisticas_moviles_tiempo(df_parametros[['caudal_bpd']], ['mean', 'std', 'pendiente'], ['7D', '30D'])
+"""
+
+import numpy as np
+import pandas as pd
+
+from series_temporales._acumulados import BLOQUE, como_matriz, tramos_constantes
+from series_temporales.agregados import duracion_fija
+from series_temporales.grupos import _medias_por_grupo, buscar_por_grupo, limites_grupos, ordenar_por_grupo
+
+ESTADISTICAS_TIEMPO = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max', 'pendiente')
+
+
+def _ancho_ventana(ventana, unidad):
+    """Duración de la ventana en la unidad entera del índice"""
+    duracion = duracion_fija(ventana)
+    if duracion is None:
+        raise ValueError(f"La ventana debe tener duración fija (D, h, min...): {ventana}")
+    return duracion // pd.Timedelta(1, unit=unidad)
+
+
+def limites_ventana(indice, ventana, codigos=None):
+    """Posición donde empieza la ventana (t - ventana, t] que termina en cada fila.
+
+    Con `codigos` (códigos de grupo ordenados, como los de
+    `ordenar_por_grupo`) las ventanas empiezan como muy temprano en la
+    primera fila de su grupo. Las fechas deben estar ordenadas (dentro de
+    cada grupo si hay grupos).
+    """
+    indice = pd.DatetimeIndex(indice)
+    tiempos = indice.asi8
+    ancho = _ancho_ventana(ventana, indice.unit)
+    if codigos is None:
+        if not indice.is_monotonic_increasing:
+            raise ValueError("El índice debe estar ordenado por fecha para usar ventanas por tiempo")
+        return np.searchsorted(tiempos, tiempos - ancho, side='right')
+
+    if np.any((tiempos[1:] < tiempos[:-1]) & (codigos[1:] == codigos[:-1])):
+        raise ValueError("Las fechas de cada grupo deben estar ordenadas para usar ventanas por tiempo")
+    return buscar_por_grupo(codigos, tiempos, codigos, tiempos - ancho, side='right')
+
+
+def _tabla_dispersa(valores, niveles, funcion):
+    """Tabla dispersa sobre el último eje: tabla[j, ..., i] = extremo de valores[..., i:i + 2**j]"""
+    tabla = np.empty((niveles,) + valores.shape)
+    tabla[0] = valores
+    for nivel in range(1, niveles):
+        paso = 1 << (nivel - 1)
+        anterior = tabla[nivel - 1]
+        funcion(anterior[..., :-paso], anterior[..., paso:], out=tabla[nivel][..., :-paso])
+        tabla[nivel][..., -paso:] = anterior[..., -paso:]
+    return tabla
+
+
+def _extremo_tramos(tabla, columnas, desde, hasta, funcion):
+    """Extremo de cada tramo [desde, hasta) de una tabla dispersa, para todas las columnas"""
+    nivel = np.frexp((hasta - desde).astype(np.float64))[1] - 1
+    return funcion(tabla[nivel, columnas, desde], tabla[nivel, columnas, hasta - (1 << nivel)])
+
+
+def _diferencia(acumulado, desde, hasta):
+    """Suma de cada tramo [desde, fila] a partir de sumas prefijas sobre el último eje.
+
+    `hasta` es un slice con las posiciones fila + 1 (contiguas), así solo
+    el inicio de cada ventana necesita indexación avanzada.
+    """
+    return acumulado[..., hasta] - acumulado[..., desde]
+
+
+def _bloques_tiempo(inicios, filas_bloque):
+    """Genera (origen, inicio, fin): el bloque de filas [inicio, fin) lee desde `origen`"""
+    n = len(inicios)
+    for inicio in range(0, n, filas_bloque):
+        fin = min(inicio + filas_bloque, n)
+        yield int(inicios[inicio]), inicio, fin
+
+
+def _estadisticas_tiempo(valores, centro, dias, inicios, estadisticas, min_periods):
+    """Calcula cada estadística sobre las ventanas [inicios[v][i], i] de cada ventana v.
+
+    `valores` es una matriz (columnas, filas). `centro` es None (se centra
+    en la media de cada bloque) o una matriz del mismo tamaño constante
+    dentro de cada ventana, como la media del grupo. `dias` es el tiempo de
+    cada fila en días y solo se usa para la pendiente. Las sumas prefijas y
+    las tablas dispersas de cada bloque se comparten entre todas las
+    ventanas. Devuelve un arreglo (columnas, estadisticas, ventanas, filas).
+    """
+    k, n = valores.shape
+    resultados = np.full((k, len(estadisticas), len(inicios), n), np.nan)
+    extremos = [estadistica for estadistica in ('min', 'max') if estadistica in estadisticas]
+    necesita_pendiente = 'pendiente' in estadisticas
+    columnas = np.arange(k)[:, None]
+    # La ventana más larga empieza primero y fija el origen de cada bloque
+    primeros = np.minimum.reduce(inicios)
+
+    for origen, inicio, fin in _bloques_tiempo(primeros, max(BLOQUE // max(k, 1), 1)):
+        segmento = valores[:, origen:fin]
+        validos = ~np.isnan(segmento)
+        hasta = slice(inicio + 1 - origen, fin + 1 - origen)
+        filas = np.arange(inicio, fin) + 1 - origen
+        if centro is None:
+            centro_segmento = np.where(validos, segmento, 0).sum(axis=1, keepdims=True) / np.maximum(
+                validos.sum(axis=1, keepdims=True), 1)
+            centro_fila = centro_segmento
+        else:
+            centro_segmento = centro[:, origen:fin]
+            centro_fila = centro[:, inicio:fin]
+
+        x = np.where(validos, segmento - centro_segmento, 0.0)
+        acumulado = np.zeros((3, k, segmento.shape[1] + 1))
+        np.cumsum(validos, axis=1, out=acumulado[0, :, 1:])
+        np.cumsum(x, axis=1, out=acumulado[1, :, 1:])
+        np.cumsum(x * x, axis=1, out=acumulado[2, :, 1:])
+        if necesita_pendiente:
+            # Tiempo en días centrado en el bloque: las sumas de t² no crecen
+            # con la fecha absoluta
+            t = dias[origen:fin] - dias[origen:fin].mean()
+            momentos = np.zeros((3, k, segmento.shape[1] + 1))
+            np.cumsum(validos * t, axis=1, out=momentos[0, :, 1:])
+            np.cumsum(validos * t * t, axis=1, out=momentos[1, :, 1:])
+            np.cumsum(x * t, axis=1, out=momentos[2, :, 1:])
+        # El centrado deja un residuo en la varianza de las ventanas constantes
+        constantes = tramos_constantes(segmento.T, validos.T,
+                                       [inicios_ventana[inicio:fin] - origen for inicios_ventana in inicios],
+                                       inicio - origen)
+        tablas = {}
+        if extremos:
+            niveles = max(int((filas - (primeros[inicio:fin] - origen)).max()).bit_length(), 1)
+            for estadistica in extremos:
+                funcion = np.minimum if estadistica == 'min' else np.maximum
+                neutro = np.inf if estadistica == 'min' else -np.inf
+                tablas[estadistica] = _tabla_dispersa(np.where(validos, segmento, neutro), niveles, funcion)
+
+        for v, inicios_ventana in enumerate(inicios):
+            desde = inicios_ventana[inicio:fin] - origen
+            conteo, suma, suma_cuadrados = _diferencia(acumulado, desde, hasta)
+            suficientes = conteo >= max(min_periods, 1)
+            constante = constantes[v].T
+            with np.errstate(divide='ignore', invalid='ignore'):
+                media = suma / conteo
+                varianza = np.maximum(suma_cuadrados - suma * media, 0) / (conteo - 1)
+            varianza[constante] = 0.0
+            varianza[conteo < 2] = np.nan
+
+            for e, estadistica in enumerate(estadisticas):
+                if estadistica == 'count':
+                    valor, filtro = conteo, np.broadcast_to(filas - desde >= min_periods, conteo.shape)
+                elif estadistica == 'sum':
+                    # Con min_periods=0 una ventana sin valores suma 0, como en pandas
+                    valor, filtro = suma + centro_fila * conteo, conteo >= min_periods
+                elif estadistica == 'mean':
+                    valor, filtro = media + centro_fila, suficientes
+                elif estadistica == 'var':
+                    valor, filtro = varianza, suficientes
+                elif estadistica == 'std':
+                    valor, filtro = np.sqrt(varianza), suficientes
+                elif estadistica in ('min', 'max'):
+                    funcion = np.minimum if estadistica == 'min' else np.maximum
+                    valor = _extremo_tramos(tablas[estadistica], columnas, desde, filas, funcion)
+                    filtro = suficientes
+                else:
+                    suma_t, suma_tt, suma_ty = _diferencia(momentos, desde, hasta)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        sxx = conteo * suma_tt - suma_t * suma_t
+                        valor = np.where(constante, 0.0, (conteo * suma_ty - suma_t * suma) / sxx)
+                    filtro = suficientes & (conteo >= 2) & (sxx > 0)
+                np.copyto(resultados[:, e, v, inicio:fin], valor, where=filtro)
+
+    return resultados
+
+
+def _preparar(df, columnas, columna_grupo):
+    """Ordena por grupo si hace falta y calcula el centro de cada fila.
+
+    Devuelve (ordenado, valores, centro, codigos, orden); `centro` es None
+    sin grupos y la media del grupo de cada fila con grupos.
+    """
+    if columna_grupo is None:
+        ordenado, codigos, orden = df, None, None
+    else:
+        ordenado, codigos, orden = ordenar_por_grupo(df, columna_grupo)
+    valores = np.ascontiguousarray(como_matriz(ordenado[columnas]).T)
+    if codigos is None:
+        # Sin grupos cada bloque se centra en su propia media
+        centro = None
+    else:
+        inicios = limites_grupos(codigos)
+        numero_grupo = np.repeat(np.arange(len(inicios)), np.diff(np.r_[inicios, len(codigos)]))
+        centro = _medias_por_grupo(valores, inicios)[:, numero_grupo]
+    return ordenado, valores, centro, codigos, orden
+
+
+def _dias(indice):
+    """Tiempo de cada fila en días (float) desde la primera fecha"""
+    if len(indice) == 0:
+        return np.zeros(0)
+    return np.asarray((indice - indice.min()) / pd.Timedelta(days=1), dtype=np.float64)
+
+
+def estadisticas_moviles_tiempo(df, estadisticas=('mean', 'std', 'min', 'max'), ventanas=('7D',),
+                                columna_grupo=None, columnas=None, min_periods=1):
+    """Estadísticas móviles con ventanas por tiempo, como `rolling('7D')`.
+
+    Acepta 'count', 'sum', 'mean', 'var', 'std', 'min', 'max' y
+    'pendiente' (pendiente de la recta de mínimos cuadrados contra el
+    tiempo, en unidades por día). Igual que pandas con ventanas por tiempo,
+    `min_periods` vale 1 por defecto.
+
+    Con `columna_grupo` las ventanas se calculan por grupo y el resultado
+    queda alineado con las filas de `df` en su orden original. Devuelve un
+    DataFrame con columnas MultiIndex (columna, estadistica, ventana), igual
+    que `estadisticas_moviles`.
+
+    Ejemplo:
+        stats = estadisticas_moviles_tiempo(df_parametros, ['mean', 'std'], ['7D', '30D'],
+                                            columna_grupo='pozo_id', columnas=['caudal_bpd'])
+        stats[('caudal_bpd', 'mean', '7D')]
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    estadisticas = list(estadisticas)
+    ventanas = list(ventanas)
+    desconocidas = set(estadisticas) - set(ESTADISTICAS_TIEMPO)
+    if desconocidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(desconocidas)}")
+    if columnas is None:
+        columnas = [columna for columna in df.select_dtypes('number').columns if columna != columna_grupo]
+    columnas = list(columnas)
+
+    ordenado, valores, centro, codigos, orden = _preparar(df, columnas, columna_grupo)
+    dias = _dias(ordenado.index) if 'pendiente' in estadisticas else None
+    inicios = [limites_ventana(ordenado.index, ventana, codigos) for ventana in ventanas]
+    resultados = _estadisticas_tiempo(valores, centro, dias, inicios, estadisticas, min_periods)
+
+    if orden is not None:
+        resultados[..., orden] = resultados.copy()
+    indice_columnas = pd.MultiIndex.from_tuples(
+        [(columna, estadistica, ventana)
+         for columna in columnas for estadistica in estadisticas for ventana in ventanas],
+        names=['columna', 'estadistica', 'ventana'])
+    return pd.DataFrame(resultados.reshape(len(indice_columnas), -1).T, index=df.index,
+                        columns=indice_columnas, copy=False)
+
+
+def correlacion_movil_tiempo(df, columna1, columna2, ventana='7D', columna_grupo=None, min_periods=1):
+    """Correlación de Pearson entre dos columnas en ventana por tiempo.
+
+    Solo cuentan las filas en que ambas columnas tienen valor, igual que
+    `df[columna1].rolling(ventana).corr(df[columna2])`. Con `columna_grupo`
+    se calcula por grupo. Devuelve una Serie alineada con `df`.
+    """
+    ordenado, valores, centro, codigos, orden = _preparar(df, [columna1, columna2], columna_grupo)
+    inicios = limites_ventana(ordenado.index, ventana, codigos)
+    # Solo las filas con ambos valores
+    ambos = ~np.isnan(valores).any(axis=0)
+    if centro is None:
+        centro = np.where(ambos, valores, 0).sum(axis=1, keepdims=True) / max(ambos.sum(), 1)
+    a, b = np.where(ambos, valores - centro, 0.0)
+    n = len(ordenado)
+    correlacion = np.full(n, np.nan)
+
+    for origen, inicio, fin in _bloques_tiempo(inicios, BLOQUE):
+        tramo = slice(origen, fin)
+        acumulado = np.zeros((6, fin - origen + 1))
+        for fila, termino in enumerate((ambos[tramo], a[tramo], b[tramo], a[tramo] * a[tramo],
+                                        b[tramo] * b[tramo], a[tramo] * b[tramo])):
+            np.cumsum(termino, out=acumulado[fila, 1:])
+        desde = inicios[inicio:fin] - origen
+        hasta = slice(inicio + 1 - origen, fin + 1 - origen)
+        conteo, suma_a, suma_b, suma_aa, suma_bb, suma_ab = _diferencia(acumulado, desde, hasta)
+        # Una columna constante en la ventana deja un residuo en su varianza
+        # en lugar de 0; la correlación no está definida
+        constante, = tramos_constantes(valores[:, tramo].T, np.broadcast_to(ambos[tramo, None], (fin - origen, 2)),
+                                       [desde], inicio - origen)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covarianza = conteo * suma_ab - suma_a * suma_b
+            varianza_a = conteo * suma_aa - suma_a * suma_a
+            varianza_b = conteo * suma_bb - suma_b * suma_b
+            valor = np.clip(covarianza / np.sqrt(varianza_a * varianza_b), -1.0, 1.0)
+        suficientes = (conteo >= max(min_periods, 2)) & (varianza_a > 0) & (varianza_b > 0) & ~constante.any(axis=1)
+        correlacion[inicio:fin] = np.where(suficientes, valor, np.nan)
+
+    if orden is not None:
+        correlacion[orden] = correlacion.copy()
+    return pd.Series(correlacion, index=df.index)
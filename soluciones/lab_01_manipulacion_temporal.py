@@ -7,8 +7,23 @@ Objetivo: Dominar la manipulación de datos temporales con DatetimeIndex
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales import (
+    abrir_almacen,
+    abrir_particiones,
+    cargar_dataset,
+    graficar_serie,
+    graficos,
+    leer_particiones,
+    leer_rango,
+    perfiles_calendario,
+    seleccionar_particiones,
+)
 
 # Configuración para mejor visualización
 pd.set_option('display.max_columns', None)
@@ -26,8 +41,8 @@ print("=" * 80)
 print("\n1. CARGANDO DATOS DE PRODUCCIÓN HISTÓRICA...")
 print("-" * 50)
 
-# Cargar datos de producción
-df_produccion = pd.read_csv('../datos/produccion_historica.csv')
+# Cargar datos de producción con su esquema (la fecha queda como columna)
+df_produccion = cargar_dataset('produccion_historica', indexar=False)
 
 print(f"Forma del dataset: {df_produccion.shape}")
 print(f"Columnas disponibles: {list(df_produccion.columns)}")
@@ -44,10 +59,8 @@ print(df_produccion.head())
 print("\n\n2. CONVERTIENDO A DATETIMEINDEX...")
 print("-" * 50)
 
-# Convertir la columna fecha a datetime
-df_produccion['fecha'] = pd.to_datetime(df_produccion['fecha'])
-
-# Establecer fecha como índice
+# La columna fecha ya viene como datetime64 desde cargar_dataset:
+# solo falta establecerla como índice
 df_produccion.set_index('fecha', inplace=True)
 
 print("Índice temporal creado:")
@@ -77,6 +90,22 @@ rango_fechas = df_produccion.loc['2023-01-10':'2023-01-15']
 print(f"Registros en el rango: {len(rango_fechas)}")
 print(rango_fechas.head())
 
+# La misma selección sobre el almacén de sensores mapeado en memoria:
+# búsqueda binaria sobre las fechas y un corte sin copiar el archivo
+almacen_sensores = abrir_almacen('sensores_temporales')
+rango_sensor = leer_rango(almacen_sensores, 'SNS001', '2023-01-01 06:00', '2023-01-01 12:00')
+print(f"\nLecturas de SNS001 entre las 06:00 y las 12:00 del 1 de enero: {len(rango_sensor)}")
+print(rango_sensor.head())
+
+# La misma fecha sobre el dataset particionado por pozo y mes: el manifiesto
+# descarta las particiones fuera del rango antes de leer el disco, así que
+# un día de un archivo de varios años solo lee unos kilobytes
+particiones_produccion = abrir_particiones('produccion_historica')
+leidas = seleccionar_particiones(particiones_produccion, '2023-01-15', '2023-01-15')
+dia_particionado = leer_particiones(particiones_produccion, '2023-01-15', '2023-01-15')
+print(f"\n15 de enero desde las particiones: {len(dia_particionado)} registros, "
+      f"{len(leidas)} de {len(particiones_produccion['manifiesto']['particiones'])} particiones leídas")
+
 # Seleccionar por mes
 print("\nDatos de enero de 2023:")
 datos_enero = df_produccion.loc['2023-01']
@@ -90,24 +119,31 @@ print(datos_enero.head())
 print("\n\n4. OPERACIONES TEMPORALES AVANZADAS...")
 print("-" * 50)
 
-# Obtener componentes temporales
-df_produccion['año'] = df_produccion.index.year
-df_produccion['mes'] = df_produccion.index.month
-df_produccion['dia'] = df_produccion.index.day
-df_produccion['hora'] = df_produccion.index.hour
-df_produccion['dia_semana'] = df_produccion.index.dayofweek
+# Obtener componentes temporales: solo para mostrarlos, los perfiles se
+# calculan desde el índice sin agregar columnas a df_produccion
+primeras = df_produccion.head(10)
+componentes = pd.DataFrame({
+    'año': primeras.index.year,
+    'mes': primeras.index.month,
+    'dia': primeras.index.day,
+    'hora': primeras.index.hour,
+    'dia_semana': primeras.index.dayofweek,
+    'produccion_bpd': primeras['produccion_bpd'],
+}, index=primeras.index)
 
 print("Componentes temporales agregados:")
-print(df_produccion[['año', 'mes', 'dia', 'hora', 'dia_semana', 'produccion_bpd']].head(10))
+print(componentes)
+
+perfiles = perfiles_calendario(df_produccion['produccion_bpd'], ['dia_semana', 'hora'], ['mean', 'std', 'min', 'max'])
 
 # Calcular estadísticas por día de la semana
 print("\nProducción promedio por día de la semana:")
-produccion_por_dia = df_produccion.groupby('dia_semana')['produccion_bpd'].agg(['mean', 'std', 'min', 'max'])
+produccion_por_dia = perfiles['dia_semana']
 print(produccion_por_dia)
 
 # Calcular estadísticas por hora del día
 print("\nProducción promedio por hora del día:")
-produccion_por_hora = df_produccion.groupby('hora')['produccion_bpd'].agg(['mean', 'std', 'min', 'max'])
+produccion_por_hora = perfiles['hora']
 print(produccion_por_hora)
 
 # =============================================================================
@@ -123,8 +159,8 @@ print("-" * 50)
 
 
 
-# Filtrar datos de la primera semana
-primera_semana = df_produccion.loc['2023-01-01':'2023-01-07']
+# Filtrar datos de la primera semana (desde las particiones, sin el DataFrame completo)
+primera_semana = leer_particiones(particiones_produccion, '2023-01-01', '2023-01-07')
 print(f"Datos de la primera semana: {len(primera_semana)} registros")
 
 # Filtrar datos de las horas de mayor producción (6:00 y 12:00)
@@ -164,45 +200,47 @@ print(produccion_semanal)
 print("\n\n7. VISUALIZACIÓN TEMPORAL BÁSICA...")
 print("-" * 50)
 
-# Crear figura con subplots
-fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-fig.suptitle('Análisis Temporal de Producción Petrolera', fontsize=16)
-
-# Gráfico 1: Producción a lo largo del tiempo
-axes[0, 0].plot(df_produccion.index, df_produccion['produccion_bpd'], 'b-', linewidth=1)
-axes[0, 0].set_title('Producción vs Tiempo')
-axes[0, 0].set_xlabel('Fecha')
-axes[0, 0].set_ylabel('Producción (BPD)')
-axes[0, 0].grid(True, alpha=0.3)
-
-# Gráfico 2: Producción por hora del día
-produccion_por_hora_plot = df_produccion.groupby('hora')['produccion_bpd'].mean()
-axes[0, 1].bar(produccion_por_hora_plot.index, produccion_por_hora_plot.values, color='green', alpha=0.7)
-axes[0, 1].set_title('Producción Promedio por Hora del Día')
-axes[0, 1].set_xlabel('Hora del Día')
-axes[0, 1].set_ylabel('Producción Promedio (BPD)')
-axes[0, 1].grid(True, alpha=0.3)
-
-# Gráfico 3: Producción por día de la semana
-produccion_por_dia_plot = df_produccion.groupby('dia_semana')['produccion_bpd'].mean()
-dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-axes[1, 0].bar(range(7), produccion_por_dia_plot.values, color='orange', alpha=0.7)
-axes[1, 0].set_title('Producción Promedio por Día de la Semana')
-axes[1, 0].set_xlabel('Día de la Semana')
-axes[1, 0].set_ylabel('Producción Promedio (BPD)')
-axes[1, 0].set_xticks(range(7))
-axes[1, 0].set_xticklabels(dias_semana, rotation=45)
-axes[1, 0].grid(True, alpha=0.3)
-
-# Gráfico 4: Producción diaria agregada
-axes[1, 1].plot(produccion_diaria.index, produccion_diaria.values, 'r-', linewidth=2)
-axes[1, 1].set_title('Producción Total Diaria')
-axes[1, 1].set_xlabel('Fecha')
-axes[1, 1].set_ylabel('Producción Total (BPD)')
-axes[1, 1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.show()
+if graficos.activos():
+    plt = graficos.pyplot()
+    # Crear figura con subplots
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig.suptitle('Análisis Temporal de Producción Petrolera', fontsize=16)
+
+    # Gráfico 1: Producción a lo largo del tiempo
+    graficar_serie(axes[0, 0], df_produccion['produccion_bpd'], 'b-', linewidth=1)
+    axes[0, 0].set_title('Producción vs Tiempo')
+    axes[0, 0].set_xlabel('Fecha')
+    axes[0, 0].set_ylabel('Producción (BPD)')
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Gráfico 2: Producción por hora del día
+    produccion_por_hora_plot = produccion_por_hora['mean']
+    axes[0, 1].bar(produccion_por_hora_plot.index, produccion_por_hora_plot.values, color='green', alpha=0.7)
+    axes[0, 1].set_title('Producción Promedio por Hora del Día')
+    axes[0, 1].set_xlabel('Hora del Día')
+    axes[0, 1].set_ylabel('Producción Promedio (BPD)')
+    axes[0, 1].grid(True, alpha=0.3)
+
+    # Gráfico 3: Producción por día de la semana
+    produccion_por_dia_plot = produccion_por_dia['mean']
+    dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+    axes[1, 0].bar(range(7), produccion_por_dia_plot.values, color='orange', alpha=0.7)
+    axes[1, 0].set_title('Producción Promedio por Día de la Semana')
+    axes[1, 0].set_xlabel('Día de la Semana')
+    axes[1, 0].set_ylabel('Producción Promedio (BPD)')
+    axes[1, 0].set_xticks(range(7))
+    axes[1, 0].set_xticklabels(dias_semana, rotation=45)
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Gráfico 4: Producción diaria agregada
+    graficar_serie(axes[1, 1], produccion_diaria, 'r-', linewidth=2)
+    axes[1, 1].set_title('Producción Total Diaria')
+    axes[1, 1].set_xlabel('Fecha')
+    axes[1, 1].set_ylabel('Producción Total (BPD)')
+    axes[1, 1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    graficos.mostrar(fig, 'lab_01_visualizacion_temporal')
 
 # =============================================================================
 # EJERCICIO 8: ANÁLISIS DE PATRONES TEMPORALES
@@ -7,8 +7,15 @@ Objetivo: Aplicar técnicas de resampling para agregación y frecuencias tempora
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales import (agregar_resample, cargar_dataset, graficar_serie, graficos, indice_huecos,
+                               marcar_eventos, piramide_resample, rellenar_huecos, resample_por_bloques,
+                               resample_por_grupo)
 
 # Configuración para mejor visualización
 pd.set_option('display.max_columns', None)
@@ -26,12 +33,9 @@ print("=" * 80)
 print("\n1. CARGANDO DATOS DE SENSORES TEMPORALES...")
 print("-" * 50)
 
-# Cargar datos de sensores
-df_sensores = pd.read_csv('../datos/sensores_temporales.csv')
-
-# Convertir timestamp a datetime y establecer como índice
-df_sensores['timestamp'] = pd.to_datetime(df_sensores['timestamp'])
-df_sensores.set_index('timestamp', inplace=True)
+# Cargar datos de sensores: timestamp como DatetimeIndex ordenado,
+# columnas de texto como categóricas y valor en float64
+df_sensores = cargar_dataset('sensores_temporales')
 
 print(f"Forma del dataset: {df_sensores.shape}")
 print(f"Rango temporal: {df_sensores.index.min()} a {df_sensores.index.max()}")
@@ -84,26 +88,23 @@ print("-" * 50)
 # Agregación con múltiples métodos
 print("Agregación diaria con múltiples métodos:")
 
-agregacion_diaria = df_sensores.resample('D').agg({
+# 'moda' se calcula con conteos enteros en lugar de llamar a x.mode() por día
+agregacion_diaria = agregar_resample(df_sensores, 'D', {
     'valor': ['mean', 'std', 'min', 'max', 'count'],
     'pozo_id': 'first',
     'tipo_sensor': 'first',
     'unidad': 'first',
-    'calidad_dato': lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'N/A'
+    'calidad_dato': 'moda'
 })
+agregacion_diaria[('calidad_dato', 'moda')] = agregacion_diaria[('calidad_dato', 'moda')].astype(object).fillna('N/A')
 
 print(agregacion_diaria.head())
 
 # Agregación semanal con métodos específicos
 print("\nAgregación semanal con métodos específicos:")
 
-agregacion_semanal = df_sensores.resample('W')['valor'].agg({
-        'mean',
-        'std',
-         'min',
-        'max',
-        lambda x: x.max() - x.min(),
-        'median'
+agregacion_semanal = agregar_resample(df_sensores, 'W', {
+    'valor': ['mean', 'std', 'min', 'max', 'rango', 'median']
 })
 agregacion_semanal.columns = [
     'promedio', 'desviacion', 'minimo', 'maximo', 'rango', 'mediana'
@@ -189,6 +190,23 @@ print(f"• Backward fill: {resampling_bfill['valor'].isna().sum()} valores falt
 resampling_interp = df_con_faltantes[columnas_numericas].resample('H').mean().interpolate(method='linear')
 print(f"• Interpolación lineal: {resampling_interp['valor'].isna().sum()} valores faltantes")
 
+# Relleno con límites por pozo, sin pivotear: primero el índice de huecos,
+# después cada estrategia decide qué huecos rellenar
+huecos = indice_huecos(df_con_faltantes, columnas=['valor'], columna_grupo='pozo_id')
+print(f"\nÍndice de huecos: {len(huecos)} huecos, el más largo de {huecos['filas'].max()} lecturas "
+      f"({huecos['duracion'].max()} sin datos)")
+
+estrategias = {
+    'Forward fill hasta 30 min': dict(metodo='ffill', limite='30min'),
+    'Interpolación por tiempo (huecos <= 1 h)': dict(metodo='lineal', max_hueco='1h'),
+}
+for nombre, parametros in estrategias.items():
+    relleno, cobertura = rellenar_huecos(df_con_faltantes, columnas=['valor'], columna_grupo='pozo_id',
+                                         **parametros)
+    print(f"• {nombre}: {relleno['valor'].isna().sum()} valores faltantes")
+    print(cobertura[['faltantes', 'rellenados', 'sin_rellenar', 'cobertura_inicial', 'cobertura_final']]
+          .round(3).to_string())
+
 # =============================================================================
 # EJERCICIO 7: RESAMPLING AVANZADO - MÚLTIPLES FRECUENCIAS
 # =============================================================================
@@ -196,12 +214,11 @@ print(f"• Interpolación lineal: {resampling_interp['valor'].isna().sum()} val
 print("\n\n7. RESAMPLING AVANZADO - MÚLTIPLES FRECUENCIAS...")
 print("-" * 50)
 
-# Crear múltiples resamplings para análisis comparativo
+# Crear múltiples resamplings para análisis comparativo. La pirámide recorre
+# los datos una vez para la frecuencia más fina y arma cada nivel más grueso
+# combinando el anterior (15T → H → 6H → D → W)
 frecuencias = ['15T', 'H', '6H', 'D', 'W']
-resamplings = {}
-
-for freq in frecuencias:
-    resamplings[freq] = df_sensores.resample(freq)['valor'].agg(['mean', 'std', 'count'])
+resamplings = piramide_resample(df_sensores['valor'], frecuencias, agregados=['mean', 'std', 'count'])
 
 print("Comparación de resamplings a diferentes frecuencias:")
 for freq, data in resamplings.items():
@@ -210,6 +227,13 @@ for freq, data in resamplings.items():
     print(f"  • Promedio: {data['mean'].mean():.2f}")
     print(f"  • Desviación estándar: {data['std'].mean():.2f}")
 
+# Modo por bloques: el mismo resample leyendo el CSV de a pedazos, para
+# archivos de sensores que no caben en memoria
+diario_por_bloques = resample_por_bloques('sensores_temporales', 'D', agregados=['mean', 'std', 'count'],
+                                          filas_por_bloque=50)
+coincide = np.allclose(diario_por_bloques.to_numpy(), resamplings['D'].to_numpy(), equal_nan=True)
+print(f"\nResample diario por bloques de 50 filas igual al resample en memoria: {coincide}")
+
 # =============================================================================
 # EJERCICIO 8: VISUALIZACIÓN DE RESAMPLING
 # =============================================================================
@@ -217,40 +241,42 @@ for freq, data in resamplings.items():
 print("\n\n8. VISUALIZACIÓN DE RESAMPLING...")
 print("-" * 50)
 
-# Crear figura con subplots
-fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-fig.suptitle('Análisis de Resampling Temporal', fontsize=16)
-
-# Gráfico 1: Datos originales (15 minutos)
-axes[0, 0].plot(df_sensores.index, df_sensores['valor'], 'b-', linewidth=0.5, alpha=0.7)
-axes[0, 0].set_title('Datos Originales (15 minutos)')
-axes[0, 0].set_xlabel('Fecha')
-axes[0, 0].set_ylabel('Valor del Sensor')
-axes[0, 0].grid(True, alpha=0.3)
-
-# Gráfico 2: Resampling a 1 hora
-axes[0, 1].plot(df_hora.index, df_hora['valor'], 'r-', linewidth=1.5)
-axes[0, 1].set_title('Resampling a 1 Hora (Promedio)')
-axes[0, 1].set_xlabel('Fecha')
-axes[0, 1].set_ylabel('Valor Promedio')
-axes[0, 1].grid(True, alpha=0.3)
-
-# Gráfico 3: Resampling a 6 horas
-axes[1, 0].plot(df_6h.index, df_6h['valor'], 'g-', linewidth=2)
-axes[1, 0].set_title('Resampling a 6 Horas (Promedio)')
-axes[1, 0].set_xlabel('Fecha')
-axes[1, 0].set_ylabel('Valor Promedio')
-axes[1, 0].grid(True, alpha=0.3)
-
-# Gráfico 4: Resampling a 1 día
-axes[1, 1].plot(df_dia.index, df_dia['valor'], 'purple', linewidth=2.5)
-axes[1, 1].set_title('Resampling a 1 Día (Promedio)')
-axes[1, 1].set_xlabel('Fecha')
-axes[1, 1].set_ylabel('Valor Promedio')
-axes[1, 1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.show()
+if graficos.activos():
+    plt = graficos.pyplot()
+    # Crear figura con subplots
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig.suptitle('Análisis de Resampling Temporal', fontsize=16)
+
+    # Gráfico 1: Datos originales (15 minutos)
+    graficar_serie(axes[0, 0], df_sensores['valor'], 'b-', linewidth=0.5, alpha=0.7)
+    axes[0, 0].set_title('Datos Originales (15 minutos)')
+    axes[0, 0].set_xlabel('Fecha')
+    axes[0, 0].set_ylabel('Valor del Sensor')
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Gráfico 2: Resampling a 1 hora
+    graficar_serie(axes[0, 1], df_hora['valor'], 'r-', linewidth=1.5)
+    axes[0, 1].set_title('Resampling a 1 Hora (Promedio)')
+    axes[0, 1].set_xlabel('Fecha')
+    axes[0, 1].set_ylabel('Valor Promedio')
+    axes[0, 1].grid(True, alpha=0.3)
+
+    # Gráfico 3: Resampling a 6 horas
+    graficar_serie(axes[1, 0], df_6h['valor'], 'g-', linewidth=2)
+    axes[1, 0].set_title('Resampling a 6 Horas (Promedio)')
+    axes[1, 0].set_xlabel('Fecha')
+    axes[1, 0].set_ylabel('Valor Promedio')
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Gráfico 4: Resampling a 1 día
+    graficar_serie(axes[1, 1], df_dia['valor'], 'purple', linewidth=2.5)
+    axes[1, 1].set_title('Resampling a 1 Día (Promedio)')
+    axes[1, 1].set_xlabel('Fecha')
+    axes[1, 1].set_ylabel('Valor Promedio')
+    axes[1, 1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    graficos.mostrar(fig, 'lab_02_visualizacion_resampling')
 
 # =============================================================================
 # EJERCICIO 9: ANÁLISIS DE ESTADÍSTICAS POR FRECUENCIA
@@ -280,9 +306,7 @@ print("\n\n10. RESAMPLING CON EVENTOS OPERACIONALES...")
 print("-" * 50)
 
 # Cargar datos de eventos operacionales
-df_eventos = pd.read_csv('../datos/eventos_operacionales.csv')
-df_eventos['fecha_evento'] = pd.to_datetime(df_eventos['fecha_evento'])
-df_eventos.set_index('fecha_evento', inplace=True)
+df_eventos = cargar_dataset('eventos_operacionales')
 
 print("Datos de eventos operacionales:")
 print(df_eventos.head())
@@ -307,6 +331,15 @@ eventos_semanales = df_eventos.resample('W').agg({
 print("\nAgregación semanal de eventos:")
 print(eventos_semanales.head())
 
+# Los eventos son de dos pozos: el resample anterior los mezcla. Por pozo,
+# sin recorrer groupby con un ciclo
+eventos_semanales_pozo = resample_por_grupo(df_eventos, 'pozo_id', 'W',
+                                            columnas=['duracion_horas', 'impacto_produccion'],
+                                            agregados=['sum', 'count'])
+
+print("\nAgregación semanal de eventos por pozo:")
+print(eventos_semanales_pozo.head(10))
+
 # =============================================================================
 # EJERCICIO 11: ANÁLISIS INTEGRADO - SENSORES Y EVENTOS
 # =============================================================================
@@ -329,6 +362,13 @@ correlaciones = analisis_integrado.corr()
 print("\nCorrelaciones entre variables:")
 print(correlaciones)
 
+# Las sumas diarias ignoran cuánto dura cada evento: marcar cada lectura con
+# los eventos activos de su pozo usa el intervalo completo
+sensores_eventos = marcar_eventos(df_sensores, df_eventos, columnas=['tipo_evento'])
+print("\nLecturas de sensores por evento activo:")
+print(sensores_eventos.groupby('tipo_evento', observed=True)['valor'].agg(['count', 'mean', 'std']).round(2))
+print(f"Lecturas sin eventos activos: {(sensores_eventos['eventos_activos'] == 0).sum()}")
+
 # =============================================================================
 # EJERCICIO 12: RESUMEN Y CONCLUSIONES
 # =============================================================================
@@ -7,8 +7,25 @@ Objetivo: Implementar rolling windows y funciones móviles para análisis de ten
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+import os
+import sys
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales import (
+    DetectorLimites,
+    cargar_dataset,
+    compactar,
+    correlacion_movil,
+    cuantiles_moviles,
+    estadisticas_moviles,
+    estadisticas_moviles_tiempo,
+    graficar_serie,
+    graficos,
+    pendiente_movil,
+    resumir_reporte,
+)
 
 # Configuración para mejor visualización
 pd.set_option('display.max_columns', None)
@@ -26,12 +43,8 @@ print("=" * 80)
 print("\n1. CARGANDO DATOS DE PARÁMETROS DE POZOS...")
 print("-" * 50)
 
-# Cargar datos de parámetros de pozos
-df_parametros = pd.read_csv('../datos/parametros_pozos.csv')
-
-# Convertir fecha a datetime y establecer como índice
-df_parametros['fecha'] = pd.to_datetime(df_parametros['fecha'])
-df_parametros.set_index('fecha', inplace=True)
+# Cargar datos de parámetros de pozos con fecha como DatetimeIndex
+df_parametros = cargar_dataset('parametros_pozos')
 
 print(f"Forma del dataset: {df_parametros.shape}")
 print(f"Rango temporal: {df_parametros.index.min()} a {df_parametros.index.max()}")
@@ -48,17 +61,25 @@ print(df_parametros.head(10))
 print("\n\n2. ROLLING WINDOWS BÁSICOS...")
 print("-" * 50)
 
+# Todas las estadísticas móviles de los ejercicios 2 a 6 se calculan en una
+# sola pasada: las sumas prefijas se comparten entre estadísticas y ventanas
+ventanas = [4, 28, 120, 240]  # 1 día, 1 semana, 1 mes, 2 meses
+estadisticas = estadisticas_moviles(
+    df_parametros[['caudal_bpd', 'presion_cabeza_psi', 'temperatura_cabeza_f']],
+    estadisticas=['mean', 'median', 'std', 'min', 'max'],
+    ventanas=ventanas)
+
 # Rolling window de 7 días (28 registros de 6 horas)
-df_parametros['produccion_ma_7d'] = df_parametros['caudal_bpd'].rolling(window=28).mean()
-df_parametros['presion_ma_7d'] = df_parametros['presion_cabeza_psi'].rolling(window=28).mean()
-df_parametros['temperatura_ma_7d'] = df_parametros['temperatura_cabeza_f'].rolling(window=28).mean()
+df_parametros['produccion_ma_7d'] = estadisticas[('caudal_bpd', 'mean', 28)]
+df_parametros['presion_ma_7d'] = estadisticas[('presion_cabeza_psi', 'mean', 28)]
+df_parametros['temperatura_ma_7d'] = estadisticas[('temperatura_cabeza_f', 'mean', 28)]
 
 print("Medias móviles de 7 días calculadas:")
 print(df_parametros[['caudal_bpd', 'produccion_ma_7d', 'presion_cabeza_psi', 'presion_ma_7d']].head(15))
 
 # Rolling window de 30 días (120 registros de 6 horas)
-df_parametros['produccion_ma_30d'] = df_parametros['caudal_bpd'].rolling(window=120).mean()
-df_parametros['presion_ma_30d'] = df_parametros['presion_cabeza_psi'].rolling(window=120).mean()
+df_parametros['produccion_ma_30d'] = estadisticas[('caudal_bpd', 'mean', 120)]
+df_parametros['presion_ma_30d'] = estadisticas[('presion_cabeza_psi', 'mean', 120)]
 
 print("\nMedias móviles de 30 días calculadas:")
 print(df_parametros[['caudal_bpd', 'produccion_ma_30d', 'presion_cabeza_psi', 'presion_ma_30d']].head(15))
@@ -70,12 +91,11 @@ print(df_parametros[['caudal_bpd', 'produccion_ma_30d', 'presion_cabeza_psi', 'p
 print("\n\n3. DIFERENTES FUNCIONES DE ROLLING...")
 print("-" * 50)
 
-# Múltiples funciones de rolling para producción
-df_parametros['produccion_ma_7d'] = df_parametros['caudal_bpd'].rolling(window=28).mean()
-df_parametros['produccion_mediana_7d'] = df_parametros['caudal_bpd'].rolling(window=28).median()
-df_parametros['produccion_std_7d'] = df_parametros['caudal_bpd'].rolling(window=28).std()
-df_parametros['produccion_min_7d'] = df_parametros['caudal_bpd'].rolling(window=28).min()
-df_parametros['produccion_max_7d'] = df_parametros['caudal_bpd'].rolling(window=28).max()
+# Múltiples funciones de rolling para producción (produccion_ma_7d ya existe)
+df_parametros['produccion_mediana_7d'] = estadisticas[('caudal_bpd', 'median', 28)]
+df_parametros['produccion_std_7d'] = estadisticas[('caudal_bpd', 'std', 28)]
+df_parametros['produccion_min_7d'] = estadisticas[('caudal_bpd', 'min', 28)]
+df_parametros['produccion_max_7d'] = estadisticas[('caudal_bpd', 'max', 28)]
 
 print("Estadísticas de rolling window de 7 días para producción:")
 print(df_parametros[['caudal_bpd', 'produccion_ma_7d', 'produccion_mediana_7d', 
@@ -89,16 +109,25 @@ print("\n\n4. ROLLING WINDOWS CON DIFERENTES TAMAÑOS...")
 print("-" * 50)
 
 # Rolling windows de diferentes tamaños
-ventanas = [4, 28, 120, 240]  # 1 día, 1 semana, 1 mes, 2 meses
-
 for ventana in ventanas:
-    df_parametros[f'produccion_ma_{ventana}'] = df_parametros['caudal_bpd'].rolling(window=ventana).mean()
-    df_parametros[f'presion_ma_{ventana}'] = df_parametros['presion_cabeza_psi'].rolling(window=ventana).mean()
+    df_parametros[f'produccion_ma_{ventana}'] = estadisticas[('caudal_bpd', 'mean', ventana)]
+    df_parametros[f'presion_ma_{ventana}'] = estadisticas[('presion_cabeza_psi', 'mean', ventana)]
 
 print("Medias móviles con diferentes tamaños de ventana:")
 columnas_rolling = ['caudal_bpd'] + [f'produccion_ma_{v}' for v in ventanas]
 print(df_parametros[columnas_rolling].head(15))
 
+# Ventanas por tiempo: '7D' mide 7 días aunque falten registros, mientras
+# que 28 registros abarcan más de 7 días si hay huecos. Los límites de cada
+# ventana se buscan una vez y sirven para todas las estadísticas
+df_con_huecos = df_parametros[['caudal_bpd']].sample(frac=0.9, random_state=42).sort_index()
+por_tiempo = estadisticas_moviles_tiempo(df_con_huecos, ['mean', 'count'], ['7D', '30D'])
+por_registros = df_con_huecos['caudal_bpd'].rolling(window=28).mean()
+print("\nVentana de 7 días con 10% de registros faltantes:")
+print(f"• Registros por ventana '7D': {por_tiempo[('caudal_bpd', 'count', '7D')].iloc[28:].mean():.1f} en promedio")
+print(f"• Diferencia media entre '7D' y 28 registros: "
+      f"{(por_tiempo[('caudal_bpd', 'mean', '7D')] - por_registros).abs().mean():.2f} bpd")
+
 # =============================================================================
 # EJERCICIO 5: ANÁLISIS DE TENDENCIAS CON ROLLING
 # =============================================================================
@@ -107,17 +136,10 @@ print("\n\n5. ANÁLISIS DE TENDENCIAS CON ROLLING...")
 print("-" * 50)
 
 # Calcular tendencia móvil usando regresión lineal
-def calcular_tendencia(serie):
-    """Calcula la pendiente de la línea de tendencia en una ventana móvil"""
-    if len(serie) < 2:
-        return np.nan
-    x = np.arange(len(serie))
-    slope = np.polyfit(x, serie, 1)[0]
-    return slope
-
-# Aplicar función de tendencia en ventana móvil de 7 días
-df_parametros['tendencia_7d'] = df_parametros['caudal_bpd'].rolling(window=28).apply(calcular_tendencia)
-df_parametros['tendencia_30d'] = df_parametros['caudal_bpd'].rolling(window=120).apply(calcular_tendencia)
+# pendiente_movil equivale a rolling(window=...).apply(calcular_tendencia) con
+# np.polyfit, pero usa sumas acumuladas y cuesta O(n) sin importar la ventana
+df_parametros['tendencia_7d'] = pendiente_movil(df_parametros['caudal_bpd'], ventana=28)
+df_parametros['tendencia_30d'] = pendiente_movil(df_parametros['caudal_bpd'], ventana=120)
 
 print("Análisis de tendencias móviles:")
 print(df_parametros[['caudal_bpd', 'tendencia_7d', 'tendencia_30d']].head(15))
@@ -135,9 +157,8 @@ print("• Valores cercanos a cero: Sin tendencia clara")
 print("\n\n6. DETECCIÓN DE ANOMALÍAS CON ROLLING...")
 print("-" * 50)
 
-# Calcular límites de control usando rolling statistics
-df_parametros['produccion_ma_7d'] = df_parametros['caudal_bpd'].rolling(window=28).mean()
-df_parametros['produccion_std_7d'] = df_parametros['caudal_bpd'].rolling(window=28).std()
+# Calcular límites de control usando las rolling statistics del ejercicio 3
+# (produccion_ma_7d y produccion_std_7d)
 
 # Límites de control (3 desviaciones estándar)
 df_parametros['limite_superior'] = df_parametros['produccion_ma_7d'] + (3 * df_parametros['produccion_std_7d'])
@@ -157,6 +178,26 @@ print(df_parametros[['caudal_bpd', 'produccion_ma_7d', 'limite_superior',
 num_anomalias = df_parametros['es_anomalia'].sum()
 print(f"\nTotal de anomalías detectadas: {num_anomalias}")
 
+# Detección en línea: el detector mantiene la ventana de 28 lecturas y
+# actualiza media y desviación en O(1) por lectura, sin recalcular la
+# historia. Aquí se procesa un lote inicial y luego lectura por lectura.
+detector = DetectorLimites(ventana=28, sigmas=3)
+caudal = df_parametros['caudal_bpd']
+inicial = detector.actualizar(caudal.iloc[:100])
+posteriores = [detector.actualizar(lectura)['es_anomalia'][0] for lectura in caudal.iloc[100:]]
+anomalias_en_linea = int(inicial['es_anomalia'].sum() + sum(posteriores))
+print(f"Anomalías detectadas en línea: {anomalias_en_linea} (lecturas procesadas: {detector.lecturas})")
+
+# Método de percentiles: bandas p5-p95 de las últimas 28 lecturas. Todos los
+# cuantiles salen de una sola estructura ordenada por tramo de datos
+bandas = cuantiles_moviles(df_parametros[['caudal_bpd']], [0.05, 0.95, 'mad'], [28])
+es_anomalia_percentil = (
+    (df_parametros['caudal_bpd'] > bandas[('caudal_bpd', 0.95, 28)]) |
+    (df_parametros['caudal_bpd'] < bandas[('caudal_bpd', 0.05, 28)])
+)
+print(f"Anomalías por percentiles (p5-p95, 7 días): {es_anomalia_percentil.sum()}")
+print(f"MAD móvil de 7 días (promedio): {bandas[('caudal_bpd', 'mad', 28)].mean():.2f} bpd")
+
 # =============================================================================
 # EJERCICIO 7: ROLLING WINDOWS CON CENTERING
 # =============================================================================
@@ -194,10 +235,10 @@ print("-" * 50)
 
 # Calcular estacionalidad usando rolling window de 1 año (aproximadamente)
 # Como tenemos datos de 1 mes, usaremos un período más corto para demostración
-df_parametros['estacionalidad_7d'] = df_parametros['caudal_bpd'].rolling(window=28).mean()
+df_parametros['estacionalidad_7d'] = df_parametros['produccion_ma_7d']
 
 # Calcular componente de tendencia (rolling window más largo)
-df_parametros['tendencia_30d'] = df_parametros['caudal_bpd'].rolling(window=120).mean()
+df_parametros['tendencia_30d'] = df_parametros['produccion_ma_30d']
 
 # Calcular residuos (datos - tendencia - estacionalidad)
 df_parametros['residuos'] = df_parametros['caudal_bpd'] - df_parametros['tendencia_30d'] - df_parametros['estacionalidad_7d']
@@ -205,6 +246,19 @@ df_parametros['residuos'] = df_parametros['caudal_bpd'] - df_parametros['tendenc
 print("Descomposición de la serie temporal:")
 print(df_parametros[['caudal_bpd', 'tendencia_30d', 'estacionalidad_7d', 'residuos']].head(15))
 
+# Las columnas derivadas que ya se mostraron no se usan en los gráficos ni en
+# el resumen: se descartan, y las demás pasan a tipos angostos (float32 con
+# error relativo menor a 1e-6)
+derivadas = ['presion_ma_7d', 'temperatura_ma_7d', 'presion_ma_30d', 'produccion_mediana_7d', 'produccion_std_7d',
+             'produccion_min_7d', 'produccion_max_7d', 'produccion_ma_centrada', 'presion_ma_centrada',
+             'produccion_ma_min_periods', 'residuos']
+derivadas += [f'{prefijo}_{ventana}' for ventana in ventanas for prefijo in ('produccion_ma', 'presion_ma')]
+df_parametros, reporte_memoria = compactar(df_parametros, tolerancia=1e-6, descartar=derivadas)
+
+print("\nCompactación de df_parametros:")
+print(reporte_memoria[reporte_memoria['accion'] != ''])
+print(f"Memoria total: {resumir_reporte(reporte_memoria)}")
+
 # =============================================================================
 # EJERCICIO 10: VISUALIZACIÓN DE ROLLING WINDOWS
 # =============================================================================
@@ -212,55 +266,59 @@ print(df_parametros[['caudal_bpd', 'tendencia_30d', 'estacionalidad_7d', 'residu
 print("\n\n10. VISUALIZACIÓN DE ROLLING WINDOWS...")
 print("-" * 50)
 
-# Crear figura con subplots
-fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-fig.suptitle('Análisis de Rolling Windows y Tendencias', fontsize=16)
-
-# Gráfico 1: Producción con medias móviles
-axes[0, 0].plot(df_parametros.index, df_parametros['caudal_bpd'], 'b-', linewidth=1, alpha=0.7, label='Producción')
-axes[0, 0].plot(df_parametros.index, df_parametros['produccion_ma_7d'], 'r-', linewidth=2, label='MA 7 días')
-axes[0, 0].plot(df_parametros.index, df_parametros['produccion_ma_30d'], 'g-', linewidth=2, label='MA 30 días')
-axes[0, 0].set_title('Producción con Medias Móviles')
-axes[0, 0].set_xlabel('Fecha')
-axes[0, 0].set_ylabel('Producción (BPD)')
-axes[0, 0].legend()
-axes[0, 0].grid(True, alpha=0.3)
-
-# Gráfico 2: Límites de control y anomalías
-axes[0, 1].plot(df_parametros.index, df_parametros['caudal_bpd'], 'b-', linewidth=1, alpha=0.7, label='Producción')
-axes[0, 1].plot(df_parametros.index, df_parametros['limite_superior'], 'r--', linewidth=1, label='Límite Superior')
-axes[0, 1].plot(df_parametros.index, df_parametros['limite_inferior'], 'r--', linewidth=1, label='Límite Inferior')
-axes[0, 1].scatter(df_parametros[df_parametros['es_anomalia']].index, 
-                   df_parametros[df_parametros['es_anomalia']]['caudal_bpd'], 
-                   color='red', s=50, label='Anomalías')
-axes[0, 1].set_title('Detección de Anomalías')
-axes[0, 1].set_xlabel('Fecha')
-axes[0, 1].set_ylabel('Producción (BPD)')
-axes[0, 1].legend()
-axes[0, 1].grid(True, alpha=0.3)
-
-# Gráfico 3: Descomposición de la serie temporal
-axes[1, 0].plot(df_parametros.index, df_parametros['caudal_bpd'], 'b-', linewidth=1, alpha=0.7, label='Original')
-axes[1, 0].plot(df_parametros.index, df_parametros['tendencia_30d'], 'r-', linewidth=2, label='Tendencia')
-axes[1, 0].plot(df_parametros.index, df_parametros['estacionalidad_7d'], 'g-', linewidth=2, label='Estacionalidad')
-axes[1, 0].set_title('Descomposición de Serie Temporal')
-axes[1, 0].set_xlabel('Fecha')
-axes[1, 0].set_ylabel('Producción (BPD)')
-axes[1, 0].legend()
-axes[1, 0].grid(True, alpha=0.3)
-
-# Gráfico 4: Análisis de tendencias
-axes[1, 1].plot(df_parametros.index, df_parametros['tendencia_7d'], 'b-', linewidth=1, label='Tendencia 7 días')
-axes[1, 1].plot(df_parametros.index, df_parametros['tendencia_30d'], 'r-', linewidth=1, label='Tendencia 30 días')
-axes[1, 1].axhline(y=0, color='black', linestyle='--', alpha=0.5)
-axes[1, 1].set_title('Análisis de Tendencias')
-axes[1, 1].set_xlabel('Fecha')
-axes[1, 1].set_ylabel('Pendiente de Tendencia')
-axes[1, 1].legend()
-axes[1, 1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.show()
+if graficos.activos():
+    plt = graficos.pyplot()
+    # Crear figura con subplots
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig.suptitle('Análisis de Rolling Windows y Tendencias', fontsize=16)
+
+    # Gráfico 1: Producción con medias móviles
+    graficar_serie(axes[0, 0], df_parametros['caudal_bpd'], 'b-', linewidth=1, alpha=0.7, label='Producción')
+    graficar_serie(axes[0, 0], df_parametros['produccion_ma_7d'], 'r-', linewidth=2, label='MA 7 días')
+    graficar_serie(axes[0, 0], df_parametros['produccion_ma_30d'], 'g-', linewidth=2, label='MA 30 días')
+    axes[0, 0].set_title('Producción con Medias Móviles')
+    axes[0, 0].set_xlabel('Fecha')
+    axes[0, 0].set_ylabel('Producción (BPD)')
+    axes[0, 0].legend()
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Gráfico 2: Límites de control y anomalías
+    # La línea decimada pasa siempre por las anomalías marcadas
+    graficar_serie(axes[0, 1], df_parametros['caudal_bpd'], 'b-', linewidth=1, alpha=0.7, label='Producción',
+                   conservar=df_parametros['es_anomalia'])
+    graficar_serie(axes[0, 1], df_parametros['limite_superior'], 'r--', linewidth=1, label='Límite Superior')
+    graficar_serie(axes[0, 1], df_parametros['limite_inferior'], 'r--', linewidth=1, label='Límite Inferior')
+    axes[0, 1].scatter(df_parametros[df_parametros['es_anomalia']].index, 
+                       df_parametros[df_parametros['es_anomalia']]['caudal_bpd'], 
+                       color='red', s=50, label='Anomalías')
+    axes[0, 1].set_title('Detección de Anomalías')
+    axes[0, 1].set_xlabel('Fecha')
+    axes[0, 1].set_ylabel('Producción (BPD)')
+    axes[0, 1].legend()
+    axes[0, 1].grid(True, alpha=0.3)
+
+    # Gráfico 3: Descomposición de la serie temporal
+    graficar_serie(axes[1, 0], df_parametros['caudal_bpd'], 'b-', linewidth=1, alpha=0.7, label='Original')
+    graficar_serie(axes[1, 0], df_parametros['tendencia_30d'], 'r-', linewidth=2, label='Tendencia')
+    graficar_serie(axes[1, 0], df_parametros['estacionalidad_7d'], 'g-', linewidth=2, label='Estacionalidad')
+    axes[1, 0].set_title('Descomposición de Serie Temporal')
+    axes[1, 0].set_xlabel('Fecha')
+    axes[1, 0].set_ylabel('Producción (BPD)')
+    axes[1, 0].legend()
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Gráfico 4: Análisis de tendencias
+    graficar_serie(axes[1, 1], df_parametros['tendencia_7d'], 'b-', linewidth=1, label='Tendencia 7 días')
+    graficar_serie(axes[1, 1], df_parametros['tendencia_30d'], 'r-', linewidth=1, label='Tendencia 30 días')
+    axes[1, 1].axhline(y=0, color='black', linestyle='--', alpha=0.5)
+    axes[1, 1].set_title('Análisis de Tendencias')
+    axes[1, 1].set_xlabel('Fecha')
+    axes[1, 1].set_ylabel('Pendiente de Tendencia')
+    axes[1, 1].legend()
+    axes[1, 1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    graficos.mostrar(fig, 'lab_03_visualizacion_tendencias')
 
 # =============================================================================
 # EJERCICIO 11: ANÁLISIS DE CORRELACIÓN MÓVIL
@@ -270,18 +328,7 @@ print("\n\n11. ANÁLISIS DE CORRELACIÓN MÓVIL...")
 print("-" * 50)
 
 # Calcular correlación móvil entre producción y presión
-def correlacion_movil(serie1, serie2, ventana=28):
-    """Calcula la correlación móvil entre dos series"""
-    correlaciones = []
-    for i in range(len(serie1)):
-        if i < ventana - 1:
-            correlaciones.append(np.nan)
-        else:
-            corr = np.corrcoef(serie1.iloc[i-ventana+1:i+1], 
-                              serie2.iloc[i-ventana+1:i+1])[0, 1]
-            correlaciones.append(corr)
-    return pd.Series(correlaciones, index=serie1.index)
-
+# correlacion_movil usa sumas acumuladas en lugar de np.corrcoef fila por fila
 df_parametros['correlacion_prod_presion'] = correlacion_movil(
     df_parametros['caudal_bpd'], df_parametros['presion_cabeza_psi'], ventana=28)
 
@@ -0,0 +1,68 @@
+"""
+PRUEBAS DE COVARIANZA Y CORRELACIÓN MÓVIL
+Sesión 12: Series Temporales en Pandas
+
+Compara `series_temporales.correlacion` con `DataFrame.rolling().corr()` y
+`rolling().cov()` sobre datos/parametros_pozos.csv.
+
+Uso:
+    python -m pytest tests/test_correlacion.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales.carga import cargar_dataset
+from series_temporales.correlacion import correlacion_movil, covarianza_movil, matriz_correlacion_movil
+
+VENTANA = 28
+
+
+@pytest.fixture(scope='module')
+def numericas():
+    return cargar_dataset('parametros_pozos').select_dtypes('number').astype(np.float64)
+
+
+def _pares_constantes(df, ventana):
+    """(filas, k, k) True donde alguna columna del par es constante en la ventana"""
+    moviles = df.rolling(ventana)
+    constantes = (moviles.max() == moviles.min()).to_numpy()
+    return constantes[:, :, None] | constantes[:, None, :]
+
+
+def test_matriz_correlacion_igual_a_pandas(numericas):
+    obtenida = matriz_correlacion_movil(numericas, VENTANA)
+    esperada = numericas.rolling(VENTANA).corr()
+    assert obtenida.index.equals(esperada.index)
+
+    k = numericas.shape[1]
+    obtenida = obtenida.to_numpy().reshape(-1, k, k)
+    esperada = esperada.to_numpy().reshape(-1, k, k)
+    constantes = _pares_constantes(numericas, VENTANA)
+    assert constantes.any()
+    # Con una columna constante la correlación no está definida. pandas da
+    # NaN, 0 o ±inf según la versión y el residuo de redondeo de su varianza
+    assert np.isnan(obtenida[constantes]).all()
+    np.testing.assert_allclose(obtenida[~constantes], esperada[~constantes], rtol=0, atol=1e-9)
+
+
+def test_correlacion_con_columna_constante():
+    indice = pd.date_range('2023-01-01', periods=200, freq='h')
+    x = pd.Series(np.linspace(3e4, 3.1e4, 200), index=indice)
+    y = pd.Series(np.sin(np.arange(200)), index=indice)
+    x.iloc[100:150] = 7.7
+    correlacion = correlacion_movil(x, y, VENTANA)
+    assert correlacion.iloc[100 + VENTANA - 1:150].isna().all()
+    assert correlacion.iloc[VENTANA - 1:100].notna().all()
+
+
+def test_covarianza_igual_a_pandas(numericas):
+    obtenida = covarianza_movil(numericas, VENTANA)
+    esperada = numericas.rolling(VENTANA).cov()
+    pd.testing.assert_frame_equal(obtenida, esperada, check_exact=False, rtol=1e-9, atol=1e-9)
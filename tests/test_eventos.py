@@ -0,0 +1,74 @@
+"""
+PRUEBAS DEL CRUCE DE EVENTOS CON MUESTRAS
+Sesión 12: Series Temporales en Pandas
+
+Compara `series_temporales.eventos` con un recorrido evento por evento
+sobre varios pozos con eventos solapados, duraciones faltantes y pozos
+sin muestras.
+
+Uso:
+    python -m pytest tests/test_eventos.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales.eventos import marcar_eventos, unir_eventos
+
+
+@pytest.fixture(scope='module')
+def datos():
+    generador = np.random.default_rng(0)
+    pozos = [f'PZ{numero:03d}' for numero in range(40)]
+    fechas = pd.date_range('2023-01-01', periods=200, freq='h')
+    muestras = pd.DataFrame({
+        'pozo_id': np.repeat(pozos, len(fechas)),
+        'valor': generador.normal(size=len(pozos) * len(fechas)),
+    }, index=pd.DatetimeIndex(np.tile(fechas.to_numpy(), len(pozos)), name='fecha')).sample(frac=1, random_state=0)
+    cantidad = 300
+    eventos = pd.DataFrame({
+        # Dos pozos sin muestras
+        'pozo_id': generador.choice(pozos + ['PZ900', 'PZ901'], cantidad),
+        'tipo_evento': generador.choice(['Mantenimiento', 'Falla', 'Prueba'], cantidad),
+        'duracion_horas': np.where(generador.random(cantidad) < 0.1, np.nan, generador.uniform(0, 12, cantidad)),
+    }, index=pd.DatetimeIndex(pd.Timestamp('2022-12-31') + pd.to_timedelta(generador.uniform(0, 240, cantidad),
+                                                                             unit='h'), name='fecha_evento'))
+    return muestras, eventos
+
+
+def _pares_esperados(muestras, eventos):
+    """Pares (muestra, evento) recorriendo evento por evento"""
+    tiempos = muestras.index.as_unit('ns').asi8
+    pares = set()
+    for evento, (inicio, pozo, duracion) in enumerate(zip(eventos.index.as_unit('ns').asi8, eventos['pozo_id'],
+                                                        eventos['duracion_horas'])):
+        if np.isnan(duracion):
+            continue
+        fin = inicio + int(round(duracion * 3600e9))
+        dentro = (muestras['pozo_id'].to_numpy() == pozo) & (tiempos >= inicio) & (tiempos < fin)
+        pares.update((int(muestra), evento) for muestra in np.flatnonzero(dentro))
+    return pares
+
+
+def test_unir_eventos(datos):
+    muestras, eventos = datos
+    pares = unir_eventos(muestras, eventos)
+    assert len(pares) > 1000
+    assert set(zip(pares['muestra'], pares['evento'])) == _pares_esperados(muestras, eventos)
+    assert (pares['pozo_id'].to_numpy() == muestras['pozo_id'].to_numpy()[pares['muestra']]).all()
+
+
+def test_marcar_eventos(datos):
+    muestras, eventos = datos
+    marcadas = marcar_eventos(muestras, eventos)
+    activos = np.zeros(len(muestras), dtype=np.int64)
+    for muestra, _ in _pares_esperados(muestras, eventos):
+        activos[muestra] += 1
+    np.testing.assert_array_equal(marcadas['eventos_activos'], activos)
+    assert marcadas['tipo_evento'].notna().to_numpy().tolist() == (activos > 0).tolist()
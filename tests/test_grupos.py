@@ -0,0 +1,86 @@
+"""
+PRUEBAS DE RESAMPLING POR POZO
+Sesión 12: Series Temporales en Pandas
+
+Compara `series_temporales.grupos.resample_por_grupo` con
+`groupby(pozo).resample(freq).agg(...)`, incluidos los tipos de las
+columnas enteras, y `buscar_por_grupo` con un `searchsorted` por grupo.
+
+Uso:
+    python -m pytest tests/test_grupos.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales.grupos import buscar_por_grupo, resample_por_grupo
+
+AGREGADOS = ['sum', 'min', 'max', 'first', 'last', 'count', 'mean']
+
+
+@pytest.fixture(scope='module')
+def pozos():
+    """Dos pozos con lecturas horarias enteras y uno con un día sin datos"""
+    generador = np.random.default_rng(0)
+    partes = []
+    for pozo, fechas in [('PZ001', pd.date_range('2023-01-01', periods=240, freq='h')),
+                         ('PZ002', pd.date_range('2023-01-02', periods=96, freq='h').delete(range(24, 48)))]:
+        partes.append(pd.DataFrame({
+            'pozo_id': pozo,
+            'produccion_bpd': generador.integers(20000, 30000, len(fechas)).astype(np.int32),
+            'presion_psi': generador.normal(2000, 50, len(fechas)),
+        }, index=pd.DatetimeIndex(fechas, name='fecha')))
+    return pd.concat(partes)
+
+
+@pytest.mark.parametrize('freq', ['6h', 'D'])
+def test_igual_a_pandas(pozos, freq):
+    for columna in ['produccion_bpd', 'presion_psi']:
+        obtenido = resample_por_grupo(pozos, 'pozo_id', freq, columnas=[columna], agregados=AGREGADOS)
+        esperado = pozos.groupby('pozo_id').resample(freq)[columna].agg(AGREGADOS)
+        pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False, check_index_type=False,
+                                      check_names=False)
+
+
+def test_enteros_conservan_tipo(pozos):
+    # Sin intervalos vacíos: min, max, first y last conservan int32 y la suma queda en int64
+    completos = pozos[pozos['pozo_id'] == 'PZ001']
+    resultado = resample_por_grupo(completos, 'pozo_id', 'D', columnas=['produccion_bpd'], agregados=AGREGADOS)
+    assert resultado['sum'].dtype == np.int64
+    for agregado in ['min', 'max', 'first', 'last']:
+        assert resultado[agregado].dtype == np.int32
+    # Con un día vacío la suma sigue siendo entera (0) y el resto pasa a float con NaN
+    resultado = resample_por_grupo(pozos, 'pozo_id', 'D', columnas=['produccion_bpd'], agregados=AGREGADOS)
+    assert resultado['sum'].dtype == np.int64
+    assert resultado['min'].dtype == np.float64
+
+
+@pytest.mark.parametrize('escala', [1, 900 * 10 ** 9, None])
+@pytest.mark.parametrize('side', ['left', 'right'])
+def test_buscar_por_grupo(escala, side):
+    generador = np.random.default_rng(2)
+    # escala None: tiempos irregulares enormes, la clave (grupo, tiempo) desborda
+    if escala is None:
+        tiempos = generador.integers(0, 2 ** 61, 300)
+        buscados = generador.integers(-2 ** 61, 2 ** 62, 200)
+    else:
+        tiempos = generador.integers(0, 50, 300) * escala
+        buscados = generador.integers(-10, 60, 200) * escala + generador.integers(0, 2, 200)
+    codigos = generador.integers(-1, 6, 300)
+    orden = np.lexsort((tiempos, codigos))
+    codigos, tiempos = codigos[orden], tiempos[orden]
+    codigos_buscados = generador.integers(-1, 6, 200)
+
+    obtenidas = buscar_por_grupo(codigos, tiempos, codigos_buscados, buscados, side=side)
+    esperadas = []
+    for codigo, buscado in zip(codigos_buscados, buscados):
+        primera = np.searchsorted(codigos, codigo, side='left')
+        ultima = np.searchsorted(codigos, codigo, side='right')
+        esperadas.append(primera + np.searchsorted(tiempos[primera:ultima], buscado, side=side))
+    np.testing.assert_array_equal(obtenidas, esperadas)
@@ -0,0 +1,61 @@
+"""
+PRUEBAS DE TENDENCIAS MÓVILES
+Sesión 12: Series Temporales en Pandas
+
+Compara `series_temporales.tendencias.regresion_movil` con `np.polyfit`
+ventana por ventana, incluido un tramo constante donde el centrado por
+bloque dejaba un residuo de redondeo en R².
+
+Uso:
+    python -m pytest tests/test_tendencias.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales.tendencias import regresion_movil
+
+VENTANA = 28
+
+
+@pytest.fixture(scope='module')
+def serie():
+    """Serie de escala 3e4 con un tramo constante en 7.7 que cruza un bloque"""
+    valores = 3e4 + np.random.default_rng(0).normal(0, 1e3, 70000)
+    valores[65500:65700] = 7.7
+    valores[100:110] = np.nan
+    return pd.Series(valores)
+
+
+def _ajuste(ventana):
+    validos = ~np.isnan(ventana)
+    t = np.arange(len(ventana))[validos]
+    pendiente, intercepto = np.polyfit(t, ventana[validos], 1)
+    return pendiente, intercepto
+
+
+def test_igual_a_polyfit(serie):
+    resultado = regresion_movil(serie, VENTANA, min_periods=2)
+    valores = serie.to_numpy()
+    for fila in [VENTANA - 1, 105, 120, 65000, 65520, 65740, len(valores) - 1]:
+        esperado = _ajuste(valores[fila - VENTANA + 1:fila + 1])
+        obtenido = resultado.iloc[fila][['pendiente', 'intercepto']].to_numpy(dtype=np.float64)
+        np.testing.assert_allclose(obtenido, esperado, rtol=1e-8, atol=1e-8)
+
+
+def test_ventana_constante(serie):
+    resultado = regresion_movil(serie, VENTANA)
+    moviles = serie.rolling(VENTANA)
+    constantes = (moviles.max() == moviles.min()).to_numpy()
+    assert constantes.sum() == 200 - VENTANA + 1
+    assert resultado['r2'][constantes].isna().all()
+    assert (resultado['pendiente'][constantes] == 0).all()
+    np.testing.assert_allclose(resultado['intercepto'][constantes], 7.7)
+    completas = (moviles.count() == VENTANA).to_numpy()
+    assert resultado['r2'][completas & ~constantes].notna().all()
@@ -0,0 +1,70 @@
+"""
+PRUEBAS DE ESTADÍSTICAS MÓVILES EN UNA SOLA PASADA
+Sesión 12: Series Temporales en Pandas
+
+Compara `series_temporales.ventanas.estadisticas_moviles` con `rolling()`
+en una serie con un tramo constante, donde el centrado por bloque dejaba
+un residuo de redondeo en la varianza.
+
+Uso:
+    python -m pytest tests/test_ventanas.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales.anomalias import DetectorLimites
+from series_temporales.ventanas import estadisticas_moviles
+
+VENTANA = 28
+
+
+@pytest.fixture(scope='module')
+def serie():
+    """Serie de escala 3e4 con un tramo constante en 7.7 y algunos NaN"""
+    valores = 3e4 + np.random.default_rng(0).normal(0, 1e3, 70000)
+    valores[65500:65700] = 7.7
+    valores[100:110] = np.nan
+    return pd.Series(valores, index=pd.date_range('2023-01-01', periods=len(valores), freq='15min'))
+
+
+def _constantes(serie, ventana):
+    moviles = serie.rolling(ventana)
+    return (moviles.max() == moviles.min()).to_numpy()
+
+
+@pytest.mark.parametrize('estadistica', ['std', 'var'])
+def test_ventana_constante_igual_a_pandas(serie, estadistica):
+    obtenida = estadisticas_moviles(serie, [estadistica], [VENTANA])[(0, estadistica, VENTANA)].to_numpy()
+    esperada = getattr(serie.rolling(VENTANA), estadistica)().to_numpy()
+    constantes = _constantes(serie, VENTANA)
+    assert constantes.sum() == 200 - VENTANA + 1
+    # pandas 2.x da 0 exacto; pandas 3 deja también un residuo de redondeo
+    assert (obtenida[constantes] == 0).all()
+    np.testing.assert_allclose(obtenida[~constantes], esperada[~constantes], rtol=1e-9)
+
+
+def test_detector_por_lote_sin_residuo(serie):
+    resultado = DetectorLimites(VENTANA).actualizar(serie)
+    constantes = _constantes(serie, VENTANA)
+    assert (resultado['desviacion'].to_numpy()[constantes] == 0).all()
+    np.testing.assert_allclose(resultado['desviacion'], serie.rolling(VENTANA).std().where(~constantes, 0.0),
+                               rtol=1e-9)
+
+
+@pytest.mark.parametrize('min_periods', [0, 1, 3, None])
+def test_min_periods_igual_a_pandas(min_periods):
+    valores = np.arange(40, dtype=np.float64)
+    valores[5:20] = np.nan
+    serie = pd.Series(valores)
+    estadisticas = ['count', 'sum', 'mean', 'std', 'min', 'max']
+    obtenidas = estadisticas_moviles(serie, estadisticas, [4], min_periods=min_periods)
+    for estadistica in estadisticas:
+        esperada = getattr(serie.rolling(4, min_periods=min_periods), estadistica)()
+        pd.testing.assert_series_equal(obtenidas[(0, estadistica, 4)], esperada, check_names=False)
@@ -0,0 +1,91 @@
+"""
+PRUEBAS DE VENTANAS MÓVILES POR TIEMPO
+Sesión 12: Series Temporales en Pandas
+
+Compara `series_temporales.ventanas_tiempo` con `rolling('7h')` en una
+serie con un tramo constante, donde el centrado por bloque dejaba un
+residuo de redondeo en la varianza y correlaciones de 1.0.
+
+Uso:
+    python -m pytest tests/test_ventanas_tiempo.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar el paquete series_temporales desde la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from series_temporales.ventanas_tiempo import correlacion_movil_tiempo, estadisticas_moviles_tiempo
+
+VENTANA = '7h'
+
+
+@pytest.fixture(scope='module')
+def serie():
+    """Serie cada 15 minutos de escala 3e4 con un tramo constante en 7.7 y algunos NaN"""
+    valores = 3e4 + np.random.default_rng(0).normal(0, 1e3, 70000)
+    valores[65500:65700] = 7.7
+    valores[100:110] = np.nan
+    return pd.Series(valores, index=pd.date_range('2023-01-01', periods=len(valores), freq='15min'))
+
+
+def _constantes(serie, ventana):
+    """Ventanas con al menos dos valores, todos iguales"""
+    moviles = serie.rolling(ventana)
+    return ((moviles.max() == moviles.min()) & (moviles.count() >= 2)).to_numpy()
+
+
+@pytest.mark.parametrize('estadistica', ['std', 'var'])
+def test_ventana_constante_igual_a_pandas(serie, estadistica):
+    obtenida = estadisticas_moviles_tiempo(serie, [estadistica], [VENTANA])[(0, estadistica, VENTANA)].to_numpy()
+    esperada = getattr(serie.rolling(VENTANA), estadistica)().to_numpy()
+    constantes = _constantes(serie, VENTANA)
+    assert constantes.sum() == 200 - 28 + 1
+    assert (obtenida[constantes] == 0).all()
+    np.testing.assert_allclose(obtenida[~constantes], esperada[~constantes], rtol=1e-9)
+
+
+def test_pendiente_de_ventana_constante(serie):
+    pendiente = estadisticas_moviles_tiempo(serie, ['pendiente'], [VENTANA])[(0, 'pendiente', VENTANA)]
+    assert (pendiente[_constantes(serie, VENTANA)] == 0).all()
+
+
+def test_correlacion_con_columna_constante(serie):
+    df = pd.DataFrame({'a': serie, 'b': np.sin(np.arange(len(serie)))}, index=serie.index)
+    obtenida = correlacion_movil_tiempo(df, 'a', 'b', VENTANA).to_numpy()
+    esperada = df['a'].rolling(VENTANA).corr(df['b']).to_numpy()
+    constantes = _constantes(serie, VENTANA)
+    assert np.isnan(obtenida[constantes]).all()
+    np.testing.assert_allclose(obtenida[~constantes], esperada[~constantes], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('min_periods', [0, 1, 3])
+def test_min_periods_igual_a_pandas(serie, min_periods):
+    estadisticas = ['count', 'sum', 'mean', 'std', 'min', 'max']
+    obtenidas = estadisticas_moviles_tiempo(serie.iloc[:400], estadisticas, ['2h'], min_periods=min_periods)
+    for estadistica in estadisticas:
+        esperada = getattr(serie.iloc[:400].rolling('2h', min_periods=min_periods), estadistica)()
+        pd.testing.assert_series_equal(obtenidas[(0, estadistica, '2h')], esperada, check_names=False, rtol=1e-9)
+
+
+def test_por_grupo_igual_a_pandas():
+    generador = np.random.default_rng(1)
+    partes = []
+    for numero in range(50):
+        # Cada pozo con su propio muestreo irregular
+        fechas = pd.Timestamp('2023-01-01') + pd.to_timedelta(np.sort(generador.integers(0, 30 * 24 * 60, 60)),
+                                                              unit='min')
+        partes.append(pd.DataFrame({'pozo_id': f'PZ{numero:03d}', 'caudal_bpd': generador.normal(800, 50, 60)},
+                                   index=pd.DatetimeIndex(fechas, name='fecha')))
+    df = pd.concat(partes).sample(frac=1, random_state=0)
+    obtenidas = estadisticas_moviles_tiempo(df, ['count', 'mean', 'max'], ['2D'], columna_grupo='pozo_id')
+    ordenado = df.reset_index().sort_values(['pozo_id', 'fecha'], kind='stable').set_index('fecha')
+    esperadas = ordenado.groupby('pozo_id')['caudal_bpd'].rolling('2D').agg(['count', 'mean', 'max'])
+    posiciones = df.reset_index().sort_values(['pozo_id', 'fecha'], kind='stable').index
+    for estadistica in ['count', 'mean', 'max']:
+        np.testing.assert_allclose(obtenidas[('caudal_bpd', estadistica, '2D')].to_numpy()[posiciones],
+                                   esperadas[estadistica].to_numpy(), rtol=1e-9)